@@ -32,7 +32,7 @@ from UI import newComponent, flujo, wizard, plots, viewComponents
 from UI.petro import Definicion_Petro
 import plots as charts
 from UI.widgets import createAction, ClickableLabel
-from lib import config
+from lib import config, corriente
 from lib.config import (conf_dir, setMainWindowConfig, IMAGE_PATH, Preferences)
 from lib.project import Project
 from lib.EoS import K, H
@@ -249,6 +249,10 @@ class UI_pychemqt(QtWidgets.QMainWindow):
         icon = IMAGE_PATH + "pychemqt.png"
         self.setWindowIcon(QtGui.QIcon(QtGui.QPixmap(icon)))
 
+        # Keep the interface responsive while the streams are calculated
+        corriente.progress = lambda stream: \
+            QtWidgets.QApplication.processEvents()
+
         # Acciones
         fileNewAction = createAction(
             QtWidgets.QApplication.translate("pychemqt", "&New"),
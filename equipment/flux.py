@@ -29,7 +29,6 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 import os
 
 from PyQt5.QtWidgets import QApplication
-from scipy.optimize import fsolve
 
 from lib.corriente import Corriente
 from lib import unidades
@@ -243,7 +242,7 @@ class Mixer(equipment):
                         fraccionMasica=[1.])
     >>> mezclador=Mixer(entrada=[agua, agua2], criterio=0)
     >>> print(mezclador.salida[0].T)
-    341.6818851215901
+    341.68270417517346
     """
     title = QApplication.translate("pychemqt", "Mixer")
     help = ""
@@ -330,29 +329,23 @@ class Mixer(equipment):
                 Pout = sum(lst, 0.0) / len(lst)
         self.Pout = unidades.Pressure(Pout)
 
-        # Heat balance for calculate output temperature
+        # Heat balance for calculate output temperature, solved in the
+        # output stream definition with pressure and enthalpy
         h_in = 0
-        To = 0
         massUnitFlow = [0]*len(self.entrada[0].fraccion)
         for entrada in self.entrada:
             if entrada.status:
                 h_in += entrada.h
-                To += entrada.T*entrada.caudalmasico
                 for i, caudal in enumerate(entrada.caudalunitariomasico):
                     massUnitFlow[i] += caudal
-        To /= sum(massUnitFlow)
-
-        def f(T):
-            output = Corriente(T=T, P=self.Pout,
-                               caudalUnitarioMasico=massUnitFlow)
-            return output.h-h_in
-        T = fsolve(f, To)[0]
 
         # TODO: Add solid mixer capability
         if self.entrada[0].solido:
             pass
 
-        salida = Corriente(T=T, P=self.Pout, caudalUnitarioMasico=massUnitFlow)
+        salida = Corriente(P=self.Pout, h=h_in,
+                           caudalUnitarioMasico=massUnitFlow,
+                           settings=self.entrada[0].kwargs["settings"])
         self.salida = [salida]
 
         # Calculate other properties
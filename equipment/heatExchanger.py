@@ -32,7 +32,6 @@ import os
 from PyQt5.QtWidgets import QApplication
 from scipy import sqrt, exp, log, pi, arccos, sin, cos, tanh
 from scipy.constants import g
-from scipy.optimize import fsolve
 
 from lib import unidades
 from lib.adimensional import Re, Pr, Gr, Gz
@@ -60,6 +59,25 @@ class Heat_Exchanger(equipment):
     >>> Cambiador = Heat_Exchanger(entrada=agua, Tout=350)
     >>> print("%6g" % Cambiador.HeatCalc.MJh)
     753.063
+
+    The output stream can be defined with the output temperature, the heat
+    duty or the heat exchanger characteristic, the output temperature is
+    limited then by the external temperature
+
+    >>> agua = Corriente(T=300, P=101325., caudalMasico=1., ids=[62],
+    ...                  fraccionMolar=[1.], MEoS=True)
+    >>> Cambiador = Heat_Exchanger(entrada=agua, DeltaT=20)
+    >>> print("%0.1f %0.1f" % (Cambiador.ToutCalc, Cambiador.HeatCalc))
+    320.0 83593.7
+    >>> Cambiador = Heat_Exchanger(entrada=agua, Heat=1e5)
+    >>> print("%0.2f %0.1f" % (Cambiador.ToutCalc, Cambiador.HeatCalc))
+    323.92 100000.0
+    >>> Cambiador = Heat_Exchanger(entrada=agua, A=10, U=100, Text=400)
+    >>> print("%0.2f %0.1f" % (Cambiador.ToutCalc, Cambiador.HeatCalc))
+    323.92 100000.0
+    >>> Cambiador = Heat_Exchanger(entrada=agua, A=1000, U=100, Text=350)
+    >>> print("%0.2f %0.1f" % (Cambiador.ToutCalc, Cambiador.HeatCalc))
+    350.00 209184.2
     """
     title = QApplication.translate("pychemqt", "Heat Exchanger")
     help = ""
@@ -147,17 +165,21 @@ class Heat_Exchanger(equipment):
             self.HeatCalc = unidades.Power(self.salida[0].h-entrada.h)
         else:
             if self.modo == 2:
-                self.HeatCalc = unidades.Power(0)
+                self.HeatCalc = unidades.Power(self.kwargs["Heat"])
             else:
                 self.HeatCalc = unidades.Power(A*U*(Text-entrada.T))
 
-            def f():
-                output = entrada.clone(T=T, P=entrada.P-self.deltaP)
-                return output.h-entrada.h-self.HeatCalc
-            T = fsolve(f, entrada.T)[0]
-            if T > max(Text, entrada.T) or T < min(Text, entrada.T):
-                T = self.Text
-            self.salida = [entrada.clone(T=T, P=entrada.P-self.deltaP)]
+            salida = entrada.clone(P=entrada.P-self.deltaP,
+                                   h=entrada.h+self.HeatCalc)
+
+            # The stream can't be heated or cooled beyond the external
+            # temperature
+            if self.modo == 3:
+                T = salida.T
+                if T > max(Text, entrada.T) or T < min(Text, entrada.T):
+                    salida = entrada.clone(T=Text, P=entrada.P-self.deltaP)
+                    self.HeatCalc = unidades.Power(salida.h-entrada.h)
+            self.salida = [salida]
 
         self.Tin = entrada.T
         self.ToutCalc = self.salida[0].T
@@ -346,10 +368,8 @@ class Fired_Heater(equipment):
 
         if self.Hmax and Heat > self.Hmax:
             self.Heat = unidades.Power(self.Hmax)
-            To = (entrada.T+self.Tout)/2
-            T = fsolve(lambda T: entrada.clone(
-                T=T, P=entrada.P-self.deltaP).h-Ho-self.Hmax, To)[0]
-            self.salida = [entrada.clone(T=T, P=entrada.P-self.deltaP)]
+            self.salida = [entrada.clone(P=entrada.P-self.deltaP,
+                                         h=Ho+self.Hmax)]
         else:
             self.Heat = Heat
             self.salida = [salida]
@@ -847,15 +867,8 @@ class Hairpin(equipment):
                 QTube = -self.Q
                 QAnnulli = self.Q
 
-            def f(T):
-                return inTube.clone(T=T).h-inTube.h+QTube
-            T = fsolve(f, inTube.T)[0]
-            self.outTube = inTube.clone(T=T)
-
-            def f(T):
-                return inAnnulli.clone(T=T).h-inAnnulli.h+QAnnulli
-            T = fsolve(f, inAnnulli.T)[0]
-            self.outAnnulli = inAnnulli.clone(T=T)
+            self.outTube = inTube.clone(h=inTube.h-QTube)
+            self.outAnnulli = inAnnulli.clone(h=inAnnulli.h-QAnnulli)
 
     def design(self):
         """Design a pipe to meet the specified heat transfer requeriments"""
@@ -893,10 +906,7 @@ class Hairpin(equipment):
                 Qi = abs(self.outTube.h-inTube.h)
                 self.Q = unidades.Power(Qi)
 
-                def f(T):
-                    return inAnnulli.clone(T=T).h-inAnnulli.h-Qi
-                T = fsolve(f, inAnnulli.T)[0]
-                self.outAnnulli = inAnnulli.clone(T=T)
+                self.outAnnulli = inAnnulli.clone(h=inAnnulli.h+Qi)
 
             elif self.statusOut == 3:
                 if self.kwargs["annulliTout"]:
@@ -909,10 +919,7 @@ class Hairpin(equipment):
                 Qo = abs(self.outAnnulli.h-inAnnulli.h)
                 self.Q = unidades.Power(Qo)
 
-                def f(T):
-                    return inTube.clone(T=T).h-inTube.h-Qi
-                T = fsolve(f, inTube.T)[0]
-                self.outTube = inTube.clone(T=T)
+                self.outTube = inTube.clone(h=inTube.h+Qo)
 
             self.phaseTube = self.ThermalPhase(inTube, self.outTube)
             self.phaseAnnulli = self.ThermalPhase(inAnnulli, self.outAnnulli)
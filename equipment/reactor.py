@@ -97,11 +97,13 @@ class Reactor(equipment):
 
         if self.thermal in [0, 2]:
 
+            # The energy balance is solved in the output stream definition,
+            # iterating only the temperature dependence of conversion
             def f(T):
                 fracciones, h=self.reaccion.conversion(self.entrada, T)
-                corriente=Corriente(T, self.entrada.P.atm, self.entrada.caudalmasico.kgh, Mezcla(self.entrada.ids, fracciones), self.entrada.solido)
-                return corriente.h-self.Q-self.entrada.h-h
-            T=fsolve(f, self.entrada.T)
+                corriente=Corriente(P=self.entrada.P, h=self.entrada.h+self.Q+h, caudalMasico=self.entrada.caudalmasico, fraccionMolar=fracciones, ids=self.entrada.ids, solido=self.entrada.solido)
+                return corriente.T-T
+            T=fsolve(f, self.entrada.T)[0]
             fracciones, h=self.reaccion.conversion(self.entrada, T)
 
         elif self.thermal==1:
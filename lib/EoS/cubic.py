@@ -22,14 +22,16 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 # Virial equation of state implementation
 ###############################################################################
 
+from numpy import array, asarray, dot, where
 from scipy import roots, r_, log, exp, sqrt
+from scipy.constants import atm
 
 from PyQt5.QtWidgets import QApplication
 
 from lib import unidades, config
 from lib.eos import EoS
 from lib.physics import R_atml
-from lib.bip import Kij
+from lib.bip import Aij, Kij, Mix_van_der_Waals, srk, pr
 
 
 # # TODO: Añadir parametros S1,S2 a la base de datos, API databook, pag 823
@@ -55,12 +57,23 @@ alfa = (QApplication.translate("pychemqt", "Original"),
 class Cubic(EoS):
     """Clase que modela de manera generalizada las ecuaciones de estado cúbicas
     ref. Prausnick  Propiedades de gases y liquidos, pag 203"""
+    _bip=None
+
     def __init__(self, T, P, mezcla):
-        self.T=unidades.Temperature(T)
-        self.P=unidades.Pressure(P, "atm")
         self.mezcla=mezcla
         self.componente=mezcla.componente
         self.fraccion=mezcla.fraccion
+        self.kij=Kij(mezcla, T, self._bip)
+        self.T=None
+        self.update(T, P)
+
+    def update(self, T, P):
+        """Recalculate the equation of state at a new temperature and
+        pressure, reusing the mixture definition and the binary interaction
+        parameters, the temperature dependent parameters are calculated only
+        if the temperature change"""
+        self._setTemperature(T)
+        self.P=unidades.Pressure(P, "atm")
 
         self.B=self.b*self.P.atm/R_atml/self.T
         self.Tita=self.tita*self.P.atm/(R_atml*self.T)**2
@@ -72,20 +85,105 @@ class Cubic(EoS):
         self.Z=r_[Z[0].real, Z[2].real]
 
         self.V=self.Z*R_atml*self.T/self.P.atm  #mol/l
+
         self.x, self.xi, self.yi, self.Ki=self._Flash()
         self.H_exc=-(self.tita+self.dTitadT)/R_atml/self.T/(self.delta**2-4*self.epsilon)**0.5*log((2*self.V+self.delta-(self.delta**2-4*self.epsilon)**0.5)/(2*self.V+self.delta+(self.delta**2-4*self.epsilon)**0.5))+1-self.Z
 
+    def _setTemperature(self, T):
+        """Calculate the temperature dependent parameters if the temperature
+        change"""
+        if self.T is None or T != self.T:
+            self.T=unidades.Temperature(T)
+            # Generalized hydrogen kij is temperature dependent
+            if self._bip and 1 in self.mezcla.ids:
+                self.kij=Kij(self.mezcla, self.T, self._bip)
+            self._parameters(self.T, self.mezcla)
+            self.aij=Aij(self.ai, self.kij)
+
+    def _phaseParameters(self, T, P, xi):
+        """Composition dependent terms of fugacity coefficients for a phase
+        with composition xi at T and P in atm, return the reduced mixture
+        parameters A and B and the partial parameters of components Ai, Bi"""
+        self._setTemperature(T)
+        xi=asarray(xi, dtype=float)
+        a=dot(xi, dot(self.aij, xi))
+        b=dot(xi, self.bi)
+        A=a*P/(R_atml*T)**2
+        B=b*P/R_atml/T
+        Ai=2*dot(self.aij, xi)/a
+        Bi=self.bi/b
+        return A, B, Ai, Bi
+
+    def _lnphiZ(self, Z, A, B, Ai, Bi):
+        """Logarithm of fugacity coefficients for the compressibility factor Z
+        and the composition dependent terms of _phaseParameters"""
+        u=self.u
+        d=sqrt(u**2-4*self.w)
+        return Bi*(Z-1)-log(Z-B)-A/B/d*(Ai-Bi)*log(
+            (Z+B/2*(u+d))/(Z+B/2*(u-d)))
+
+    def _lnphiPhase(self, T, P, xi, phase):
+        """Logarithm of fugacity coefficients of components in a phase with
+        composition xi at T and P in atm, using the vapor like root (phase=0)
+        or the liquid like root (phase=1) of equation for that composition"""
+        A, B, Ai, Bi=self._phaseParameters(T, P, xi)
+
+        u=self.u
+        w=self.w
+        Z=roots([1, u*B-B-1, A+w*B**2-u*B*(B+1), -w*B**2*(B+1)-A*B])
+        Z=[z.real for z in Z if abs(z.imag) < 1e-10 and z.real > B]
+        if phase:
+            Z=min(Z)
+        else:
+            Z=max(Z)
+        return self._lnphiZ(Z, A, B, Ai, Bi)
+
+    def _parameters(self, T, mezcla):
+        """Calculate the temperature dependent parameters of equation, ai, bi,
+        mixture parameters and its temperature derivative, must be defined in
+        each equation"""
+        raise NotImplementedError
+
+    def _dTitadT(self, mezcla, T, aci, mi=None):
+        """Temperature derivative of mixture attractive parameter, for alpha
+        function with form (1+m(1-Tr^0.5))^2, without m for the alpha
+        functions with the m include in aci"""
+        x=asarray(mezcla.fraccion, dtype=float)
+        aci=asarray(aci, dtype=float)
+        Tr=T/mezcla.constants.Tc
+        v=x*(aci*Tr)**0.5
+        if mi is not None:
+            v*=mi
+        return -dot(x*aci**0.5, dot(1-self.kij, v))
+
+    def _alfa(self, Tr, m):
+        """Soave alpha function of components, (1+m(1-Tr^0.5))^2, with the
+        Boston-Mathias extrapolation for supercritical components if it's
+        selected in configuration, Tr and m as arrays"""
+        alfa=(1+m*(1-Tr**0.5))**2
+        Config=config.getMainWindowConfig()
+        if Config.getint("Thermo","Alfa")==1:
+            d=1.+m/2.
+            c=1.-1./d
+            alfa=where(Tr>1, exp(c*(1-Tr**d))**2, alfa)
+        return alfa
+
     def _fug(self, Z, xi):
-        Ai=[]
-        for i in range(len(self.componente)):
-            suma=0
-            for j in range(len(self.componente)):
-                suma+=self.fraccion[j]*self.ai[j]**0.5*(1-self.kij[i][j])
-            Ai.append(1/self.tita*2*self.ai[i]**0.5*suma)
-        tita=[]
-        for i in range(len(self.componente)):
-            tita.append(exp(self.bi[i]/self.b*(Z-1)-log(Z-self.B)-self.Tita/self.B/sqrt(self.u**2-4*self.w)*(Ai[i]-self.bi[i]/self.b)*log((Z+self.B/2*(self.u+sqrt(self.u**2-4*self.w)))/(Z+self.B/2*(self.u-sqrt(self.u**2-4*self.w))))).real)
-        return tita
+        """Fugacity coefficients of components in a phase with composition
+        xi, Z can be an array with several compressibility factors to get
+        the fugacity coefficients for each one as rows of a matrix
+
+        >>> from lib.mezcla import Mezcla
+        >>> mix = Mezcla(2, ids=[2, 3, 4], caudalUnitarioMolar=[0.6, 0.3, 0.1])
+        >>> eq = PR(230, 20, mix)
+        >>> ["%0.4f" % phi for phi in eq._fug(eq.Z[0], eq.yi)]
+        ['0.9245', '0.6980', '0.5514']
+        >>> ["%0.4f" % phi for phi in eq._fug(eq.Z[0], eq.xi)]
+        ['0.9353', '0.6752', '0.5228']
+        """
+        Z=asarray(Z)[..., None]
+        A, B, Ai, Bi=self._phaseParameters(self.T, self.P.atm, xi)
+        return exp(self._lnphiZ(Z, A, B, Ai, Bi)).real
 
 
 class _2ParameterCubic(Cubic):
@@ -96,18 +194,17 @@ class van_Waals(Cubic):
         van der Waals, J.D. Over de continuiteit van den gas- en vloestof-toestand. Dissertation, Leiden University, Leiden, Niederlande, 1873."""
     __title__="van der Waals (1890)"
     __status__="vdW"
-    def __init__(self, T, P, mezcla):
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         for componente in mezcla.componente:
             a, b=self.__lib(componente)
             ai.append(a)
             bi.append(b)
-        self.kij=Kij(None)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=0
@@ -119,7 +216,6 @@ class van_Waals(Cubic):
         self.w=0
 
         self.dTitadT=0
-        super(van_Waals, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto):
@@ -133,19 +229,18 @@ class RK(Cubic):
     Redlich, O.; Kwong, J.N.S., On The Thermodynamics of Solutions. Chem. Rev. 1949, 44, 233."""
     __title__="Redlich-Kwong (1949)"
     __status__="RK"
-    def __init__(self, T, P, mezcla):
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         for componente in mezcla.componente:
             a, b=self.__lib(componente, T)
             ai.append(a)
             bi.append(b)
-        self.kij=Kij(None)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
         tdadt=0
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=b
@@ -157,7 +252,6 @@ class RK(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(RK, self).__init__(T, P, mezcla)
 
     def __lib(self, compuesto, T):
         a=0.42747*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
@@ -172,19 +266,18 @@ class Wilson(Cubic):
     __title__="Wilson (1964)"
     __status__="Wilson"
 
-    def __init__(self, T, P, mezcla):
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         for componente in mezcla.componente:
             a, b=self.__lib(componente, T)
             ai.append(a)
             bi.append(b)
-        self.kij=Kij(None)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
         tdadt=0
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=b
@@ -195,7 +288,6 @@ class Wilson(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(Wilson, self).__init__(T, P, mezcla)
 
     def __lib(self, compuesto, T):
         """Librería de cálculo de la ecuación de estado de Wilson"""
@@ -211,7 +303,9 @@ class Fuller(Cubic):
     __title__="Fuller (1976)"
     __status__="Fuller"
 
-    def __init__(self, T, P, mezcla):
+    _bip=srk
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         ci=[]
@@ -219,13 +313,12 @@ class Fuller(Cubic):
             a, b, c=self.__lib(componente, T)
             ai.append(a)
             bi.append(b)
-            ci.append(ac)
-        self.kij=Kij(SRK)
-        a, b=mezcla.Mix_van_der_Waals([ai, bi, ci], self.kij)
+            ci.append(c)
+        a, b, c=Mix_van_der_Waals(mezcla, [ai, bi, ci], self.kij)
         tdadt=0
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.ci=ci
         self.b=b
         self.tita=a
@@ -237,7 +330,6 @@ class Fuller(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(Fuller, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -261,23 +353,18 @@ class SRK(Cubic):
     __title__="SRK (1972)"
     __status__="SRK"
 
-    def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=Kij(SRK)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+    _bip=srk
+
+    def _parameters(self, T, mezcla):
+        Tc=mezcla.constants.Tc
+        Pc=mezcla.constants.Pc/atm
+        w=mezcla.constants.f_acent
+        aci=0.42748*R_atml**2*Tc**2/Pc
+        bi=0.08664*R_atml*Tc/Pc
+        mi=0.48+1.574*w-0.176*w**2
+        ai=aci*self._alfa(T/Tc, mi)
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
         self.ai=ai
         self.bi=bi
@@ -291,25 +378,6 @@ class SRK(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(SRK, self).__init__(T, P, mezcla)
-
-
-    def __lib(self, compuesto, T):
-        """Librería de cálculo de la ecuación de estado de Soave-Redlich-Kwong,"""
-        Tr=T/compuesto.Tc
-        ac=0.42748*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
-        m=0.48+1.574*compuesto.f_acent-0.176*compuesto.f_acent**2
-
-        Config=config.getMainWindowConfig()
-        Alpha_Mathias=Config.getint("Thermo","Alfa")
-        if Alpha_Mathias==1 and Tr>1:
-            d=1.+m/2.
-            c=1.-1./d
-            alfa=exp(c*(1-Tr**d))**2
-        else:
-            alfa=(1+m*(1-Tr**0.5))**2
-        return ac*alfa, b, ac, m
 
 
 class SRK_API(Cubic):
@@ -318,23 +386,18 @@ class SRK_API(Cubic):
     __title__="SRK-API (1979)"
     __status__="SRK-API"
 
-    def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=Kij(SRK)
-        a, b=mezcla.Mix_van_der_Waals([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+    _bip=srk
+
+    def _parameters(self, T, mezcla):
+        Tc=mezcla.constants.Tc
+        Pc=mezcla.constants.Pc/atm
+        w=mezcla.constants.f_acent
+        aci=0.42748*R_atml**2*Tc**2/Pc
+        bi=0.08664*R_atml*Tc/Pc
+        mi=0.48505+1.55171*w-0.15613*w**2
+        ai=aci*self._alfa(T/Tc, mi)
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
         self.ai=ai
         self.bi=bi
@@ -348,25 +411,6 @@ class SRK_API(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(SRK_API, self).__init__(T, P, mezcla)
-
-
-    def __lib(self, compuesto, T):
-        """Librería de cálculo de la ecuación de estado de Soave-Redlich-Kwong,"""
-        Tr=T/compuesto.Tc
-        ac=0.42748*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
-        m=0.48505+1.55171*compuesto.f_acent-0.15613*compuesto.f_acent**2
-
-        Config=config.getMainWindowConfig()
-        Alpha_Mathias=Config.getint("Thermo","Alfa")
-        if Alpha_Mathias==1 and Tr>1:
-            d=1.+m/2.
-            c=1.-1./d
-            alfa=exp(c*(1-Tr**d))**2
-        else:
-            alfa=(1+m*(1-Tr**0.5))**2
-        return ac*alfa, b, ac, m
 
 
 class MSRK(Cubic):
@@ -375,7 +419,9 @@ class MSRK(Cubic):
     __title__="M-SRK (1984)"
     __status__="MSRK"
 
-    def __init__(self, T, P, mezcla):
+    _bip=srk
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -386,15 +432,11 @@ class MSRK(Cubic):
             bi.append(b)
             aci.append(ac)
             mi.append(m)
-        self.kij=Kij(SRK)
-        a, b=mezcla.Mix_van_der_Waals([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=b
@@ -405,7 +447,6 @@ class MSRK(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(MSRK, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -426,19 +467,20 @@ class SRK_Graboski(Cubic):
     __title__="SRK-Graboski-Daubert (1978)"
     __status__="SRK-GD"
 
-    def __init__(self, T, P, mezcla):
+    _bip=srk
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         for componente in mezcla.componente:
             a, b=self.__lib(componente, T)
             ai.append(a)
             bi.append(b)
-        self.kij=Kij(SRK)
-        a, b=mezcla.Mix_van_der_Waals([ai, bi], self.kij)
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
         tdadt=0
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=b
@@ -449,7 +491,6 @@ class SRK_Graboski(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(SRK_Thorwart, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -480,7 +521,9 @@ class SRK_Mathias(Cubic):
     __title__="SRK-Mathias (1983)"
     __status__="SRK-Math"
 
-    def __init__(self, T, P, mezcla):
+    _bip=srk
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -491,15 +534,11 @@ class SRK_Mathias(Cubic):
             bi.append(b)
             aci.append(ac)
             mi.append(m)
-        self.kij=Kij(SRK)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=b
@@ -510,7 +549,6 @@ class SRK_Mathias(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(SRK, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -537,7 +575,9 @@ class SRK_Adachi(Cubic):
     __title__="SRK-Adachi-Lu (1984)"
     __status__="SRK-Adachi"
 
-    def __init__(self, T, P, mezcla):
+    _bip=srk
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -548,15 +588,11 @@ class SRK_Adachi(Cubic):
             bi.append(b)
             aci.append(ac)
             mi.append(m)
-        self.kij=Kij(SRK)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=b
@@ -567,7 +603,6 @@ class SRK_Adachi(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(SRK, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -586,7 +621,9 @@ class SRK_Androulakis(Cubic):
     __title__="SRK-Androulakis (1984)"
     __status__="SRK-And"
 
-    def __init__(self, T, P, mezcla):
+    _bip=srk
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -597,15 +634,11 @@ class SRK_Androulakis(Cubic):
             bi.append(b)
             aci.append(ac)
             mi.append(m)
-        self.kij=Kij(SRK)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=b
@@ -616,7 +649,6 @@ class SRK_Androulakis(Cubic):
         self.w=0
 
         self.dTitadT=tdadt
-        super(SRK, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -641,23 +673,18 @@ class PR(Cubic):
     __title__="Peng-Robinson (1976)"
     __status__="PR"
 
-    def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+    _bip=pr
+
+    def _parameters(self, T, mezcla):
+        Tc=mezcla.constants.Tc
+        Pc=mezcla.constants.Pc/atm
+        w=mezcla.constants.f_acent
+        aci=0.457235*R_atml**2*Tc**2/Pc
+        bi=0.077796*R_atml*Tc/Pc
+        mi=0.37464+1.54226*w-0.26992*w**2
+        ai=aci*self._alfa(T/Tc, mi)
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
         self.ai=ai
         self.bi=bi
@@ -671,25 +698,6 @@ class PR(Cubic):
         self.w=-1
 
         self.dTitadT=tdadt
-        super(PR, self).__init__(T, P, mezcla)
-
-
-    def __lib(self, compuesto, T):
-        Tr=T/compuesto.Tc
-        a=0.457235*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.077796*R_atml*compuesto.Tc/compuesto.Pc.atm
-        m=0.37464+1.54226*compuesto.f_acent-0.26992*compuesto.f_acent**2
-
-        Config=config.getMainWindowConfig()
-        Alpha_Mathias=Config.getint("Thermo","Alfa")
-        if Alpha_Mathias==1 and Tr>1:
-            d=1.+m/2.
-            c=1.-1./d
-            alfa=exp(c*(1-Tr**d))**2
-        else:
-            alfa=(1+m*(1-Tr**0.5))**2
-        return a*alfa, b, a, m
-
 
 
 class PRSV(Cubic):
@@ -701,7 +709,9 @@ class PRSV(Cubic):
                "ref": "Can. J. Chem. Eng. 1986, 64: 323–333",
                "doi":  "10.1002/cjce.5450640224"},
 
-    def __init__(self, T, P, mezcla):
+    _bip=pr
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -712,15 +722,11 @@ class PRSV(Cubic):
             bi.append(b)
             aci.append(ac)
             mi.append(k)
-        self.kij=Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=2*b
@@ -731,7 +737,6 @@ class PRSV(Cubic):
         self.w=-1
 
         self.dTitadT=tdadt
-        super(PR_SV, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -770,7 +775,9 @@ class PRSV2(Cubic):
                "ref": "Can. J. Chem. Eng., 64: 820–826",
                "doi":  "10.1002/cjce.5450640516"},
 
-    def __init__(self, T, P, mezcla):
+    _bip=pr
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -781,15 +788,11 @@ class PRSV2(Cubic):
             bi.append(b)
             aci.append(ac)
             mi.append(k)
-        self.kij=Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=2*b
@@ -800,7 +803,6 @@ class PRSV2(Cubic):
         self.w=-1
 
         self.dTitadT=tdadt
-        super(PR_SV, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -842,7 +844,9 @@ class PR_Gasem(Cubic):
     __title__="PR Gassem (2001)"
     __status__="PR-Gas"
 
-    def __init__(self, T, P, mezcla):
+    _bip=pr
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -853,15 +857,11 @@ class PR_Gasem(Cubic):
             bi.append(b)
             aci.append(ac)
             mi.append(m)
-        self.kij=Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=2*b
@@ -872,7 +872,6 @@ class PR_Gasem(Cubic):
         self.w=-1
 
         self.dTitadT=tdadt
-        super(PR_Gasem, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -890,7 +889,9 @@ class PR_Melhem(Cubic):
     __title__="PR Melhem (1989)"
     __status__="PR-Mel"
 
-    def __init__(self, T, P, mezcla):
+    _bip=pr
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -899,15 +900,11 @@ class PR_Melhem(Cubic):
             ai.append(a)
             bi.append(b)
             aci.append(ac)
-        self.kij=Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=2*b
@@ -918,7 +915,6 @@ class PR_Melhem(Cubic):
         self.w=-1
 
         self.dTitadT=tdadt
-        super(PR_Melhem, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -935,7 +931,9 @@ class PR_Almeida(Cubic):
     __title__="PR Almeida (1991)"
     __status__="PR-Alm"
 
-    def __init__(self, T, P, mezcla):
+    _bip=pr
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -944,15 +942,11 @@ class PR_Almeida(Cubic):
             ai.append(a)
             bi.append(b)
             aci.append(ac)
-        self.kij=Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=2*b
@@ -963,7 +957,6 @@ class PR_Almeida(Cubic):
         self.w=-1
 
         self.dTitadT=tdadt
-        super(PR_Almeida, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -980,7 +973,9 @@ class PR_Mathias_Copeman(Cubic):
     __title__="PR-Mathias-Copeman (1983)"
     __status__="PR-MC"
 
-    def __init__(self, T, P, mezcla):
+    _bip=pr
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -991,15 +986,11 @@ class PR_Mathias_Copeman(Cubic):
             bi.append(b)
             aci.append(ac)
             mi.append(m)
-        self.kij=Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=2*b
@@ -1010,7 +1001,6 @@ class PR_Mathias_Copeman(Cubic):
         self.w=-1
 
         self.dTitadT=tdadt
-        super(PR_Mathias_Copeman, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -1033,7 +1023,9 @@ class PR_Yu_Lu(Cubic):
     __title__="PR-Yu Lu (1987)"
     __status__="PR-YL"
 
-    def __init__(self, T, P, mezcla):
+    _bip=pr
+
+    def _parameters(self, T, mezcla):
         ai=[]
         bi=[]
         aci=[]
@@ -1044,15 +1036,11 @@ class PR_Yu_Lu(Cubic):
             bi.append(b)
             aci.append(ac)
             mi.append(m)
-        self.kij=Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
+        a, b=Mix_van_der_Waals(mezcla, [ai, bi], self.kij)
+        tdadt=self._dTitadT(mezcla, T, aci, mi)
 
-        self.ai=ai
-        self.bi=bi
+        self.ai=array(ai)
+        self.bi=array(bi)
         self.b=b
         self.tita=a
         self.delta=2*b
@@ -1063,7 +1051,6 @@ class PR_Yu_Lu(Cubic):
         self.w=-1
 
         self.dTitadT=tdadt
-        super(PR_Yu_Lu, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
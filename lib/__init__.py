@@ -28,7 +28,7 @@ import glob
 import os
 
 
-files = sorted(glob.glob(os.path.join("lib", "*.py")))
+files = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.py")))
 __all__ = ["EoS", "mEoS"]
 
 for file in files:
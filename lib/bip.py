@@ -18,6 +18,8 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 
 
+from numpy import array, asarray, dot, exp, outer, sqrt, where, zeros
+
 
 #SRK=[[2, 46, 0.031899999999999998], [2, 48, 0.029999999999999999], [2, 49, 0.097299999999999998], [2, 50, 0.085000000000000006], [2, 98, 0.0252], [3, 46, 0.038800000000000001], [3, 49, 0.1346], [3, 50, 0.082900000000000001], [4, 46, 0.080699999999999994], [4, 48, 0.02], [4, 49, 0.1018], [4, 50, 0.083099999999999993], [5, 46, 0.13569999999999999], [5, 49, 0.1358], [5, 50, 0.052299999999999999], [6, 11, -0.00040000000000000002], [6, 46, 0.1007], [6, 49, 0.1474], [6, 50, 0.060900000000000003], [7, 49, 0.12620000000000001], [8, 49, 0.1278], [8, 50, 0.069699999999999998], [10, 46, 0.1444], [11, 49, 0.11360000000000001], [11, 50, 0.073700000000000002], [12, 48, 0.10000000000000001], [13, 50, 0.054199999999999998], [14, 46, 0.1293], [14, 49, 0.13769999999999999], [14, 50, 0.046399999999999997], [38, 49, 0.1087], [40, 46, 0.21310000000000001], [40, 48, -0.01], [40, 49, 0.081000000000000003], [46, 48, 0.045999999999999999], [46, 49, -0.021999999999999999], [46, 50, 0.14000000000000001], [47, 98, 0.0178], [48, 49, -0.064000000000000001], [48, 50, 0.036700000000000003], [49, 50, 0.10199999999999999], [63, 98, -0.22]]
 
@@ -218,7 +220,26 @@ def Kij(self, T=0, EOS=None):
     Parameter:
         T: opcional temperatura for generalized method
         EOS: name of equation of state, bwrs, nrtl, pr, srk, uniq, wils
-    API procedure 8D1.1 pag 819, equations pag 827"""
+    API procedure 8D1.1 pag 819, equations pag 827, the generalized
+    correlations use the solubility parameter in (cal/cm³)^0.5
+    Return the kij matrix as a numpy array
+
+    >>> from lib.mezcla import Mezcla
+    >>> mix = Mezcla(2, ids=[2, 6], caudalUnitarioMolar=[0.5, 0.5])
+    >>> "%0.4f" % Kij(mix, 250, srk)[0, 1]
+    '0.0194'
+
+    With the cubic equations the mixture parameters stay physical
+
+    >>> from lib.EoS.cubic import SRK
+    >>> eos = SRK(250, 20, mix)
+    >>> "%0.3f %0.4f %0.4f" % (eos.x, eos.Ki[0], eos.Ki[1])
+    '0.427 6.5482 0.0322'
+    """
+    def delta(id):
+        """Solubility parameter of component in the units of correlations"""
+        return self.componente[self.ids.index(id)].SolubilityParameter.calcc
+
     # TODO: import data here from file and remove lib/bip
     if EOS:
         kij = []
@@ -234,20 +255,22 @@ def Kij(self, T=0, EOS=None):
                             break
                     else:
                         if i == 1 or j == 1:
-                            kijk.append(1/(344.23*exp(-0.48586*T/databank.base_datos[1][3])+1))
+                            Tc = self.componente[self.ids.index(1)].Tc
+                            kijk.append(1/(344.23*exp(-0.48586*T/Tc)+1))
                         elif i == 2 or j == 2:
-                            kijk.append(0.014*(abs(self.componente[self.ids.index(i)].SolubilityParameter-self.componente[self.ids.index(j)].SolubilityParameter)))
+                            kijk.append(0.014*abs(delta(i)-delta(j)))
                         elif i == 46 or j == 46:
-                            kijk.append(0.0403*(abs(self.componente[self.ids.index(i)].SolubilityParameter-self.componente[self.ids.index(j)].SolubilityParameter)))
+                            kijk.append(0.0403*abs(delta(i)-delta(j)))
                         elif i == 48 or j == 48:
                             kijk.append(0)
                         elif i == 49 or j == 49:
                             kijk.append(0.1)
                         elif i == 50 or j == 50:
-                            kijk.append(0.0316*(abs(self.componente[self.ids.index(i)].SolubilityParameter-self.componente[self.ids.index(j)].SolubilityParameter)))
+                            kijk.append(0.0316*abs(delta(i)-delta(j)))
                         else:
                             kijk.append(0)
             kij.append(kijk)
+        kij = array(kij, dtype=float)
     else:
         kij = zeros((len(self.ids), len(self.ids)))
     return kij
@@ -258,62 +281,61 @@ def Kij(self, T=0, EOS=None):
 # self.Mixing_Rule = mixing[conf]
 
 
+def Aij(ai, kij):
+    """Combining rule for the attractive parameter of cubic equation of state,
+    aij = (1-kij)·(ai·aj)^0.5, in matrix form
+
+    >>> Aij([1., 4.], [[0, 0.5], [0.5, 0]]).tolist()
+    [[1.0, 1.0], [1.0, 4.0]]
+    """
+    ai = asarray(ai, dtype=float)
+    return (1-asarray(kij, dtype=float))*sqrt(outer(ai, ai))
+
+
+def _mix(x, aij, bi):
+    """Common procedure for mixing rules, mixture a from the aij matrix, and
+    the mixture value of others linear parameters"""
+    a = dot(x, dot(aij, x))
+    b = [dot(x, asarray(b, dtype=float)) for b in bi]
+    return tuple([a]+b)
+
 
 # Mixing Rules
 def Mix_van_der_Waals(self, parameters, kij):
-    """Miwing rules of van der Waals"""
-    ai = parameters[0]
-    bi = parameters[1:]
-    b = [0]*len(bi)
-    a = 0
-    for i in range(len(self.componente)):
-        for j in range(len(bi)):
-            b[j] += self.fraccion[i]*bi[j][i]
-            for j in range(len(self.componente)):
-                a += self.fraccion[i]*self.fraccion[j]*(ai[i]*ai[j])**0.5*(1-kij[i][j])
-        return tuple([a]+b)
+    """Miwing rules of van der Waals
+
+    >>> from collections import namedtuple
+    >>> mix = namedtuple("mix", "fraccion")([0.25, 0.75])
+    >>> "%0.4f %0.4f" % Mix_van_der_Waals(mix, [[1., 4.], [1., 2.]], zeros((2, 2)))
+    '3.0625 1.7500'
+    """
+    x = asarray(self.fraccion, dtype=float)
+    aij = Aij(parameters[0], kij)
+    return _mix(x, aij, parameters[1:])
 
 def Mix_Stryjek_Vera(self, parameters, kij):
     """Mixing rules of Stryjek and Vera (1986)"""
-    ai = parameters[0]
-    bi = parameters[1:]
-    b = [0]*len(bi)
-    a = 0
-    for i in range(len(self.componente)):
-        for j in range(len(bi)):
-            b[j] += self.fraccion[i]*bi[j][i]
-        for j in range(len(self.componente)):
-            if kij[i][j] == 0 and kij[j][i] == 0:
-                k = 0.
-            else:
-                k = kij[i][j]*kij[j][i]/(self.fraccion[i]*kij[i][j]+self.fraccion[j]*kij[j][i])
-            a += self.fraccion[i]*self.fraccion[j]*(ai[i]*ai[j])**0.5*(1-k)
-    return tuple([a]+b)
+    x = asarray(self.fraccion, dtype=float)
+    kij = asarray(kij, dtype=float)
+    num = kij*kij.T
+    den = x[:, None]*kij+x[None, :]*kij.T
+    k = where(num == 0, 0., num/where(den == 0, 1., den))
+    aij = Aij(parameters[0], k)
+    return _mix(x, aij, parameters[1:])
 
 def Mix_Panagiotopoulos(self, parameters, kij):
     """Mixing Rules of Panagiotopoulos (1985)"""
-    ai = parameters[0]
-    bi = parameters[1:]
-    b = [0]*len(bi)
-    a = 0
-    for i in range(len(self.componente)):
-        for j in range(len(bi)):
-            b[j] += self.fraccion[i]*bi[j][i]
-        for j in range(len(self.componente)):
-            a += self.fraccion[i]*self.fraccion[j]*(ai[i]*ai[j])**0.5*(1-kij[i][j]+(kij[i][j]-kij[j][i])*self.fraccion[i])
-    return tuple([a]+b)
+    x = asarray(self.fraccion, dtype=float)
+    kij = asarray(kij, dtype=float)
+    k = kij-(kij-kij.T)*x[:, None]
+    aij = Aij(parameters[0], k)
+    return _mix(x, aij, parameters[1:])
 
 def Mix_Melhem(self, parameters, kij):
     """Mixing Rules of Melhem (1991)"""
-    ai = parameters[0]
-    bi = parameters[1:]
-    b = [0]*len(bi)
-    a = 0
-    for i in range(len(self.componente)):
-        for j in range(len(bi)):
-            b[j] += self.fraccion[i]*bi[j][i]
-        for j in range(len(self.componente)):
-            a += self.fraccion[i]*self.fraccion[j]*(ai[i]*ai[j])**0.5*(1-kij[i][j]+(kij[i][j]-kij[j][i])*self.fraccion[i]/(self.fraccion[i]+self.fraccion[j]))
-    return tuple([a]+b)
-
-
+    x = asarray(self.fraccion, dtype=float)
+    kij = asarray(kij, dtype=float)
+    den = x[:, None]+x[None, :]
+    k = kij-(kij-kij.T)*x[:, None]/where(den == 0, 1., den)
+    aij = Aij(parameters[0], k)
+    return _mix(x, aij, parameters[1:])
@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+'''Pychemqt, Chemical Engineering Process simulator
+Copyright (C) 2009-2017, Juan José Gómez Romera <jjgomera@gmail.com>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
+
+
+###############################################################################
+# Module for parametric case study of project
+#   - CaseStudy: Class to calculate a project for a grid of input values
+###############################################################################
+
+
+from concurrent.futures import ProcessPoolExecutor
+import logging
+
+from lib.config import getMainWindowConfig, setMainWindowConfig
+from lib.project import Project
+
+
+def _serpentine(values):
+    """Generator of all the combinations of values in serpentine order, so
+    consecutive cases differ only in a step of a variable
+
+    >>> list(_serpentine([[1, 2], ["a", "b", "c"]]))
+    [(1, 'a'), (1, 'b'), (1, 'c'), (2, 'c'), (2, 'b'), (2, 'a')]
+    """
+    if not values:
+        yield ()
+        return
+    cases = list(_serpentine(values[1:]))
+    for i, value in enumerate(values[0]):
+        if i % 2:
+            order = reversed(cases)
+        else:
+            order = cases
+        for case in order:
+            yield (value, ) + case
+
+
+def _getValue(project, name):
+    """Return the value of variable with name <item>.<attribute>, s2.T or
+    e1.power, None if it's not available"""
+    item, attr = name.split(".", 1)
+    if item[0] == "s":
+        obj = project.getStream(int(item[1:]))
+    else:
+        obj = project.items[item]
+    if not obj or not obj.status:
+        return None
+    value = getattr(obj, attr, None)
+    if isinstance(value, float):
+        value = float(value)
+    return value
+
+
+def _setCase(project, case, previous):
+    """Change the project inputs to a case, only the variables changed from
+    the previous case are updated, so the project recalculate only the
+    affected part of flowsheet starting from the previous solution"""
+    streams = {}
+    equipments = {}
+    for name, value in case.items():
+        if previous.get(name) == value:
+            continue
+        item, kwarg = name.split(".", 1)
+        if item[0] == "s":
+            streams.setdefault(int(item[1:]), {})[kwarg] = value
+        else:
+            equipments.setdefault(item, {})[kwarg] = value
+
+    for id, kwargs in streams.items():
+        project.setStream(id, project.getStream(id).clone(**kwargs))
+    for id, kwargs in equipments.items():
+        project.items[id](**kwargs)
+        project.run(id)
+
+
+def _solveCases(data, cases, outputs):
+    """Calculate a list of cases over a project
+
+    data: Project definition in json format
+    cases: List of cases as dict {variable: value}, consecutive cases
+        are calculated from the solution of previous case
+    outputs: List of result variables
+
+    Return a list with the results of each case, the current config is
+    restored at end, so it can be called in the host process too"""
+    project = Project()
+    project.readFromJSON(data)
+
+    # The streams created by equipments use the current config
+    oldConfig = getMainWindowConfig()
+    setMainWindowConfig(project.config)
+    try:
+        project.solve()
+
+        results = []
+        previous = {}
+        for case in cases:
+            try:
+                _setCase(project, case, previous)
+            except Exception as er:
+                logging.warning("Case %s failed: %s" % (case, er))
+                results.append([None]*len(outputs))
+                # Force the complete definition of next case
+                previous = {}
+                continue
+            results.append([_getValue(project, name) for name in outputs])
+            previous = case
+    finally:
+        setMainWindowConfig(oldConfig)
+    return results
+
+
+class CaseStudy(object):
+    """Parametric case study of a project, calculate the project for all
+    the combinations of values of several input variables
+
+    project: Project instance to study, it isn't modified
+    variables: List of variables to change, as tuples (name, values), with
+        name in format <item>.<kwarg>, s1.T to change the temperature of
+        stream 1 or e1.razon to change the compression ratio of equipment 1
+    outputs: List of result variables, <item>.<attribute>, s2.T or
+        e1.power, default temperature, pressure and mass flow of all streams
+    workers: Number of process to calculate the cases
+
+    The cases are calculated in serpentine order over the grid of values, so
+    each case start from the solution of its neighbour and only the changed
+    part of flowsheet is recalculated, recycle loops included. With several
+    workers the ordered cases are split in consecutive blocks.
+
+    The results are saved in columnar format in results attribute, a dict
+    with a list of values for each input and output variable, with the cases
+    in the order of the input variables combinations
+    """
+
+    def __init__(self, project, variables, outputs=None, workers=1):
+        self.project = project
+        self.variables = variables
+        if outputs is None:
+            outputs = []
+            for id in sorted(project.streams):
+                for attr in ("T", "P", "caudalmasico"):
+                    outputs.append("s%i.%s" % (id, attr))
+        self.outputs = outputs
+        self.workers = workers
+        self.results = {}
+
+    def cases(self):
+        """Return the list of cases in calculation order, each a tuple with
+        the index of case and the dict with the values of variables"""
+        names = [name for name, values in self.variables]
+        values = [list(values) for name, values in self.variables]
+
+        cases = []
+        for case in _serpentine([range(len(v)) for v in values]):
+            # Index of case in the variables combinations order
+            position = 0
+            for j, i in enumerate(case):
+                position = position*len(values[j]) + i
+            cases.append((position, {
+                name: values[j][i] for j, (name, i) in enumerate(
+                    zip(names, case))}))
+        return cases
+
+    def run(self):
+        """Calculate all the cases and fill the results"""
+        cases = self.cases()
+        data = {}
+        self.project.writeToJSON(data)
+
+        if self.workers > 1 and len(cases) > 1:
+            size = -(-len(cases)//self.workers)
+            blocks = [cases[i:i+size] for i in range(0, len(cases), size)]
+            with ProcessPoolExecutor(self.workers) as executor:
+                futures = [executor.submit(
+                    _solveCases, data, [case for i, case in block],
+                    self.outputs) for block in blocks]
+                values = []
+                for future in futures:
+                    values += future.result()
+        else:
+            values = _solveCases(data, [case for i, case in cases],
+                                 self.outputs)
+
+        # Save results in the variables combinations order
+        rows = [None]*len(cases)
+        for (i, case), value in zip(cases, values):
+            rows[i] = (case, value)
+
+        self.results = {}
+        for name, values in self.variables:
+            self.results[name] = [case[name] for case, value in rows]
+        for j, name in enumerate(self.outputs):
+            self.results[name] = [value[j] for case, value in rows]
+        return self.results
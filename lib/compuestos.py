@@ -120,9 +120,11 @@ Others method:
     * :func:`Vc_Riedel`
     * :func:`Henry`
     * :func:`atomic_decomposition`
+    * :func:`getComponente`
 '''
 
 
+from collections import OrderedDict
 import math
 import os
 import re
@@ -5670,7 +5672,7 @@ class Componente(object):
         Explained in procedure 7A1.1, pag 543
 
         .. math::
-            Ho = BT + C/2T^2 + D/3T^3 + E/4T^4 + F/5T^5
+            Ho = AT + B/2T^2 + C/3T^3 + D/4T^4 + E/5T^5 + F/6T^6
 
         Parameters
         ----------
@@ -5688,8 +5690,8 @@ class Componente(object):
         """
         To = 298.15
         A, B, C, D, E, F = self.cp
-        H = B*T + C/2*T**2 + D/3*T**3 + E/4*T**4 + F/5*T**5
-        Ho = B*To + C/2*To**2 + D/3*To**3 + E/4*To**4 + F/5*To**5
+        H = A*T + B/2*T**2 + C/3*T**3 + D/4*T**4 + E/5*T**5 + F/6*T**6
+        Ho = A*To + B/2*To**2 + C/3*To**3 + D/4*To**4 + E/5*To**5 + F/6*To**6
         return unidades.Enthalpy((H-Ho)/self.M, "calg")
 
     def _so(self, T):
@@ -6224,3 +6226,59 @@ class Componente(object):
             return 1
         else:
             return 0
+
+
+# Componente instances shared by all mixtures, as
+# {(id, methods, transport options): (databank row, Componente)}, the least
+# recently used instances are discarded over _nComponentes
+_componentes = OrderedDict()
+_nComponentes = 256
+
+
+def getComponente(id, **kwargs):
+    """Return the Componente instance for compound with index id in databank.
+
+    The instances are immutable after creation, so a single instance is
+    created for each compound and calculation methods configuration and
+    shared by all the Mezcla, Corriente and EoS instances. The kwargs can
+    include other parameters, only the Componente.kwargs keys are used.
+
+    The instances are indexed by the values of the Transport options of
+    project config, so the configs with the same options share them. The
+    cached instance is discarded if the compound is modified in databank
+
+    Examples
+    --------
+    >>> getComponente(2) is getComponente(2)
+    True
+    >>> getComponente(2) is getComponente(2, MuG=1)
+    False
+
+    >>> from configparser import ConfigParser
+    >>> old = config.getMainWindowConfig()
+    >>> cmp = getComponente(2)
+    >>> conf = ConfigParser()
+    >>> conf.read_dict(old)
+    >>> config.setMainWindowConfig(conf)
+    >>> getComponente(2) is cmp
+    True
+    >>> MuG = (old.getint("Transport", "MuG")+1) % 2
+    >>> conf.set("Transport", "MuG", str(MuG))
+    >>> config.setMainWindowConfig(conf)
+    >>> getComponente(2) is cmp
+    False
+    >>> config.setMainWindowConfig(old)
+    """
+    methods = tuple(kwargs.get(key) for key in Componente.kwargs)
+    key = (int(id), methods, config.getSettings().transport)
+
+    row = sql.getElement(int(id))
+    cached = _componentes.get(key)
+    if cached is None or cached[0] is not row:
+        cached = (row, Componente(int(id), **kwargs))
+        _componentes[key] = cached
+        if len(_componentes) > _nComponentes:
+            _componentes.popitem(last=False)
+    else:
+        _componentes.move_to_end(key)
+    return cached[1]
@@ -23,6 +23,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 #   - getComponents: Get component list from project
 #   - getMainWindowConfig: Return config of current project
 #   - setMainWindowConfig: Update currentconfig variable
+#   - getSettings: Return the stream calculation settings of a config
 #   - Entity: General class for model object
 #
 #   Variables:
@@ -33,6 +34,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 ###############################################################################
 
 
+from collections import namedtuple
 from configparser import ConfigParser
 import os
 
@@ -104,9 +106,55 @@ def getMainWindowConfig():
     return currentConfig
 
 
+# Settings of config used in stream calculation, parsed once from config
+#   MEoS, TTSE, iapws, freesteam, coolprop, refprop, GERG: Boolean with the
+#       availability of thermodynamic methods
+#   K, H: Index of equation of state for vapor-liquid equilibrium and enthalpy
+#   solids: Solids components of project
+#   transport: Options of Transport section, methods of mixture properties
+Settings = namedtuple("Settings", [
+    "MEoS", "TTSE", "iapws", "freesteam", "coolprop", "refprop", "GERG",
+    "K", "H", "solids", "transport"])
+
+_settings = (None, None)
+
+
+def getSettings(config=None):
+    """Return the settings for stream calculation of a config, default the
+    current project config. The settings are parsed once and cached for the
+    config instance, the cache is cleared in setMainWindowConfig"""
+    global _settings
+    if config is None:
+        config = getMainWindowConfig()
+    if _settings[0] is not config:
+        if config.has_option("Thermo", "TTSE"):
+            ttse = config.getboolean("Thermo", "TTSE")
+        else:
+            ttse = False
+        if config.has_section("Transport"):
+            transport = tuple(config.items("Transport"))
+        else:
+            transport = ()
+        settings = Settings(
+            MEoS=config.getboolean("Thermo", "MEoS"),
+            TTSE=ttse,
+            iapws=config.getboolean("Thermo", "iapws"),
+            freesteam=config.getboolean("Thermo", "freesteam"),
+            coolprop=config.getboolean("Thermo", "coolprop"),
+            refprop=config.getboolean("Thermo", "refprop"),
+            GERG=config.getboolean("Thermo", "GERG"),
+            K=config.getint("Thermo", "K"),
+            H=config.getint("Thermo", "H"),
+            solids=config.get("Components", "Solids"),
+            transport=transport)
+        _settings = (config, settings)
+    return _settings[1]
+
+
 def setMainWindowConfig(config=None):
     """Return config of current project"""
-    global currentConfig
+    global currentConfig, _settings
+    _settings = (None, None)
     if config:
         currentConfig = config
         return
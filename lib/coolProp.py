@@ -37,7 +37,7 @@ except ImportError as e:
 
 from lib import unidades
 from lib.thermo import ThermoAdvanced
-from lib.compuestos import Componente
+from lib.compuestos import getComponente
 
 
 noIds = {
@@ -346,7 +346,7 @@ class CoolProp(ThermoAdvanced):
 
             # Calculate critical properties with mezcla method
             # Coolprop for mixtures can fail and it's slow
-            Cmps = [Componente(int(i)) for i in self.kwargs["ids"]]
+            Cmps = [getComponente(int(i)) for i in self.kwargs["ids"]]
 
             # Calculate critic temperature, API procedure 4B1.1 pag 304
             V = sum([xi*cmp.Vc for xi, cmp in
@@ -25,6 +25,8 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 ###############################################################################
 
 
+from collections import namedtuple
+from copy import copy
 import logging
 import os
 
@@ -36,7 +38,37 @@ from lib import EoS, mEoS, gerg, iapws97, freeSteam, refProp, coolProp
 from lib.solids import Solid
 from lib.mezcla import Mezcla, mix_molarflow_molarfraction
 from lib.psycrometry import PsychroState
-from lib.thermo import ThermoWater, ThermoAdvanced, ThermoRefProp
+from lib.thermo import Thermo, ThermoWater, ThermoAdvanced, ThermoRefProp
+from lib.ttse import getTTSE
+
+
+# Optional function called with the stream before each calculation, the
+# graphical interface use it to process its pending events
+progress = None
+
+
+# Thermodynamic method of a stream, resolved from the settings and the stream
+# kwargs, shared by the stream clones
+#   thermo: Name of thermodynamic method, eos, meos, iapws...
+#   ttse: Use the TTSE tables for meos
+#   K: Equation of state class for vapor-liquid equilibrium in eos method
+#   H: Equation of state class for enthalpy in eos method
+#   dependence: External library used by the thermodynamic method
+Backend = namedtuple("Backend", ["thermo", "ttse", "K", "H", "dependence"])
+
+
+def _copyState(compuesto):
+    """Return a copy of a thermodynamic state to use it in other stream, the
+    phases are copied too as the streams set their flows in them. The
+    properties pending in lazy mode are calculated before, the copy can't
+    fill them"""
+    for obj in (compuesto, compuesto.Liquido, compuesto.Gas):
+        if isinstance(obj, Thermo):
+            obj.fillLazy()
+    state = copy(compuesto)
+    state.Liquido = copy(compuesto.Liquido)
+    state.Gas = copy(compuesto.Gas)
+    return state
 
 
 class Corriente(config.Entity):
@@ -45,6 +77,8 @@ class Corriente(config.Entity):
         -T: temperature, Kelvin
         -P: Pressure, Pa
         -x: quality
+        -h: enthalpy flow, W
+        -s: entropy flow, W/K
 
         -caudalMasico: mass flow in kg/s (solid component excluded)
         -caudalMolar: molar flow in kmol/s (solid component excluded)
@@ -81,15 +115,56 @@ class Corriente(config.Entity):
             0 - Ideal parameters
             1 - DIPPR parameters
         -MEoS: Use meos equation if is available
+        -TTSE: Use the tabular taylor series expansion tables for calculate
+            the meos equation states defined by T-P, P-h or P-s, the tables
+            are built in the first use of each fluid and saved
         -iapws: Use iapws97 standard for water
         -GERG: Use GERG-2008 equation if is available
         -freesteam: Use freesteam external library for water
         -coolProp: Use coolProp external library if is available
         -refprop: Use refProp external library if is available
+        -settings: config.Settings instance with the calculation settings,
+            default the settings of current project config
+
+    The thermodynamic state can be defined with the pressure and the
+    enthalpy or entropy flow, or with the temperature and the enthalpy flow
+
+    >>> kw = {"caudalMasico": 1, "ids": [62], "fraccionMolar": [1],
+    ...       "MEoS": True, "iapws": False}
+    >>> st = Corriente(T=500, P=1e6, **kw)
+    >>> Ph = Corriente(P=1e6, h=st.h, **kw)
+    >>> Ps = Corriente(P=1e6, s=st.s, **kw)
+    >>> Th = Corriente(T=500, h=st.h, **kw)
+    >>> "%0.4f %0.4f %0.1f" % (Ph.T, Ps.T, Th.P)
+    '500.0000 500.0000 1000000.0'
+    >>> st = Corriente(T=700, P=3e7, **kw)
+    >>> Ph = Corriente(P=3e7, h=st.h, **kw)
+    >>> Ps = Corriente(P=3e7, s=st.s, **kw)
+    >>> Th = Corriente(T=700, h=st.h, **kw)
+    >>> "%0.4f %0.4f %0.1f" % (Ph.T, Ps.T, Th.P)
+    '700.0000 700.0000 30000000.0'
+
+    In the two phases region the quality is kept too
+
+    >>> st = Corriente(T=400, x=0.5, **kw)
+    >>> Ph = Corriente(P=st.P, h=st.h, **kw)
+    >>> Ps = Corriente(P=st.P, s=st.s, **kw)
+    >>> "%0.4f %0.4f %0.4f %0.4f" % (Ph.T, Ph.x, Ps.T, Ps.x)
+    '400.0000 0.5000 400.0000 0.5000'
+
+    With the TTSE tables the states defined by T-P, P-h or P-s are
+    calculated from the tables, inside its error bound
+
+    >>> kw["TTSE"] = True
+    >>> Ph = Corriente(P=st.P, h=st.h, **kw)
+    >>> "%0.3f %0.4f" % (Ph.T, Ph.x)
+    '400.000 0.5000'
     """
     kwargs = {"T": 0.0,
               "P": 0.0,
               "x": None,
+              "h": None,
+              "s": None,
 
               "caudalMasico": 0.0,
               "caudalVolumetrico": 0.0,
@@ -114,17 +189,39 @@ class Corriente(config.Entity):
               "H": "",
               "Cp_ideal": None,
               "MEoS": None,
+              "TTSE": None,
               "iapws": None,
               "GERG": None,
               "freesteam": None,
               "coolProp": None,
-              "refprop": None}
+              "refprop": None,
+              "settings": None}
 
     status = 0
     msg = QApplication.translate("pychemqt", "Unknown variables")
-    kwargs_forbidden = ["entrada", "mezcla", "solido"]
+    kwargs_forbidden = ["entrada", "mezcla", "solido", "settings"]
     solido = None
 
+    # Iteration parameters for the enthalpy defined states, the tolerance is
+    # the error in temperature, K
+    maxIter = 50
+    tolerance = 1e-6
+
+    # Calculation context reused while the definition doesn't change, the
+    # mixture, the thermodynamic backend, the eos instances and a state
+    # carried from the parent stream in clone
+    _kwargsMixture = ("caudalMasico", "caudalVolumetrico", "caudalMolar",
+                      "caudalUnitarioMolar", "caudalUnitarioMasico",
+                      "fraccionMolar", "fraccionMasica", "mezcla", "ids")
+    _kwargsBackend = ("ids", "K", "alfa", "mix", "H", "Cp_ideal", "MEoS",
+                      "TTSE", "iapws", "GERG", "freesteam", "coolProp",
+                      "refprop", "settings")
+    _mixture = None
+    _backend = None
+    _settings = None
+    _eos = None
+    _state = None
+
     def __init__(self, **kwargs):
         self.kwargs = Corriente.kwargs.copy()
         self.__call__(**kwargs)
@@ -135,6 +232,17 @@ class Corriente(config.Entity):
         if kwargs.get("solido", None):
             kwargs.update(kwargs["solido"].kwargs)
 
+        # Forget the calculation context if its definition change
+        for key, value in kwargs.items():
+            if not self.status or value == self.kwargs.get(key):
+                continue
+            if key in self._kwargsMixture:
+                self._mixture = None
+                self._eos = None
+            if key in self._kwargsBackend:
+                self._backend = None
+                self._eos = None
+
         if kwargs.get("caudalUnitarioMasico", []):
             self.kwargs["caudalUnitarioMolar"] = []
             self.kwargs["fraccionMolar"] = []
@@ -227,6 +335,15 @@ class Corriente(config.Entity):
 
         elif kwargs.get("x", None) and self.kwargs["T"] and self.kwargs["P"]:
             self.kwargs["T"] = 0.0
+        elif kwargs.get("h", None) is not None or \
+                kwargs.get("s", None) is not None:
+            if "T" not in kwargs:
+                self.kwargs["T"] = 0.0
+            elif "P" not in kwargs:
+                self.kwargs["P"] = 0.0
+            self.kwargs["x"] = None
+            self.kwargs["h"] = None
+            self.kwargs["s"] = None
         elif kwargs.get("T", 0.0) and self.kwargs["x"] and self.kwargs["P"]:
             self.kwargs["P"] = 0.0
         elif kwargs.get("P", 0.0) and self.kwargs["T"] and self.kwargs["x"]:
@@ -246,16 +363,8 @@ class Corriente(config.Entity):
                 kw_new[key] = value
         logging.debug('kwarg; %s' % kw_new)
         if self.calculable:
-            statusmsg = (
-                QApplication.translate("pychemqt", "Underspecified"),
-                QApplication.translate("pychemqt", "Solved"),
-                QApplication.translate("pychemqt", "Ignored"),
-                QApplication.translate("pychemqt", "Warning"),
-                QApplication.translate("pychemqt", "Calculating..."),
-                QApplication.translate("pychemqt", "Error"))
-            status = statusmsg[self.status]
-            logging.debug('%s %s' % (status, self.msg))
-            QApplication.processEvents()
+            if progress is not None:
+                progress(self)
 
             self.status = 1
             self.calculo()
@@ -285,6 +394,12 @@ class Corriente(config.Entity):
             self.tipoTermodinamica = "Tx"
         elif self.kwargs["P"] and self.kwargs["x"]:
             self.tipoTermodinamica = "Px"
+        elif self.kwargs["P"] and self.kwargs["h"] is not None:
+            self.tipoTermodinamica = "Ph"
+        elif self.kwargs["P"] and self.kwargs["s"] is not None:
+            self.tipoTermodinamica = "Ps"
+        elif self.kwargs["T"] and self.kwargs["h"] is not None:
+            self.tipoTermodinamica = "Th"
 
         # Mix definition
         self.tipoFlujo = 0
@@ -331,11 +446,24 @@ class Corriente(config.Entity):
         return self.tipoTermodinamica and self.tipoFlujo
 
     def calculo(self):
-        Config = config.getMainWindowConfig()
-        if self.kwargs["mezcla"]:
+        settings = self.kwargs["settings"]
+        if settings is None:
+            settings = config.getSettings()
+
+        # Forget the calculation context if the project config change
+        if settings != self._settings:
+            self._mixture = None
+            self._backend = None
+            self._eos = None
+            self._settings = settings
+
+        if self._mixture is not None:
+            self.mezcla = self._mixture
+        elif self.kwargs["mezcla"]:
             self.mezcla = self.kwargs["mezcla"]
         else:
             self.mezcla = Mezcla(self.tipoFlujo, **self.kwargs)
+        self._mixture = self.mezcla
 
         self.ids = self.mezcla.ids
         self.componente = self.mezcla.componente
@@ -350,53 +478,90 @@ class Corriente(config.Entity):
         P = unidades.Pressure(self.kwargs.get("P", None))
         x = self.kwargs.get("x", None)
 
-        self._method()
+        # The backends use the specific enthalpy and entropy, J/kg and J/kgK
+        h = self.kwargs["h"]
+        s = self.kwargs["s"]
+        if h is not None:
+            h = unidades.Enthalpy(h/self.caudalmasico)
+        if s is not None:
+            s = unidades.SpecificHeat(s/self.caudalmasico)
+        kwargs = self.kwargs.copy()
+        kwargs["h"] = h
+        kwargs["s"] = s
+
+        if self._backend is None:
+            self._backend = self._method(settings)
+        self._thermo = self._backend.thermo
+        self._ttse = self._backend.ttse
+        self._dependence = self._backend.dependence
         setData = True
 
-        if self._thermo == "freesteam":
-            compuesto = freeSteam.Freesteam(**self.kwargs)
+        # State carried from the parent stream, only the flows change
+        state = self._state
+        self._state = None
+
+        if state is not None:
+            compuesto = state
+        elif self._thermo == "freesteam":
+            compuesto = freeSteam.Freesteam(**kwargs)
         elif self._thermo == "iapws":
-            compuesto = iapws97.IAPWS97(**self.kwargs)
+            compuesto = iapws97.IAPWS97(**kwargs)
         elif self._thermo == "refprop":
             if not self.kwargs["ids"]:
                 self.kwargs["ids"] = self.ids
+                kwargs["ids"] = self.ids
 
             # Avoid overwrite refprop H parameter
-            kwargs = self.kwargs.copy()
             del kwargs["H"]
+            del kwargs["h"]
+            del kwargs["s"]
+            if h is not None:
+                kwargs["H"] = h
+            if s is not None:
+                kwargs["S"] = s
 
             compuesto = refProp.RefProp(**kwargs)
         elif self._thermo == "gerg":
             ids = []
             for id in self.ids:
                 ids.append(gerg.id_GERG.index(id))
-            kwargs = self.kwargs
             kwargs["mezcla"] = self.mezcla
             compuesto = gerg.GERG(componente=ids, fraccion=self.fraccion, **kwargs)
         elif self._thermo == "coolprop":
             if not self.kwargs["ids"]:
                 self.kwargs["ids"] = self.ids
-            compuesto = coolProp.CoolProp(**self.kwargs)
+                kwargs["ids"] = self.ids
+            compuesto = coolProp.CoolProp(**kwargs)
         elif self._thermo == "meos":
-            if self.tipoTermodinamica == "TP":
-                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](T=T, P=P)
+            fluido = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])]
+            if self.tipoTermodinamica in ("TP", "Ph", "Ps") and self._ttse:
+                state = {"P": P}
+                if self.tipoTermodinamica == "TP":
+                    state["T"] = T
+                elif self.tipoTermodinamica == "Ph":
+                    state["h"] = h
+                else:
+                    state["s"] = s
+                table = getTTSE(fluido)
+                if table is None:
+                    compuesto = fluido(lazy=True, **state)
+                else:
+                    compuesto = table.state(lazy=True, **state)
+            elif self.tipoTermodinamica == "TP":
+                compuesto = fluido(T=T, P=P, lazy=True)
             elif self.tipoTermodinamica == "Tx":
-                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](T=T, x=x)
+                compuesto = fluido(T=T, x=x, lazy=True)
             elif self.tipoTermodinamica == "Px":
-                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](P=P, x=x)
+                compuesto = fluido(P=P, x=x, lazy=True)
+            elif self.tipoTermodinamica == "Ph":
+                compuesto = fluido(P=P, h=h, lazy=True)
+            elif self.tipoTermodinamica == "Ps":
+                compuesto = fluido(P=P, s=s, lazy=True)
+            elif self.tipoTermodinamica == "Th":
+                compuesto = fluido(T=T, h=h, lazy=True)
         elif self._thermo == "eos":
-            if self.kwargs["K"]:
-                index = K_name.index(self.kwargs["K"])
-                K = EoS.K[index]
-                print(K)
-            else:
-                K = EoS.K[Config.getint("Thermo","K")]
-            if self.kwargs["H"]:
-                index = H_name.index(self.kwargs["H"])
-                H = EoS.H[index]
-                print(H)
-            else:
-                H = EoS.H[Config.getint("Thermo","H")]
+            K = self._backend.K
+            H = self._backend.H
 
             setData = False
             self.M = unidades.Dimensionless(self.mezcla.M)
@@ -407,58 +572,60 @@ class Corriente(config.Entity):
             if self.tipoTermodinamica == "TP":
                 self.T = unidades.Temperature(T)
                 self.P = unidades.Pressure(P)
-                eos = K(self.T, self.P.atm, self.mezcla)
-                self.eos = eos
-                self.x = unidades.Dimensionless(eos.x)
+                eos, eosH = self._getEoS(K, H, self.T, self.P.atm)
+            elif self.tipoTermodinamica == "Ph":
+                self.P = unidades.Pressure(P)
+                eos, eosH = self._solveH(K, H, self.kwargs["h"])
             else:
-                self.x = unidades.Dimensionless(x)
+                raise NotImplementedError(
+                    "%s state definition unsupported with eos" %
+                    self.tipoTermodinamica)
+            self.eos = eos
+            self.x = unidades.Dimensionless(eos.x)
 
 #            self.mezcla.recallZeros(eos.xi)
 #            self.mezcla.recallZeros(eos.yi)
 #            self.mezcla.recallZeros(eos.Ki, 1.)
 
             if 0. < self.x < 1.:
-                self.Liquido = Mezcla(tipo=5, fraccionMolar=eos.xi, caudalMolar=self.caudalmolar*(1-self.x))
-                self.Gas = Mezcla(tipo=5, fraccionMolar=eos.yi, caudalMolar=self.caudalmolar*self.x)
+                self.Liquido = Mezcla(
+                    tipo=5, ids=self.ids, fraccionMolar=list(eos.xi),
+                    caudalMolar=self.caudalmolar*(1-self.x))
+                self.Gas = Mezcla(
+                    tipo=5, ids=self.ids, fraccionMolar=list(eos.yi),
+                    caudalMolar=self.caudalmolar*self.x)
             elif self.x <= 0:
                 self.Liquido = self.mezcla
                 self.Gas = Mezcla()
             else:
                 self.Liquido = Mezcla()
                 self.Gas = self.mezcla
-            self.Gas.Z = unidades.Dimensionless(float(eos.Z[0]))
-            self.Liquido.Z = unidades.Dimensionless(float(eos.Z[1]))
+            self.Gas.Z = unidades.Dimensionless(float(eos.Z[0].real))
+            self.Liquido.Z = unidades.Dimensionless(float(eos.Z[1].real))
 
-            if H == K:
-                eosH = eos
-            else:
-                eosH = H(self.T, self.P.atm, self.mezcla)
             self.H_exc = eosH.H_exc
 
             self.Liquido.Q = unidades.VolFlow(0)
             self.Gas.Q = unidades.VolFlow(0)
-            self.Liquido.h = unidades.Power(0)
-            self.Gas.h = unidades.Power(0)
+            hl, hg = self._hEoS(eos, eosH)
+            self.Liquido.h = unidades.Power(hl)
+            self.Gas.h = unidades.Power(hg)
             if self.x < 1:
                 # There is liquid phase
-                Hl = (self.Liquido._Ho(self.T).Jg-self.Liquido.Hv_DIPPR(self.T).Jg)*self.Liquido.caudalmasico.gh
-                self.Liquido.h = unidades.Power(Hl-R*self.T/self.M*self.H_exc[1]*(1-self.x)*self.Liquido.caudalmasico.gh, "Jh")
-                self.Liquido.cp = self.Liquido.Cp_Liquido(T)
-                self.Liquido.rho = self.Liquido.RhoL(T, self.P)
-                self.Liquido.mu = self.Liquido.Mu_Liquido(T, self.P.atm)
-                self.Liquido.k = self.Liquido.ThCond_Liquido(T, self.P.atm, self.Liquido.rho)
-                self.Liquido.sigma = self.Liquido.Tension(T)
+                self.Liquido.cp = self.Liquido.Cp_Liquido(self.T)
+                self.Liquido.rho = self.Liquido.RhoL(self.T, self.P)
+                self.Liquido.mu = self.Liquido.Mu_Liquido(self.T, self.P.atm)
+                self.Liquido.k = self.Liquido.ThCond_Liquido(self.T, self.P.atm, self.Liquido.rho)
+                self.Liquido.sigma = self.Liquido.Tension(self.T)
                 self.Liquido.Q = unidades.VolFlow(self.Liquido.caudalmasico/self.Liquido.rho)
                 self.Liquido.Prandt = self.Liquido.cp*self.Liquido.mu/self.Liquido.k
             if self.x > 0:
                 # There is gas phase
-                Hg = self.Gas._Ho(self.T).Jg*self.Gas.caudalmasico.gh
-                self.Gas.h = unidades.Power(Hg-R*self.T/self.M*self.H_exc[0]*self.x*self.Gas.caudalmasico.gh, "Jh")
-                self.Gas.cp = self.Gas.Cp_Gas(T, self.P.atm)
+                self.Gas.cp = self.Gas.Cp_Gas(self.T, self.P.atm)
                 self.Gas.rho = unidades.Density(self.P.atm/self.Gas.Z/R_atml/self.T*self.M, "gl")
                 self.Gas.rhoSd = unidades.Density(1./self.Gas.Z/R_atml/298.15*self.M, "gl")
-                self.Gas.mu = self.Gas.Mu_Gas(T, self.P.atm, self.Gas.rho)
-                self.Gas.k = self.Gas.ThCond_Gas(T, self.P.atm, self.Gas.rho)
+                self.Gas.mu = self.Gas.Mu_Gas(self.T, self.P.atm, self.Gas.rho)
+                self.Gas.k = self.Gas.ThCond_Gas(self.T, self.P.atm, self.Gas.rho)
                 self.Gas.Q = unidades.VolFlow(self.Gas.caudalmasico/self.Gas.rho)
                 self.Gas.Prandt = self.Gas.cp*self.Gas.mu/self.Gas.k
 
@@ -539,13 +706,13 @@ class Corriente(config.Entity):
                 self.Liquido.sigma = compuesto.sigma
                 self.Liquido.ids = self.ids
 
-        if Config.get("Components", "Solids"):
+        if settings.solids:
             if self.kwargs["solido"]:
                 self.solido = self.kwargs["solido"]
             else:
                 self.solido = Solid(**self.kwargs)
             if self.solido.status:
-                self.solido.RhoS(T)
+                self.solido.RhoS(self.T)
         else:
             self.solido = None
 
@@ -553,34 +720,185 @@ class Corriente(config.Entity):
             self.kwargs["caudalMolar"] *= self.kwargs["caudalVolumetrico"]/self.Q
             Q = self.kwargs["caudalVolumetrico"]
             self.kwargs["caudalVolumetrico"] = None
+            self._mixture = None
+            self._eos = None
             self.calculo()
             self.kwargs["caudalVolumetrico"] = Q
             self.kwargs["caudalMolar"] = None
 
-    def _method(self):
-        """Find the thermodynamic method to use"""
-        Config = config.getMainWindowConfig()
+    def _getEoS(self, K, H, T, P):
+        """Return the equation of state instances for vapor-liquid equilibrium
+        and enthalpy at T and P in atm, the instances of a previous
+        calculation are updated to the new state"""
+        if self._eos is None:
+            eos = K(T, P, self.mezcla)
+            if H == K:
+                eosH = eos
+            else:
+                eosH = H(T, P, self.mezcla)
+        else:
+            eos, eosH = self._eos
+            if eos.T != T or abs(eos.P.atm-P) > 1e-12*P:
+                eos.update(T, P)
+                if eosH is not eos:
+                    eosH.update(T, P)
+        self._eos = eos, eosH
+        return eos, eosH
+
+    def _hEoS(self, eos, eosH):
+        """Calculate the enthalpy of phases with the eos thermodynamic method,
+        the ideal gas enthalpy of components less the vaporization enthalpy
+        of liquid phase and the residual enthalpy from the eos choosen for
+        enthalpy
+
+        Parameters
+        ----------
+        eos : EoS
+            Equation of state instance used for vapor-liquid equilibrium
+        eosH : EoS
+            Equation of state instance used for enthalpy
+
+        Returns
+        -------
+        hl : float
+            Liquid phase enthalpy, [W]
+        hg : float
+            Gas phase enthalpy, [W]
+        """
+        T = self.T
+        x = eos.x
+        hl = hg = 0
+        for phase, (xi, fraction) in enumerate(
+                ((eos.yi, x), (eos.xi, 1-x))):
+            if fraction <= 0:
+                continue
+
+            # Molar flow of phase, mol/s
+            flow = self.caudalmolar*fraction*1000
+            h = -R*T*eosH.H_exc[phase].real*flow
+            for cmp, xj in zip(self.componente, xi):
+                mass = flow*xj*cmp.M/1000
+                h += mass*cmp._Ho(T)
+                if phase and T < cmp.Tc:
+                    h -= mass*cmp.Hv_DIPPR(T)
+
+            if phase:
+                hl = h
+            else:
+                hg = h
+        return hl, hg
+
+    def _solveH(self, K, H, h):
+        """Calculate the temperature of stream defined by pressure and
+        enthalpy with the eos thermodynamic method. The mixture and the
+        equations instances are created once and updated to the new
+        temperature in each iteration of the Newton method, using the
+        analytic temperature derivative of the ideal gas enthalpy, replaced
+        by the secant slope in the two phases region where the vaporization
+        dominates the heat capacity. The iteration is bracketed so a step
+        out of known bounds is changed to a bisection
+
+        Parameters
+        ----------
+        K : EoS
+            Equation of state class for vapor-liquid equilibrium
+        H : EoS
+            Equation of state class for enthalpy
+        h : float
+            Enthalpy of stream, [W]
+
+        Returns
+        -------
+        eos : EoS
+            Equation of state instance for vapor-liquid equilibrium
+        eosH : EoS
+            Equation of state instance for enthalpy
+
+        Examples
+        --------
+        >>> kw = {"caudalMasico": 1, "ids": [4, 6, 8], "K": "SRK",
+        ...       "H": "SRK", "fraccionMolar": [.4, .4, .2], "GERG": False}
+        >>> for T, P in ((300, 5e5), (300, 3e5), (400, 5e5)):
+        ...     st = Corriente(T=T, P=P, **kw)
+        ...     Ph = Corriente(P=P, h=st.h, **kw)
+        ...     print("%0.4f %0.4f %0.4f" % (st.x, Ph.T, Ph.x))
+        0.0000 300.0000 0.0000
+        0.6627 300.0000 0.6627
+        1.0000 400.0000 1.0000
+        """
+        cmps = self.componente
+        mi = self.caudalunitariomasico
+
+        def dHdT(T):
+            """Ideal gas heat capacity of stream, W/K"""
+            return sum([m*cmp._Cpo(T) for m, cmp in zip(mi, cmps)])
+
+        # Initial value with the ideal gas enthalpy, referenced to 298.15K
+        T = 298.15 + h/dHdT(298.15)
+        T = max(T, 0.2*min([cmp.Tc for cmp in cmps]))
+
+        P = self.P.atm
+        eos, eosH = self._getEoS(K, H, T, P)
+
+        Tmin, Tmax = 0, None
+        To = fo = None
+        for i in range(self.maxIter):
+            self.T = unidades.Temperature(T)
+            f = sum(self._hEoS(eos, eosH)) - h
+            cp = dHdT(T)
+            if abs(f) <= self.tolerance*cp:
+                break
+
+            if f > 0:
+                Tmax = T
+            else:
+                Tmin = T
+
+            if 0 < eos.x < 1 and To is not None and f != fo:
+                cp = (f-fo)/(T-To)
+            To, fo = T, f
+            T = T - f/cp
+            if T <= Tmin or Tmax is not None and T >= Tmax:
+                if Tmax is None:
+                    T = 2*To
+                else:
+                    T = (Tmin+Tmax)/2
+
+            eos.update(T, P)
+            if eosH is not eos:
+                eosH.update(T, P)
+
+        return eos, eosH
+
+    def _method(self, settings):
+        """Find the thermodynamic method to use, return it as a Backend"""
 
         # MEoS availability,
         if self.kwargs["MEoS"] is not None:
             _meos = self.kwargs["MEoS"]
         else:
-            _meos = Config.getboolean("Thermo", "MEoS")
+            _meos = settings.MEoS
         mEoS_available = self.ids[0] in mEoS.id_mEoS
         MEoS = _meos and len(self.ids) == 1 and mEoS_available
 
+        # TTSE tables for MEoS
+        if self.kwargs["TTSE"] is not None:
+            ttse = self.kwargs["TTSE"]
+        else:
+            ttse = settings.TTSE
+
         # iapws availability
         if self.kwargs["iapws"] is not None:
             _iapws = self.kwargs["iapws"]
         else:
-            _iapws = Config.getboolean("Thermo", "iapws")
+            _iapws = settings.iapws
         IAPWS = _iapws and len(self.ids) == 1 and self.ids[0] == 62
 
         # freesteam availability
         if self.kwargs["freesteam"] is not None:
             _freesteam = self.kwargs["freesteam"]
         else:
-            _freesteam = Config.getboolean("Thermo", "freesteam")
+            _freesteam = settings.freesteam
         FREESTEAM = _freesteam and len(self.ids) == 1 and \
             self.ids[0] == 62 and os.environ["freesteam"]
 
@@ -599,41 +917,56 @@ class Corriente(config.Entity):
         if self.kwargs["coolProp"] is not None:
             _coolprop = self.kwargs["coolProp"]
         else:
-            _coolprop = Config.getboolean("Thermo", "coolprop")
+            _coolprop = settings.coolprop
         COOLPROP = _coolprop and os.environ["CoolProp"] and COOLPROP_available
 
         # refprop availability
         if self.kwargs["refprop"] is not None:
             _refprop = self.kwargs["refprop"]
         else:
-            _refprop = Config.getboolean("Thermo", "refprop")
+            _refprop = settings.refprop
         REFPROP = _refprop and os.environ["refprop"] and REFPROP_available
 
         # GERG availability
         if self.kwargs["GERG"] is not None:
             _gerg = self.kwargs["GERG"]
         else:
-            _gerg = Config.getboolean("Thermo", "GERG")
+            _gerg = settings.GERG
         GERG = _gerg and GERG_available
 
         # Final selection
+        dependence = ""
         if IAPWS and FREESTEAM:
-            self._thermo = "freesteam"
-            self._dependence = "freesteam"
+            thermo = "freesteam"
+            dependence = "freesteam"
         elif IAPWS:
-            self._thermo = "iapws"
+            thermo = "iapws"
         elif _meos and REFPROP:
-            self._thermo = "refprop"
-            self._dependence = "refprop"
+            thermo = "refprop"
+            dependence = "refprop"
         elif _meos and COOLPROP:
-            self._thermo = "coolprop"
-            self._dependence = "CoolProp"
+            thermo = "coolprop"
+            dependence = "CoolProp"
         elif MEoS and GERG:
-            self._thermo = "gerg"
+            thermo = "gerg"
         elif MEoS:
-            self._thermo = "meos"
+            thermo = "meos"
         else:
-            self._thermo = "eos"
+            thermo = "eos"
+
+        # Equations of state for eos method
+        K = H = None
+        if thermo == "eos":
+            if self.kwargs["K"]:
+                K = EoS.K[EoS.K_name.index(self.kwargs["K"])]
+            else:
+                K = EoS.K[settings.K]
+            if self.kwargs["H"]:
+                H = EoS.H[EoS.H_name.index(self.kwargs["H"])]
+            else:
+                H = EoS.H[settings.H]
+
+        return Backend(thermo, ttse, K, H, dependence)
 
     def setSolid(self, solid):
         self.solido = solid
@@ -647,7 +980,14 @@ class Corriente(config.Entity):
         return psystream
 
     def clone(self, **kwargs):
-        """Create a new stream instance with change only kwags new values"""
+        """Create a new stream instance with change only kwags new values
+
+        The calculation context is carried over to the new stream while its
+        definition isn't changed, the mixture scaled with the split factor,
+        the thermodynamic backend and the eos instances, so only the new state
+        is calculated. When only the flow is splitted the state is reused"""
+        changed = set(kwargs)
+        split = 1
         old_kwargs = self.kwargs.copy()
         if "split" in kwargs:
             split = kwargs["split"]
@@ -666,11 +1006,47 @@ class Corriente(config.Entity):
                 kwargs["caudalMolar"] = split*self.kwargs["caudalMolar"]
         if "x" in kwargs:
             del old_kwargs["T"]
+            old_kwargs["h"] = None
+            old_kwargs["s"] = None
+        if kwargs.get("h", None) is not None or \
+                kwargs.get("s", None) is not None:
+            if "T" in kwargs:
+                del old_kwargs["P"]
+            else:
+                del old_kwargs["T"]
+            old_kwargs["x"] = None
+            old_kwargs["h"] = None
+            old_kwargs["s"] = None
         if "mezcla" in kwargs:
             old_kwargs.update(kwargs["mezcla"].kwargs)
             del kwargs["mezcla"]
         old_kwargs.update(kwargs)
-        return Corriente(**old_kwargs)
+
+        stream = Corriente.__new__(Corriente)
+        stream.kwargs = Corriente.kwargs.copy()
+        if self.status == 1 and self._mixture is not None and \
+                not self.kwargs["caudalVolumetrico"] and \
+                not changed.intersection(self._kwargsMixture):
+            stream._mixture = self._mixture.scale(split)
+            stream._settings = self._settings
+
+            if not changed.intersection(self._kwargsBackend):
+                stream._backend = self._backend
+                if self._eos is not None:
+                    eos, eosH = self._eos
+                    eos = copy(eos)
+                    if eosH is not self._eos[0]:
+                        eosH = copy(eosH)
+                    else:
+                        eosH = eos
+                    stream._eos = eos, eosH
+
+                state = changed.intersection(("T", "P", "x", "h", "s"))
+                if not state and self._thermo != "eos":
+                    stream._state = _copyState(self.cmp)
+
+        stream(**old_kwargs)
+        return stream
 
     def __repr__(self):
         if self.status:
@@ -879,7 +1255,7 @@ class Corriente(config.Entity):
                         values.append(self.__getattribute__(key)[i].str)
                         complejos += "%-40s\t%s" % tuple(values)
                         complejos += os.linesep
-                elif key in self.Gas.__dict__ or key in self.Liquido.__dict__:
+                elif hasattr(self.Gas, key) or hasattr(self.Liquido, key):
                     values = [propiedad]
                     for phase in phases:
                         values.append(phase.__getattribute__(key).str)
@@ -23,8 +23,13 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 # Library to add EoS common functionality
 ###############################################################################
 
+from copy import copy
+
 from scipy import exp, log, log10, tan, sinh, tanh, arctan, sqrt
 from scipy import roots, r_
+from numpy import (argmax, array, asarray, dot, errstate, isfinite, where,
+                   zeros)
+from numpy.linalg import solve, LinAlgError
 from scipy.constants import pi, Avogadro, R
 from scipy.optimize import fsolve
 
@@ -101,7 +106,58 @@ def volume_Correction_Peneloux(compuesto):
     return 0.40768*(0.29441-compuesto.rackett)*R_atml*compuesto.Tc/compuesto.Pc.atm
 
 
+def _rachfordRice(z, K, tol=1e-12, maxIter=50):
+    """Solve the Rachford-Rice equation for the vapor fraction, using Newton
+    method bounded to the Leibovici-Neoschil window with a bisection
+    fallback. Return 0 or 1 if the feed is out of the two phase region
+
+    >>> "%0.6f" % _rachfordRice(array([0.5, 0.5]), array([2., 0.5]))
+    '0.500000'
+    >>> _rachfordRice(array([0.5, 0.5]), array([0.5, 0.8]))
+    0.0
+    """
+    Km=K-1
+    if dot(z, Km) <= 0:
+        return 0.
+    if dot(z, Km/K) >= 0:
+        return 1.
+
+    # Leibovici-Neoschil window
+    up=K > 1
+    down=K < 1
+    lo=max(0., max((K[up]*z[up]-1)/Km[up]))
+    hi=min(1., min((1-z[down])/-Km[down]))
+
+    x=(lo+hi)/2
+    for i in range(maxIter):
+        d=1+x*Km
+        f=dot(z, Km/d)
+        if f > 0:
+            lo=x
+        else:
+            hi=x
+        df=-dot(z, Km**2/d**2)
+        x_new=x-f/df
+        if not lo < x_new < hi:
+            x_new=(lo+hi)/2
+        if abs(x_new-x) < tol:
+            return x_new
+        x=x_new
+    return x
+
+
 class EoS(object):
+    """Base class for equation of state
+
+    maxIter: Maximum number of iterations in flash calculation
+    ssIter: Maximum number of successive substitution iteration in flash
+        calculation before change to Newton method
+    tolerance: Tolerance in the equality of fugacity in flash calculation
+    """
+    maxIter = 100
+    ssIter = 20
+    tolerance = 1e-10
+
     def __init__(self, T, P, mezcla, **kwargs):
         self.T = unidades.Temperature(T)
         self.P = unidades.Pressure(P, "atm")
@@ -111,94 +167,493 @@ class EoS(object):
         self.kwargs = kwargs
 
     def _Flash(self):
-        """Cálculo de los coeficientes de reparto entre fases, Ref Naji - Conventional and rapid flash claculations"""
-        #Estimación inicial de K mediante correlación wilson Eq 19
-        Ki=[]
-        for i in self.componente:
-            Ki.append(i.Pc/self.P*exp(5.37*(1.+i.f_acent)*(1.-i.Tc/self.T)))
-
-        Rachford=lambda x: sum([zi*(ki-1.)/(1.-x+x*ki) for zi, ki in zip(self.fraccion, Ki)])
-
-        if Rachford(0)>0 and Rachford(1)>0: #x>1, por tanto solo fase vapor
-            xi=self.fraccion
-            yi=self.fraccion
-            x=1.
-        elif Rachford(0)<0 and Rachford(1)<0: #x<0, por tanto solo fase líquida
-            xi=self.fraccion
-            yi=self.fraccion
-            x=0.
+        """Cálculo de los coeficientes de reparto entre fases
+        Procedure:
+            * Initial K estimation with Wilson correlation
+            * Michelsen stability test to check the feed is two phases and
+              improve the initial K values
+            * Successive substitution with the dominant eigenvalue method
+              (GDEM) acceleration, switching to Newton method in ln K when
+              the convergence is slow
+        Ref Naji - Conventional and rapid flash claculations
+        Michelsen, M.L. The Isothermal Flash Problem. Part I. Stability.
+        Fluid Phase Equilibria 9 (1982) 1-19
+
+        The converged phases have equal fugacities, each phase evaluated at
+        its own composition and root of equation
+        >>> from lib.mezcla import Mezcla
+        >>> from lib.EoS.cubic import PR
+        >>> mix = Mezcla(2, ids=[2, 3, 4], caudalUnitarioMolar=[0.6, 0.3, 0.1])
+        >>> eq = PR(230, 20, mix)
+        >>> "%0.3f" % eq.x
+        '0.736'
+        >>> lnfv = log(eq.yi)+eq._lnphiPhase(230, 20, eq.yi, 0)
+        >>> lnfl = log(eq.xi)+eq._lnphiPhase(230, 20, eq.xi, 1)
+        >>> max(abs(lnfv-lnfl)) < 1e-8
+        True
+        """
+        z=array(self.fraccion, dtype=float)
+
+        # Estimación inicial de K mediante correlación wilson Eq 19
+        K=self._wilson(self.T, self.P.atm)
+
+        K=self._stability(z, K)
+        if K is None:
+            return self._singlePhase(z)
+
+        lnK=log(K)
+        g, x, xi, yi=self._flashResidual(z, lnK)
+        error=max(abs(g))
+        newton=False
+        step_old=None
+        for iteration in range(1, self.maxIter+1):
+            if error < self.tolerance:
+                break
+
+            if newton:
+                step=self._flashNewtonStep(z, lnK, g)
+            else:
+                step=-g
+                # GDEM acceleration every 5 iteration
+                if step_old is not None and iteration % 5 == 0:
+                    lamda=dot(step, step)/dot(step_old, step)
+                    if 0 < lamda < 1:
+                        step=step/(1-lamda)
+                step_old=step
+
+            # Damping of step if error increase
+            for i in range(5):
+                g_new, x, xi, yi=self._flashResidual(z, lnK+step)
+                error_new=max(abs(g_new))
+                if error_new < error or not newton:
+                    break
+                step=step/2
+
+            if not newton and (iteration >= self.ssIter or
+                               iteration > 2 and error_new > 0.9*error):
+                newton=True
+            lnK+=step
+            g=g_new
+            error=error_new
+
+        # Trivial solution or out of two phase region
+        if not 0 < x < 1 or max(abs(lnK)) < 1e-4:
+            return self._singlePhase(z)
+
+        return x, xi.tolist(), yi.tolist(), exp(lnK).tolist()
+
+    def _lnphi(self, xi, phase):
+        """Logarithm of fugacity coefficients of a phase with composition xi
+        at the temperature and pressure of equation, vapor like (phase=0) or
+        liquid like (phase=1). The equations with _lnphiPhase use the root of
+        equation for the phase composition, else the fugacity coefficients
+        are calculated with the root of the feed"""
+        try:
+            return self._lnphiPhase(self.T, self.P.atm, xi, phase)
+        except NotImplementedError:
+            return log(asarray(self._fug(self.Z[phase], xi), dtype=float))
+
+    def _stability(self, z, K):
+        """Michelsen tangent plane distance stability test, use a vapor like
+        and a liquid like trial phase.
+        Return the K values estimated from the most unstable trial phase or
+        None if the feed is stable"""
+        # Feed in phase with lower gibbs energy
+        lnphiv=self._lnphi(z, 0)
+        lnphil=self._lnphi(z, 1)
+        if dot(z, lnphiv) <= dot(z, lnphil):
+            d=log(where(z > 0, z, 1))+lnphiv
         else:
-            x=0.5
-            while True:
-                xo=x
-                solucion=fsolve(Rachford, x, full_output=True)
-                if solucion[2]!=1:
-                    print(solucion)
+            d=log(where(z > 0, z, 1))+lnphil
+
+        tm_min=-1e-8
+        Kn=None
+        for phase, W in ((0, z*K), (1, z/K)):
+            for i in range(self.maxIter):
+                W_new=where(z > 0, exp(d-self._lnphi(W/W.sum(), phase)), 0)
+                converged=max(abs(W_new-W)) < 1e-10
+                W=W_new
+                if converged:
                     break
+            tm=1-W.sum()
+            x=W/W.sum()
+            trivial=max(abs(x-z)) < 1e-6
+            if tm < tm_min and not trivial:
+                tm_min=tm
+                if phase == 0:
+                    Kn=where(z > 0, x/where(z > 0, z, 1), 1)
                 else:
-                    x=solucion[0][0]
-
-                    xi=[]
-                    yi=[]
-                    for zi, ki in zip(self.fraccion, Ki):
-                        xi.append(float(zi/(1-x+x*ki)))
-                        yi.append(float(zi*ki/(1-x+x*ki)))
-
-                    tital=self._fug(self.Z[1], xi)
-                    titav=self._fug(self.Z[0], yi)
-                    fiv=[z*t*self.P for z, t in zip(yi, titav)]
-                    fil=[z*t*self.P for z, t in zip(xi, tital)]
-                    #criterio de convergencia Eq 21
-                    if sum([abs(l/v-1) for l, v in zip(fil, fiv)])< 1e-14 and abs(x-xo) < 1e-10:
-                        break
-                    else:
-                        Ki=[l/v for l, v in zip(tital, titav)]
-
-        if x < 0:
-            x = 0
-        elif x > 1:
-            x = 1
-
-        return x, xi, yi, Ki
+                    Kn=where(x > 0, z/where(x > 0, x, 1), 1)
+        return Kn
+
+    def _flashResidual(self, z, lnK):
+        """Calculate the phase split for the lnK values, return the residual
+        of fugacity equality and the vapor fraction and phase compositions"""
+        K=exp(lnK)
+        x=_rachfordRice(z, K)
+        xi=z/(1-x+x*K)
+        yi=xi*K
+        xi/=xi.sum()
+        yi/=yi.sum()
+        g=lnK+self._lnphi(yi, 0)-self._lnphi(xi, 1)
+        return g, x, xi, yi
+
+    def _flashNewtonStep(self, z, lnK, g):
+        """Newton step in lnK variables with jacobian calculated by finite
+        differences, fall back to successive substitution step if the
+        jacobian is singular"""
+        n=len(lnK)
+        J=[]
+        for j in range(n):
+            h=1e-6*max(1, abs(lnK[j]))
+            dlnK=lnK.copy()
+            dlnK[j]+=h
+            J.append((self._flashResidual(z, dlnK)[0]-g)/h)
+        try:
+            return solve(array(J).T, -g)
+        except LinAlgError:
+            return -g
+
+    def _singlePhase(self, z):
+        """Return the flash result for a single phase feed, vapor if the
+        vapor like root has lower gibbs energy"""
+        lnphiv=self._lnphi(z, 0)
+        lnphil=self._lnphi(z, 1)
+        gv=dot(z, lnphiv)
+        gl=dot(z, lnphil)
+        if abs(gv-gl) < 1e-10:
+            # Same root, use the Wilson K to define the phase
+            K=self._wilson(self.T, self.P.atm)
+            x=0. if dot(z, K) < 1 else 1.
+        elif gv < gl:
+            x=1.
+        else:
+            x=0.
+        return x, self.fraccion, self.fraccion, exp(lnphil-lnphiv).tolist()
+
+    def _lnphiPhase(self, T, P, xi, phase):
+        """Logarithm of fugacity coefficients of components in a phase with
+        composition xi at T and P in atm, vapor like (phase=0) or liquid like
+        (phase=1), necessary for phase envelope calculation"""
+        raise NotImplementedError
+
+    def update(self, T, P):
+        """Recalculate the equation of state at a new temperature and
+        pressure, the equations with precalculated parameters can override it
+        to avoid the complete calculation"""
+        self.__init__(T, P, self.mezcla)
+
+    def _wilson(self, T, P):
+        """K values estimated with Wilson correlation at T and P in atm"""
+        return array([cmp.Pc.atm/P*exp(5.37*(1.+cmp.f_acent)*(1.-cmp.Tc/T))
+                      for cmp in self.componente], dtype=float)
+
+    def _saturation(self, T, P, bubble):
+        """Residual of bubble point, ln(sum(z·K)), or dew point,
+        ln(sum(z/K)), at T and P in atm, with the K values of incipient
+        phase calculated by successive substitution from the Wilson K
+        values, with each phase evaluated at its own composition"""
+        z=array(self.fraccion, dtype=float)
+        K=self._wilson(T, P)
+        for i in range(self.maxIter):
+            if bubble:
+                W=z*K
+                lnK=self._lnphiPhase(T, P, z, 1) - \
+                    self._lnphiPhase(T, P, W/W.sum(), 0)
+            else:
+                W=z/K
+                lnK=self._lnphiPhase(T, P, W/W.sum(), 1) - \
+                    self._lnphiPhase(T, P, z, 0)
+            converged=max(abs(exp(lnK)-K)) < 1e-10
+            K=exp(lnK)
+            if converged:
+                break
+        if bubble:
+            return log(dot(z, K))
+        else:
+            return log(dot(z, 1/K))
+
+    def _saturationT(self, bubble):
+        """Bubble or dew temperature at the pressure of equation, with the
+        initial value estimated with the Wilson K values
+
+        >>> from lib.mezcla import Mezcla
+        >>> from lib.EoS.cubic import PR
+        >>> mix = Mezcla(2, ids=[2, 3, 4], caudalUnitarioMolar=[0.6, 0.3, 0.1])
+        >>> eq = PR(230, 20, mix)
+        >>> "%0.1f %0.1f" % (eq._Bubble_T(), eq._Dew_T())
+        '182.1 254.2'
+        """
+        z=array(self.fraccion, dtype=float)
+        P=self.P.atm
+        Tmin=0.2*min(cmp.Tc for cmp in self.componente)
+        Tmax=3*max(cmp.Tc for cmp in self.componente)
+        for i in range(100):
+            T=(Tmin+Tmax)/2
+            K=self._wilson(T, P)
+            if bubble:
+                wilson=dot(z, K)
+            else:
+                wilson=1/dot(z, 1/K)
+            if wilson > 1:
+                Tmax=T
+            else:
+                Tmin=T
+
+        eq=copy(self)
+        T=fsolve(lambda T: eq._saturation(T[0], P, bubble), T)
+        return unidades.Temperature(T[0])
+
+    def _saturationP(self, bubble):
+        """Bubble or dew pressure at the temperature of equation, with the
+        initial value estimated with the Wilson K values"""
+        z=array(self.fraccion, dtype=float)
+        KP=self._wilson(self.T, 1)
+        if bubble:
+            P=dot(z, KP)
+        else:
+            P=1/dot(z, 1/KP)
 
+        eq=copy(self)
+        P=fsolve(lambda P: eq._saturation(self.T, P[0], bubble), P)
+        return unidades.Pressure(P[0], "atm")
 
     def _Bubble_T(self):
-        def f(T):
-            eq=self.__class__(T, self.P.atm, self.mezcla)
-            return sum([k*x for k, x in zip(eq.Ki, self.fraccion)])-1.
-
-        T=fsolve(f, self.T)
-        return unidades.Temperature(T)
+        return self._saturationT(True)
 
     def _Bubble_P(self):
-        def f(P):
-            eq=self.__class__(self.T, P, self.mezcla)
-            return sum([k*x for k, x in zip(eq.Ki, self.fraccion)])-1.
-
-        P=fsolve(f, self.P.atm)
-        return unidades.Pressure(P, "atm")
+        return self._saturationP(True)
 
     def _Dew_T(self):
-        def f(T):
-            eq=self.__class__(T, self.P.atm, self.mezcla)
-            return 1./sum([x/k for k, x in zip(eq.Ki, self.fraccion)])-1.
-
-        T=fsolve(f, self.T)
-        return unidades.Temperature(T)
+        return self._saturationT(False)
 
     def _Dew_P(self):
-        def f(P):
-            eq=self.__class__(self.T, P, self.mezcla)
-            return sum([x/k for k, x in zip(eq.Ki, self.fraccion)])-1.
-
-        P=fsolve(f, self.P.atm)
-        return unidades.Pressure(P, "atm")
-
-
-
-
-
-
+        return self._saturationP(False)
+
+
+
+
+
+
+
+
+class PhaseEnvelope(object):
+    """Phase envelope of a mixture, traced by natural parameter continuation
+    over the incipient phase equations, Michelsen method
+
+    The variables are the ln K of components, ln T and ln P. The envelope is
+    traced from the bubble point at low pressure, across the critical point,
+    to the dew point at low pressure. In each step the specified variable is
+    the one with the larger sensitivity along the curve, and the initial
+    guess is extrapolated with the tangent of the curve, so the continuation
+    passes through the critical region without problems
+
+    Parameters
+    ----------
+    eq : EoS
+        Equation of state instance of mixture, must implement _lnphiPhase
+    P : float
+        Pressure of initial and final points of envelope, [atm]
+
+    Attributes
+    ----------
+    T : list
+        Temperature of envelope points, [K]
+    P : list
+        Pressure of envelope points, [Pa]
+    Tc, Pc : float
+        Critical point of mixture, [K], [Pa]
+    cricondenbar : tuple
+        Maximum pressure of envelope, (T, P)
+    cricondentherm : tuple
+        Maximum temperature of envelope, (T, P)
+
+    References
+    ----------
+    Michelsen, M.L. Calculation of Phase Envelopes and Critical Points for
+    Multicomponent Mixtures. Fluid Phase Equilibria 4 (1980) 1-10
+
+    Examples
+    --------
+    >>> from lib.mezcla import Mezcla
+    >>> from lib.EoS.cubic import PR
+    >>> mix = Mezcla(2, ids=[2, 3, 4], caudalUnitarioMolar=[0.6, 0.3, 0.1])
+    >>> env = PhaseEnvelope(PR(250, 20, mix))
+    >>> "%0.0f %0.0f" % (env.Tc, env.Pc/1e5)
+    '268 80'
+    >>> "%0.1f" % env.cricondentherm[0]
+    '278.5'
+    """
+    maxIter = 20
+    tolerance = 1e-10
+    maxPoints = 500
+    step = 0.1
+    maxStep = 0.5
+
+    def __init__(self, eq, P=1.):
+        self.eq = eq
+        self.z = array(eq.fraccion, dtype=float)
+        self.Pmin = P
+        self.T = []
+        self.P = []
+        self.lnK = []
+        self.Tc = None
+        self.Pc = None
+        self.cricondenbar = None
+        self.cricondentherm = None
+        self._trace()
+
+    def _equations(self, X, S, spec, crossed):
+        """Residuals of incipient phase equations, the z phase use the liquid
+        like root until the critical point is crossed"""
+        n = len(self.z)
+        T = exp(X[n])
+        P = exp(X[n+1])
+        y = self.z*exp(X[:n])
+        F = r_[X[:n] +
+               self.eq._lnphiPhase(T, P, y, int(crossed)) -
+               self.eq._lnphiPhase(T, P, self.z, int(not crossed)),
+               y.sum()-1, X[spec]-S]
+        return F
+
+    def _jacobian(self, X, S, spec, crossed, F):
+        """Jacobian of equations by finite differences"""
+        J = []
+        for j in range(len(X)):
+            h = 1e-7*max(1, abs(X[j]))
+            dX = X.copy()
+            dX[j] += h
+            J.append((self._equations(dX, S, spec, crossed)-F)/h)
+        return array(J).T
+
+    def _solve(self, X, S, spec, crossed):
+        """Newton method for a envelope point, return the solution, the
+        jacobian and the number of iterations, None if not converge"""
+        for iteration in range(1, self.maxIter+1):
+            try:
+                with errstate(invalid="ignore", divide="ignore"):
+                    F = self._equations(X, S, spec, crossed)
+                    J = self._jacobian(X, S, spec, crossed, F)
+                dX = solve(J, -F)
+            except (LinAlgError, ValueError):
+                return None, None, iteration
+            if not isfinite(dX).all():
+                return None, None, iteration
+            X = X+dX
+            if max(abs(dX)) < self.tolerance**0.5 and \
+                    max(abs(F)) < self.tolerance:
+                return X, J, iteration
+        return None, None, iteration
+
+    def _initial(self):
+        """Initial bubble point at the minimum pressure with K values from
+        Wilson correlation"""
+        cmps = self.eq.componente
+        Pc = array([cmp.Pc.atm for cmp in cmps])
+        Tc = array([cmp.Tc for cmp in cmps])
+        w = array([cmp.f_acent for cmp in cmps])
+
+        def lnK(T):
+            return log(Pc/self.Pmin)+5.373*(1+w)*(1-Tc/T)
+
+        # Bisection over temperature in the sum(z·K) = 1 condition
+        Tmin, Tmax = 0.2*min(Tc), 2*max(Tc)
+        for i in range(100):
+            T = (Tmin+Tmax)/2
+            if dot(self.z, exp(lnK(T))) > 1:
+                Tmax = T
+            else:
+                Tmin = T
+        return r_[lnK(T), log(T), log(self.Pmin)]
+
+    def _trace(self):
+        n = len(self.z)
+        X = self._initial()
+        spec = n+1
+        X, J, iteration = self._solve(X, X[spec], spec, False)
+        if X is None:
+            return
+
+        ref = argmax(abs(X[:n]))
+        sign0 = X[ref] > 0
+        crossed = False
+        direction = 1
+        step = self.step
+        points = [X]
+        while len(points) < self.maxPoints:
+            # Tangent of curve from the sensitivity of variables
+            dFdS = zeros(n+2)
+            dFdS[-1] = -1
+            tangent = solve(J, -dFdS)*direction
+
+            spec_new = argmax(abs(tangent))
+            tangent /= abs(tangent[spec_new])
+
+            X0 = X+tangent*step
+            crossed_new = (X0[ref] > 0) != sign0
+            Xn, Jn, iteration = self._solve(
+                X0, X0[spec_new], spec_new, crossed_new)
+
+            if Xn is None or max(abs(Xn[:n])) < 1e-6:
+                step /= 2
+                if step < 1e-5:
+                    break
+                continue
+
+            if crossed_new != crossed:
+                self._critical(X, Xn, ref)
+            crossed = crossed_new
+
+            if iteration <= 3:
+                step = min(step*1.5, self.maxStep)
+            elif iteration > 6:
+                step *= 0.7
+
+            direction = 1 if tangent[spec_new] > 0 else -1
+            X, J, spec = Xn, Jn, spec_new
+            points.append(X)
+
+            if X[n+1] < log(self.Pmin) and crossed:
+                break
+
+        self.lnK = [list(X[:n]) for X in points]
+        self.T = [float(exp(X[n])) for X in points]
+        self.P = [float(exp(X[n+1])*101325) for X in points]
+        self._extrema()
+
+    def _critical(self, X1, X2, ref):
+        """Interpolate the critical point between two points in the ln K of
+        the reference component"""
+        n = len(self.z)
+        f = X1[ref]/(X1[ref]-X2[ref])
+        X = X1+f*(X2-X1)
+        self.Tc = float(exp(X[n]))
+        self.Pc = float(exp(X[n+1])*101325)
+
+    def _extrema(self):
+        """Calculate the cricondenbar and cricondentherm with a parabolic
+        interpolation around the maximum points"""
+        T = self.T
+        P = self.P
+
+        def vertex(x, y, i):
+            if i == 0 or i == len(y)-1:
+                return x[i], y[i]
+            x0, x1, x2 = x[i-1:i+2]
+            y0, y1, y2 = y[i-1:i+2]
+            den = (x0-x1)*(x0-x2)*(x1-x2)
+            a = (x2*(y1-y0)+x1*(y0-y2)+x0*(y2-y1))/den
+            b = (x2**2*(y0-y1)+x1**2*(y2-y0)+x0**2*(y1-y2))/den
+            c = (x1*x2*(x1-x2)*y0+x2*x0*(x2-x0)*y1+x0*x1*(x0-x1)*y2)/den
+            if a >= 0:
+                return x[i], y[i]
+            xv = -b/2/a
+            return xv, c-b**2/4/a
+
+        if len(P) > 2:
+            self.cricondenbar = vertex(T, P, P.index(max(P)))
+            Pv, Tv = vertex(P, T, T.index(max(T)))
+            self.cricondentherm = (Tv, Pv)
 
 
 def PT_lib(compuesto, T):
@@ -32,6 +32,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 import os
 import pickle
 
+from numpy import array, bincount, dot
 from scipy import exp, log, zeros, r_
 from scipy.constants import R
 from scipy.optimize import fsolve
@@ -529,131 +530,109 @@ class GERG(object):
         return fio, fiot, fiott, fiod, fiodd, fiodt, nfioni
 
     def _phir(self, tau, delta):
-        """Contribución residual de la energía libre de Helmholtz eq. 7.7"""
-        fir = firt = firtt = fird = firdd = firdt = firdtt = 0
-        firxi = []
-        firxixj = zeros((len(self.comp), len(self.comp)))
-        firdxi = []
-        firtxi = []
-
-        for i, componente in enumerate(self.comp):
-            deltai = delta*self.rhoc/componente.rhoc
-            taui = componente.Tc*tau/self.Tc
-            fir_, firt_, firtt_, fird_, firdd_, firdt_, firdtt_, B_, C_ = \
-                componente._phir(taui, deltai)
-            fir += self.xi[i]*fir_
-            firt += self.xi[i]*firt_
-            firtt += self.xi[i]*firtt_
-            fird += self.xi[i]*fird_
-            firdd += self.xi[i]*firdd_
-            firdt += self.xi[i]*firdt_
-
-            firxi.append(fir_)
-            firdxi.append(fird_)
-            firtxi.append(firt_)
+        """Contribución residual de la energía libre de Helmholtz eq. 7.7
+
+        The pure and binary terms are evaluated in vectorized form with the
+        coefficients of the component set precompiled by _compilePhir"""
+        coef = _compilePhir(tuple(self.id))
+        x = array(self.xi, dtype=float)
+        n = len(x)
+
+        def add(index, values, size=n):
+            return bincount(index, weights=values, minlength=size)
+
+        # Pure component contribution, each evaluated at its reduced state
+        taui = coef["Tc"]*tau/self.Tc
+        deltai = delta*self.rhoc/coef["rhoc"]
+
+        nr, d, t, k = coef["pol"]
+        ta = taui[k]
+        de = deltai[k]
+        fi = nr*de**d*ta**t
+        firxi = add(k, fi)
+        firdxi = add(k, fi*d/de)
+        firddi = add(k, fi*d*(d-1)/de**2)
+        firtxi = add(k, fi*t/ta)
+        firtti = add(k, fi*t*(t-1)/ta**2)
+        firdti = add(k, fi*t*d/de/ta)
+        firdtti = add(k, fi*t*d*(t-1)/de/ta**2)
+
+        nr, d, g, t, c, k = coef["exp"]
+        ta = taui[k]
+        de = deltai[k]
+        dc = de**c
+        fi = nr*de**d*ta**t*exp(-g*dc)
+        Fd = d-g*c*dc
+        firxi += add(k, fi)
+        firdxi += add(k, fi*Fd/de)
+        firddi += add(k, fi/de**2*(Fd*(d-1-g*c*dc)-g**2*c**2*dc))
+        firtxi += add(k, fi*t/ta)
+        firtti += add(k, fi*t*(t-1)/ta**2)
+        firdti += add(k, fi*t*Fd/de/ta)
+        firdtti += add(k, fi*t*(t-1)*Fd/de/ta**2)
+
+        fir = dot(x, firxi)
+        fird = dot(x, firdxi)
+        firdd = dot(x, firddi)
+        firt = dot(x, firtxi)
+        firtt = dot(x, firtti)
+        firdt = dot(x, firdti)
+        firdtt = dot(x, firdtti)
 
         # Contribución residual cruzada eq 7.8
-        for i, x_i in enumerate(self.xi):
-            for j, x_j in enumerate(self.xi):
-                if j > i:
-                    (fir_, firt_, firtt_, fird_, firdd_, firdt_, firdtt_, B_,
-                        C_) = self._phijr(i, j, tau, delta)
-                    fir += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*fir_
-                    firt += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*firt_
-                    firtt += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*firtt_
-                    fird += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*fird_
-                    firdd += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*firdd_
-                    firdt += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*firdt_
-
-                    firxi[i] += x_j*self.Fij[self.id[i]][self.id[j]]*fir_
-                    firxixj[i, j] = self.Fij[self.id[i]][self.id[j]]*fir_
-                    firdxi[i] += x_j*self.Fij[self.id[i]][self.id[j]]*fird_
-                    firtxi[i] += x_j*self.Fij[self.id[i]][self.id[j]]*firt_
-
-        suma = suma_rho = suma_T = 0
-        for i, x_i in enumerate(self.xi):
-            suma += x_i*firxi[i]
-            suma_rho += x_i*self.rhocxi[i]
-            suma_T += x_i*self.Tcxi[i]
-
-        n_rhocni = []
-        n_Tcni = []
-        for i, x_i in enumerate(self.xi):
-            n_rhocni.append(self.rhocxi[i]-suma_rho)
-            n_Tcni.append(self.Tcxi[i]-suma_T)
-
-        n_firni = []  # ðar/ðni
-        nfirni = []   # ðnar/ðni
-        for i, componente in enumerate(self.comp):
-            n_firni.append(delta*fird*(1-1./self.rhoc*n_rhocni[i]) +
-                           tau*firt/self.Tc*n_Tcni[i]+firxi[i]-suma)
-            nfirni.append(fir_+n_firni[i])
+        i, j, F = coef["pair"]
+        if len(F):
+            m = len(F)
+            nr, d, t, q = coef["bpol"]
+            fi = nr*delta**d*tau**t
+            bfir = add(q, fi, m)
+            bfird = add(q, fi*d/delta, m)
+            bfirdd = add(q, fi*d*(d-1)/delta**2, m)
+            bfirt = add(q, fi*t/tau, m)
+            bfirtt = add(q, fi*t*(t-1)/tau**2, m)
+            bfirdt = add(q, fi*t*d/delta/tau, m)
+            bfirdtt = add(q, fi*t*d*(t-1)/delta/tau**2, m)
+
+            nr, d, t, eta, eps, beta, gam, q = coef["bgauss"]
+            E = exp(-eta*(delta-eps)**2-beta*(tau-gam)**2)
+            fi = nr*delta**d*tau**t*E
+            Ft = t/tau-2*beta*(tau-gam)
+            Ftt = Ft**2-t/tau**2-2*beta
+            Fd = d/delta-2*eta*(delta-eps)
+            bfir += add(q, fi, m)
+            bfird += add(q, fi*Fd, m)
+            bfirdd += add(q, nr*tau**t*E*(
+                -2*eta*delta**d+4*eta**2*delta**d*(delta-eps)**2 -
+                4*d*eta*delta**2*(delta-eps)+d*2*delta), m)
+            bfirt += add(q, fi*Ft, m)
+            bfirtt += add(q, fi*Ftt, m)
+            bfirdt += add(q, fi*Ft*Fd, m)
+            bfirdtt += add(q, fi*Ftt*Fd, m)
+
+            w = x[i]*x[j]*F
+            fir += dot(w, bfir)
+            firt += dot(w, bfirt)
+            firtt += dot(w, bfirtt)
+            fird += dot(w, bfird)
+            firdd += dot(w, bfirdd)
+            firdt += dot(w, bfirdt)
+            firdtt += dot(w, bfirdtt)
+
+            firxi += add(i, x[j]*F*bfir)
+            firdxi += add(i, x[j]*F*bfird)
+            firtxi += add(i, x[j]*F*bfirt)
+
+        suma = dot(x, firxi)
+        n_rhocni = array(self.rhocxi)-dot(x, self.rhocxi)
+        n_Tcni = array(self.Tcxi)-dot(x, self.Tcxi)
+
+        # ðar/ðni
+        n_firni = delta*fird*(1-1./self.rhoc*n_rhocni) + \
+            tau*firt/self.Tc*n_Tcni+firxi-suma
+        # ðnar/ðni
+        nfirni = list(fir+n_firni)
         return fir, firt, firtt, fird, firdd, firdt, firdtt, nfirni
 
-    def _phijr(self, i, j, tau, delta):
-        txt = str(i)+"-"+str(j)
-        constants = self.fir_ij.get(txt, 0)
-        fir = fird = firdd = firt = firtt = firdt = firdtt = B = C = 0
-        if constants:
-            delta_0 = 1e-50
-            nr1 = constants["nr1"]
-            d1 = constants["d1"]
-            t1 = constants["t1"]
-            for i in range(len(constants.get("nr1", []))):
-                # Polinomial terms
-                fir += nr1[i]*delta**d1[i]*tau**t1[i]
-                fird += nr1[i]*d1[i]*delta**(d1[i]-1)*tau**t1[i]
-                firdd += nr1[i]*d1[i]*(d1[i]-1)*delta**(d1[i]-2)*tau**t1[i]
-                firt += nr1[i]*t1[i]*delta**d1[i]*tau**(t1[i]-1)
-                firtt += nr1[i]*t1[i]*(t1[i]-1)*delta**d1[i]*tau**(t1[i]-2)
-                firdt += nr1[i]*t1[i]*d1[i]*delta**(d1[i]-1)*tau**(t1[i]-1)
-                firdtt += nr1[i]*t1[i]*d1[i]*(t1[i]-1)*delta**(d1[i]-1)*tau**(t1[i]-2)
-                B += nr1[i]*d1[i]*delta_0**(d1[i]-1)*tau**t1[i]
-                C += nr1[i]*d1[i]*(d1[i]-1)*delta_0**(d1[i]-2)*tau**t1[i]
-
-            nr2 = constants["nr2"]
-            if nr2:
-                d2 = constants["d2"]
-                t2 = constants["t2"]
-                n2 = constants["n2"]
-                e2 = constants["e2"]
-                b2 = constants["b2"]
-                g2 = constants["g2"]
-                for i in range(len(constants.get("nr2", []))):
-                    # Gaussian terms
-                    fir += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2))
-                    fird += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (d2[i]/delta-2*n2[i]*(delta-e2[i]))
-                    firdd += nr2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (-2*n2[i]*delta**d2[i]+4*n2[i]**2*delta**d2[i] *
-                         (delta-e2[i])**2-4*d2[i]*n2[i]*delta**2*(delta-e2[i])+d2[i]*2*delta)
-                    firt += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (t2[i]/tau-2*b2[i]*(tau-g2[i]))
-                    firtt += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        ((t2[i]/tau-2*b2[i]*(tau-g2[i]))**(2)-t2[i]/tau**2-2*b2[i])
-                    firdt += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (t2[i]/tau-2*b2[i]*(tau-g2[i])) * \
-                        (d2[i]/delta-2*n2[i]*(delta-e2[i]))
-                    firdtt += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        ((t2[i]/tau-2*b2[i]*(tau-g2[i]))**(2)-t2[i]/tau**2-2*b2[i]) * \
-                        (d2[i]/delta-2*n2[i]*(delta-e2[i]))
-                    B += nr2[i]*delta_0**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta_0-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (d2[i]/delta_0-2*n2[i]*(delta_0-e2[i]))
-                    C += nr2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta_0-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (-2*n2[i]*delta_0**d2[i]+4*n2[i]**2*delta_0**d2[i]*(delta_0-e2[i])**2 -
-                         4*d2[i]*n2[i]*delta_0**2*(delta_0-e2[i])+d2[i]*2*delta_0)
-
-        return fir, firt, firtt, fird, firdd, firdt, firdtt, B, C
-
     def flash(self):
         """Cálculo de los coeficientes de reparto entre fases"""
         #Estimación inicial de K mediante correlación wilson Eq 5.61 Pag 82
@@ -700,6 +679,91 @@ class GERG(object):
         return Ki, xi, yi, Q
 
 
+# Precompiled residual coefficients for each component set
+_phirCoefficients = {}
+
+
+def _compilePhir(ids):
+    """Convert the pure and binary departure terms of a component set of
+    GERG in contiguous arrays for the vectorized residual evaluation, the
+    result is cached so the conversion is done only once for each mixture
+
+    Parameters
+    ----------
+    ids : tuple
+        Index of components in GERG.componentes
+
+    Returns
+    -------
+    coef : dict
+        Arrays with the coefficients of terms and the position of component
+        or binary pair of each term
+
+    Examples
+    --------
+    >>> coef = _compilePhir((0, 1, 3))
+    >>> coef["pair"][0].tolist(), coef["pair"][1].tolist()
+    ([0, 0, 1], [1, 2, 2])
+    """
+    if ids in _phirCoefficients:
+        return _phirCoefficients[ids]
+
+    def terms(constants, keys, index):
+        lists = [constants.get(key, []) for key in keys]
+        size = min([len(l) for l in lists])
+        return [l[:size] for l in lists]+[[index]*size]
+
+    def join(lists, width):
+        columns = [[] for i in range(width)]
+        for l in lists:
+            for column, values in zip(columns, l):
+                column.extend(values)
+        return [array(column, dtype=float) for column in columns[:-1]] + \
+            [array(columns[-1], dtype=int)]
+
+    componentes = [GERG.componentes[i] for i in ids]
+    coef = {}
+    coef["Tc"] = array([cmp.Tc for cmp in componentes], dtype=float)
+    coef["rhoc"] = array([cmp.rhoc for cmp in componentes], dtype=float)
+
+    # Pure component terms
+    pol = []
+    exps = []
+    for k, cmp in enumerate(componentes):
+        pol.append(terms(cmp.GERG, ("nr1", "d1", "t1"), k))
+        exps.append(terms(cmp.GERG, ("nr2", "d2", "gamma2", "t2", "c2"), k))
+    coef["pol"] = join(pol, 4)
+    coef["exp"] = join(exps, 6)
+
+    # Binary departure terms, only the pairs with departure function
+    i_ = []
+    j_ = []
+    F = []
+    bpol = []
+    bgauss = []
+    for i, id_i in enumerate(ids):
+        for j, id_j in enumerate(ids):
+            if j <= i:
+                continue
+            constants = GERG.fir_ij.get("%i-%i" % (id_i, id_j))
+            if not constants:
+                continue
+            q = len(F)
+            i_.append(i)
+            j_.append(j)
+            F.append(GERG.Fij[id_i][id_j])
+            bpol.append(terms(constants, ("nr1", "d1", "t1"), q))
+            bgauss.append(terms(
+                constants, ("nr2", "d2", "t2", "n2", "e2", "b2", "g2"), q))
+    coef["pair"] = (array(i_, dtype=int), array(j_, dtype=int),
+                    array(F, dtype=float))
+    coef["bpol"] = join(bpol, 4)
+    coef["bgauss"] = join(bgauss, 8)
+
+    _phirCoefficients[ids] = coef
+    return coef
+
+
 id_GERG = [i.id for i in GERG.componentes]
 
 
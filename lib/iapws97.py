@@ -140,9 +140,9 @@ class IAPWS97(ThermoWater):
     def __init__(self, **kwargs):
         if "P" in kwargs:
             kwargs["P"] /= 1e6
-        elif "h" in kwargs:
+        if kwargs.get("h", None) is not None:
             kwargs["h"] /= 1e3
-        elif "s" in kwargs:
+        if kwargs.get("s", None) is not None:
             kwargs["s"] /= 1e3
 
         st = IAPWS(**kwargs)
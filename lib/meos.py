@@ -26,22 +26,245 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 #   o   Ecuación Peng-Robinson con translación de Peneloux
 #############################################################################
 
+import hashlib
+import json
 import os
+from collections import OrderedDict, namedtuple
+from functools import wraps
 from itertools import product
 from PyQt5.QtWidgets import QApplication
+from numpy import (array, asarray, atleast_1d, broadcast_arrays, clip,
+                   concatenate, errstate, geomspace, isfinite, linspace,
+                   nonzero, ones, where)
 from scipy import exp, log, log10, sin, sinh, cosh, tanh, arctan
 try:
     from scipy.constants import Bolzmann as Boltzmann
 except:
     from scipy.constants import Boltzmann
 from scipy.constants import pi, Avogadro, R
-from scipy.optimize import fsolve
+from scipy.interpolate import PchipInterpolator
+from scipy.optimize import brentq, fsolve
 
 from lib import unidades
+from lib.config import conf_dir
 from lib.physics import R_atml
 from lib.thermo import ThermoAdvanced
 
 
+# Compiled coefficient arrays of residual Helmholtz terms, indexed by id of the
+# coefficient dict, the dict is saved too to avoid id reuse
+_phirCoefficients = {}
+
+
+def _compilePhir(constants):
+    """Convert the term lists of a helmholtz residual dict in contiguous float
+    arrays ready to use in a vectorized evaluation, the result is cached so
+    the conversion is done only once for each equation
+
+    Parameters
+    ----------
+    constants : dict
+        Helmholtz equation of state definition
+
+    Returns
+    -------
+    coef : dict
+        Arrays with the coefficient for each term type, the virial factors
+        independent of tau are precalculated too
+    """
+    key = id(constants)
+    if key in _phirCoefficients:
+        return _phirCoefficients[key][1]
+
+    def terms(*keys, **default):
+        """Return the arrays of coefficients of a term type, truncated to
+        the shorter list like the zip iteration in _phir"""
+        lists = [constants.get(k, default.get(k, [])) for k in keys]
+        n = min([len(l) for l in lists])
+        return [array(l[:n], dtype=float) for l in lists]
+
+    delta_0 = 1e-200
+    coef = {}
+    with errstate(all="ignore"):
+        # Polinomial terms
+        n, d, t = terms("nr1", "d1", "t1")
+        coef["pol"] = n, d, t
+        coef["polB"] = where(d != 0, d*delta_0**(d-1), 0)
+        coef["polC"] = where(d*(d-1) != 0, d*(d-1)*delta_0**(d-2), 0)
+
+        # Exponential terms
+        n, d, g, t, c = terms("nr2", "d2", "gamma2", "t2", "c2")
+        coef["exp"] = n, d, g, t, c
+        coef["expB"] = exp(-g*delta_0**c)*delta_0**(d-1)*(d-g*c*delta_0**c)
+        coef["expC"] = exp(-g*delta_0**c)*delta_0**(d-2)*(
+            (d-g*c*delta_0**c)*(d-1-g*c*delta_0**c)-g**2*c**2*delta_0**c)
+
+        # Gaussian terms
+        n3 = len(constants.get("nr3", []))
+        coef["gauss"] = terms(
+            "nr3", "d3", "t3", "alfa3", "epsilon3", "beta3", "gamma3", "exp1",
+            "exp2", exp1=[2]*n3, exp2=[2]*n3)
+
+        # Non analitic terms
+        coef["nonanalytic"] = terms(
+            "nr4", "a4", "b4", "A", "B", "C", "D", "beta4")
+
+        # Special terms from Saul and Wagner
+        coef["nr5"] = terms("nr5", "d5", "t5")
+
+    _phirCoefficients[key] = (constants, coef)
+    return coef
+
+
+# Saturation tables of fluids, indexed by class name and equation index
+_saturationTables = {}
+
+
+def _hashConstants(constants):
+    """Return a hash string of the coefficient dict of a equation of state,
+    used to invalidate the saved saturation tables"""
+    try:
+        txt = json.dumps(constants, sort_keys=True, default=repr)
+    except TypeError:
+        txt = repr(constants)
+    return hashlib.md5(txt.encode()).hexdigest()
+
+
+# Statistics of the memoized evaluations of equation of state
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def _memoize(method):
+    """Decorator to memoize the evaluation of the equation of state at a
+    density and temperature in a LRU cache of the instance, the cache is
+    keyed on (rho, T, equation) and is cleared when the equation or the
+    reference state change"""
+    @wraps(method)
+    def wrapper(self, rho, T):
+        cache = self._eqCache
+        if not self._nCacheEq or cache is None:
+            return method(self, rho, T)
+
+        try:
+            key = (float(rho), float(T), method.__name__)
+        except TypeError:
+            # Array input, without cache
+            return method(self, rho, T)
+
+        if key in cache:
+            cache.move_to_end(key)
+            self._eqCacheHits += 1
+            return cache[key]
+
+        self._eqCacheMisses += 1
+        value = method(self, rho, T)
+        cache[key] = value
+        if len(cache) > self._nCacheEq:
+            cache.popitem(last=False)
+        return value
+    return wrapper
+
+
+def _newtonBracket(f, a, b, x0=None, fa=None, fb=None, xtol=1e-13,
+                   maxiter=100):
+    """Newton iteration safeguarded with bisection inside a bracket
+
+    Parameters
+    ----------
+    f : function
+        Function returning the value and the derivative at x
+    a, b : float
+        Limits of bracket, the function must change sign between them
+    x0 : float, optional
+        Initial value, the midpoint of bracket by default
+    fa, fb : float, optional
+        Function value at limits of bracket, if they are already known
+
+    Returns
+    -------
+    x : float
+        Root of function, None if the bracket is not valid or the iteration
+        don't converge
+    n : int
+        Number of function evaluations
+    """
+    n = 0
+    if fa is None:
+        fa = f(a)[0]
+        n += 1
+    if fb is None:
+        fb = f(b)[0]
+        n += 1
+    if not (isfinite(fa) and isfinite(fb)) or fa*fb > 0:
+        return None, n
+    if fa == 0:
+        return a, n
+    if fb == 0:
+        return b, n
+
+    # Orient the bracket so f(a) < 0 < f(b)
+    if fa > 0:
+        a, b = b, a
+    if x0 is None or not min(a, b) < x0 < max(a, b):
+        x0 = (a+b)/2
+    x = x0
+    dxold = abs(b-a)
+    for i in range(maxiter):
+        fx, dfx = f(x)
+        n += 1
+        if not isfinite(fx):
+            return None, n
+        if fx == 0:
+            return x, n
+        if fx < 0:
+            a = x
+        else:
+            b = x
+        with errstate(all="ignore"):
+            xn = x-fx/dfx
+        if min(a, b) <= xn <= max(a, b) and abs(xn-x) <= xtol*abs(xn):
+            return xn, n
+
+        # Bisection step if Newton goes out of bracket or it's not reducing
+        # the step fast enough
+        if not min(a, b) < xn < max(a, b) or abs(xn-x) > dxold/2:
+            xn = (a+b)/2
+            if abs(b-a) <= xtol*abs(xn):
+                return xn, n
+        dxold = abs(xn-x)
+        x = xn
+    return None, n
+
+
+def _scanBracket(f, points):
+    """Search the first change of sign of function in a sequence of points
+
+    Parameters
+    ----------
+    f : function
+        Function returning the value and the derivative at x
+    points : array_like
+        Points to check, in the order of search
+
+    Returns
+    -------
+    bracket : tuple
+        Limits of bracket and function value at them (a, b, fa, fb), None if
+        there isn't change of sign
+    n : int
+        Number of function evaluations
+    """
+    xo = fo = None
+    for n, x in enumerate(points, 1):
+        fx = f(x)[0]
+        if not isfinite(fx):
+            continue
+        if fo is not None and fo*fx <= 0:
+            return (xo, x, fo, fx), n
+        xo, fo = x, fx
+    return None, len(points)
+
+
 class MEoS(ThermoAdvanced):
     """General class for implement multiparameter equation of state
     Each child class must define parameters for do calculations:
@@ -101,6 +324,16 @@ class MEoS(ThermoAdvanced):
 
     _test = []
 
+    # Use the saved saturation tables to get the initial values of
+    # saturation calculations
+    _cacheSaturation = True
+    _nSaturation = 200
+
+    # Size of the LRU cache of evaluations of equation of state, 0 to
+    # disable it
+    _nCacheEq = 256
+    _eqCache = None
+
     kwargs = {"T": 0.0,
               "P": 0.0,
               "rho": None,
@@ -116,7 +349,8 @@ class MEoS(ThermoAdvanced):
               "ref": None,
               "refvalues": None,
               "rho0": 0,
-              "T0": 0}
+              "T0": 0,
+              "lazy": False}
     status = 0
     msg = QApplication.translate("pychemqt", "Unknown Variables")
     __doi__ = {
@@ -167,6 +401,8 @@ class MEoS(ThermoAdvanced):
             [Tref, Pref, ho, so]
         rho0: Initial value for iteration over density
         T0: Initial value for iteration over temperature
+        lazy: Calculate the derivatives, transport, molar and ideal gas
+            properties only in the first access to them
 
     Calculated properties:
         P         -   Pressure, MPa
@@ -238,9 +474,23 @@ class MEoS(ThermoAdvanced):
         cv0       -   Ideal gas Specific isochoric heat capacity, kJ/kg·K
         cp0_cv    -   Ideal gas Heat capacity ratio
         gamma0    -   Ideal gas Isoentropic exponent
+
+        Any pair of T, P, rho, h, s, u can define the state, round trips in
+        compressed liquid:
+
+        >>> from lib.mEoS import H2O, CH4
+        >>> pairs = ("T-rho", "T-h", "T-s", "T-u", "P-rho", "P-h", "P-s",
+        ...          "P-u", "rho-h", "rho-s", "rho-u", "h-s", "h-u", "s-u")
+        >>> for st in (H2O(T=0.7*H2O.Tc, P=11e6), CH4(T=0.7*CH4.Tc, P=2e6)):
+        ...     for pair in pairs:
+        ...         kw = {key: getattr(st, key) for key in pair.split("-")}
+        ...         st2 = st.__class__(**kw)
+        ...         if abs(st2.T/st.T-1) > 1e-6 or abs(st2.P/st.P-1) > 1e-6:
+        ...             print(st.name, pair, st2.T, st2.P)
         """
 
         self.kwargs = MEoS.kwargs.copy()
+        self.cacheClear()
         self.__call__(**kwargs)
 
         # Define general documentation
@@ -270,7 +520,9 @@ class MEoS(ThermoAdvanced):
             if self.status in (1, 3):
                 converge = True
                 for input in self._mode.split("-"):
-                    if abs(self.kwargs[input]-self.__getattribute__(input)._data) > 1e-9:
+                    value = self.kwargs[input]
+                    if abs(value-self.__getattribute__(input)._data) > \
+                            1e-9*max(1, abs(value)):
                         converge = False
                         break
                 if not converge:
@@ -332,21 +584,11 @@ class MEoS(ThermoAdvanced):
 
         return bool(self._mode)
 
-    def calculo(self):
-        T = self.kwargs["T"]
-        rho = self.kwargs["rho"]
-        P = self.kwargs["P"]
-        s = self.kwargs["s"]
-        h = self.kwargs["h"]
-        u = self.kwargs["u"]
-        x = self.kwargs["x"]
+    def _setEquation(self):
+        """Define the reference state and the equation of state to use from
+        the kwargs values, return the index of equation"""
         eq = self.kwargs["eq"]
-        visco = self.kwargs["visco"]
-        thermal = self.kwargs["thermal"]
-        ref = self.kwargs["ref"]
-        refvalues = self.kwargs["refvalues"]
-
-        self._ref(ref, refvalues)
+        self._ref(self.kwargs["ref"], self.kwargs["refvalues"])
 
         # Opcion de aceptar el nombre interno de la ecuacion
         if isinstance(eq, str) and eq in self.__class__.__dict__:
@@ -377,10 +619,71 @@ class MEoS(ThermoAdvanced):
             self._eq = self._ECS
             self._constants = self.eq[eq]
 
-        if self._viscosity:
-            self._viscosity = self._viscosity[visco]
-        if self._thermal:
-            self._thermal = self._thermal[thermal]
+        # The cached values are only valid for the same equation and
+        # reference state
+        config = (eq, self.kwargs["ref"], repr(self.kwargs["refvalues"]))
+        if config != self._eqCacheConfig:
+            self._eqCache.clear()
+            self._eqCacheConfig = config
+        return eq
+
+    def cacheInfo(self):
+        """Return the statistics of the cache of evaluations of equation of
+        state of instance, as a namedtuple with hits, misses, maxsize and
+        currsize
+
+        Examples
+        --------
+        A new quality at the same temperature reuse the evaluations of the
+        saturated phases
+
+        >>> from lib.mEoS import CH4
+        >>> st = CH4(T=150, x=0.5)
+        >>> st(x=0.3)
+        >>> st.cacheInfo()
+        CacheInfo(hits=2, misses=2, maxsize=256, currsize=2)
+        >>> st.cacheClear()
+        >>> st.cacheInfo()
+        CacheInfo(hits=0, misses=0, maxsize=256, currsize=0)
+        """
+        return CacheInfo(self._eqCacheHits, self._eqCacheMisses,
+                         self._nCacheEq, len(self._eqCache))
+
+    def cacheClear(self):
+        """Clear the cache of evaluations of equation of state and its
+        statistics"""
+        self._eqCache = OrderedDict()
+        self._eqCacheConfig = None
+        self._eqCacheHits = 0
+        self._eqCacheMisses = 0
+
+    def calculo(self):
+        # The phases of previous state can be referenced outside, so complete
+        # its properties pending in lazy mode before change the state
+        for fase in (self.__dict__.get("Liquido"), self.__dict__.get("Gas")):
+            if fase is not None:
+                fase.fillLazy()
+        self.__dict__.pop("_lazy", None)
+
+        T = self.kwargs["T"]
+        rho = self.kwargs["rho"]
+        P = self.kwargs["P"]
+        s = self.kwargs["s"]
+        h = self.kwargs["h"]
+        u = self.kwargs["u"]
+        x = self.kwargs["x"]
+        visco = self.kwargs["visco"]
+        thermal = self.kwargs["thermal"]
+
+        eq = self._setEquation()
+        self.iterations = 0
+
+        # Select the transport equations from the class lists, so the
+        # instance can be called again with new inputs
+        if type(self)._viscosity:
+            self._viscosity = type(self)._viscosity[visco]
+        if type(self)._thermal:
+            self._thermal = type(self)._thermal[thermal]
 
         propiedades = None
 
@@ -388,199 +691,69 @@ class MEoS(ThermoAdvanced):
             # Method with iteration necessary to get x
             if self._mode == "T-P":
 
-                if self.kwargs["rho0"]:
-                    rhoo = self.kwargs["rho0"]
-                elif T < 0.99*self.Tc and \
-                        self._Vapor_Pressure(T) < P:
-                    rhoo = self._Liquid_Density(T)
-                elif T < 0.99*self.Tc:
-                    rhoo = self._Vapor_Density(T)
-                elif T > 2*self.Tc or P > 2*self.Pc:
-                    rhoo = self.eq[eq]["rhomax"]*self.M
-                elif 0.99*self.Tc <= T < self.Tc and self.Pc*0.9 < P < self.Pc:
-                    rhoo = self.rhoc
-                else:
-                    rhoo = P/T/self.R
-                rinput = fsolve(lambda rho: self._eq(rho, T)["P"]-P, rhoo, full_output=True)
-
-                if rinput[2] != 1:
+                rho, self.iterations = self._rhoTP(T, P, self.kwargs["rho0"])
+                if rho is None:
                     self.status = 0
                     return
-                rho = rinput[0][0]
-
-            elif self._mode == "T-h":
-                funcion = lambda rho: self._eq(rho, T)["h"]*1000-h
-                def funcion2(rho):
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return vapor["h"]*1000.*x+liquido["h"]*1000.*(1-x)-h
-
-                rho = self.fsolve(funcion, True, funcion2, **{"h": h, "T": T})
-
-
-            elif self._mode == "T-s":
-                funcion = lambda rho: self._eq(rho, T)["s"]*1000.-s
-                def funcion2(rho):
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return vapor["s"]*1000.*x+liquido["s"]*1000.*(1-x)-s
-
-                rho = self.fsolve(funcion, True, funcion2, **{"s": s, "T": T})
-
-            elif self._mode == "T-u":
-                def funcion(rho):
-                    par = self._eq(rho, T)
-                    return par["h"]-par["P"]/1000.*par["v"]-u/1000.
-                def funcion2(rho):
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    vu = vapor["h"]-Ps/rhov
-                    lu = liquido["h"]-Ps/rhol
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return vu*x+lu*(1-x)-u
-
-                rho = self.fsolve(funcion, True, funcion2, **{"u": u, "T": T})
-
-            elif self._mode == "P-rho":
-                funcion = lambda T: self._eq(rho, T)["P"]-P
-                def funcion2(T):
-                    rhol, rhov, Ps = self._saturation(T)
-                    return Ps-P
-
-                T = self.fsolve(funcion, True, funcion2, **{"P": P, "rho": rho})
-
-            elif self._mode == "P-h":
-                def funcion(parr):
-                    par = self._eq(parr[0], parr[1])
-                    return par["P"]-P, par["h"]*1000-h
-                def funcion2(parr):
-                    rho, T = parr
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return Ps-P, vapor["h"]*1000*x+liquido["h"]*1000*(1-x)-h
-
-                rho, T = self.fsolve(funcion, True, funcion2, **{"P": P, "h": h})
-
-            elif self._mode == "P-s":
-                def funcion(parr):
-                    par = self._eq(parr[0], parr[1])
-                    return par["P"]*1000-P, par["s"]*1000-s
-                def funcion2(parr):
-                    rho, T = parr
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    x = (1./rho-1./rhol)/(1./rhov-1./rhol)
-                    return Ps-P, vapor["s"]*1000*x+liquido["s"]*1000*(1-x)-s
-
-                rho, T = self.fsolve(funcion, True, funcion2, **{"P": P, "s": s})
-
-            elif self._mode == "P-u":
-                def funcion(parr):
-                    par = self._eq(parr[0], parr[1])
-                    return par["h"]-par["P"]*par["v"]-u/1000., par["P"]-P
-                def funcion2(parr):
-                    rho, T = parr
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    vu = vapor["h"]-Ps/rhov
-                    lu = liquido["h"]-Ps/rhol
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return Ps-P, vu*x+lu*(1-x)-u
-
-                rho, T = self.fsolve(funcion, True, funcion2, **{"P": P, "u": u})
-
-            elif self._mode == "rho-h":
-                funcion = lambda T: self._eq(rho, T)["h"]*1000-h
-                def funcion2(T):
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return vapor["h"]*x+liquido["h"]*(1-x)-h/1000
-
-                T = self.fsolve(funcion, True, funcion2, **{"h": h, "rho": rho})
 
-            elif self._mode == "rho-s":
-                funcion = lambda T: self._eq(rho, T)["s"]*1000.-s
-                def funcion2(T):
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return vapor["s"]*1000.*x+liquido["s"]*1000.*(1-x)-s
-
-                T = self.fsolve(funcion, True, funcion2, **{"s": s, "rho": rho})
-
-            elif self._mode == "rho-u":
-                def funcion(T):
-                    par = self._eq(rho, T)
-                    return par["h"]-par["P"]/1000*par["v"]-u/1000
-                def funcion2(T):
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    vu = vapor["h"]-Ps/rhov
-                    lu = liquido["h"]-Ps/rhol
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return vu*x+lu*(1-x)-u/1000
+            elif self._mode in ("T-h", "T-s", "T-u"):
+                key = self._mode[-1]
+                sol = self._flashT(T, key, self.kwargs[key])
+                if sol is None:
+                    self.status = 5
+                    self.msg = QApplication.translate(
+                        "pychemqt", "Solution don´t converge")
+                    return
+                rho, T, self.iterations = sol
 
-                T = self.fsolve(funcion, True, funcion2, **{"u": u, "rho": rho})
+            elif self._mode in ("P-rho", "P-h", "P-s", "P-u"):
+                key = self._mode[2:]
+                sol = self._flashP(P, key, self.kwargs[key])
+                if sol is None:
+                    self.status = 5
+                    self.msg = QApplication.translate(
+                        "pychemqt", "Solution don´t converge")
+                    return
+                rho, T, self.iterations = sol
 
-            elif self._mode == "h-s":
-                def funcion(parr):
-                    par = self._eq(parr[0], parr[1])
-                    return par["h"]*1000-h, par["s"]*1000.-s
-                def funcion2(parr):
-                    rho, T = parr
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return (vapor["h"]*1000*x+liquido["h"]*1000*(1-x)-h,
-                            vapor["s"]*1000*x+liquido["s"]*1000*(1-x)-s)
+            elif self._mode in ("rho-h", "rho-s", "rho-u"):
+                key = self._mode[-1]
+                sol = self._flashRho(rho, key, self.kwargs[key])
+                if sol is None:
+                    self.status = 5
+                    self.msg = QApplication.translate(
+                        "pychemqt", "Solution don´t converge")
+                    return
+                rho, T, self.iterations = sol
 
-                rho, T = self.fsolve(funcion, True, funcion2, **{"s": s, "h": h})
+            elif self._mode in ("h-s", "h-u", "s-u"):
+                key1, key2 = self._mode.split("-")
+                v1 = self.kwargs[key1]
+                v2 = self.kwargs[key2]
 
-            elif self._mode == "h-u":
                 def funcion(parr):
-                    par = self._eq(parr[0], parr[1])
-                    return par["h"]-par["P"]/1000*par["v"]-u, par["h"]-h
-                def funcion2(parr):
-                    rho, T = parr
-                    rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    vu = vapor["h"]-Ps/rhov
-                    lu = liquido["h"]-Ps/rhol
-                    x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return vapor["h"]*x+liquido["h"]*(1-x)-h, vu*x+lu*(1-x)-u
+                    prop = self._flashDerivatives(parr[0], parr[1])
+                    return prop[key1][0]-v1, prop[key2][0]-v2
 
-                rho, T = self.fsolve(funcion, True, funcion2, **{"u": u, "h": h})
+                def jacobiano(parr):
+                    prop = self._flashDerivatives(parr[0], parr[1])
+                    return [prop[key1][1:], prop[key2][1:]]
 
-            elif self._mode == "s-u":
-                def funcion(parr):
-                    par = self._eq(parr[0], parr[1])
-                    return par["h"]-par["P"]*par["v"]-u, par["s"]*1000.-s
                 def funcion2(parr):
                     rho, T = parr
                     rhol, rhov, Ps = self._saturation(T)
-                    vapor = self._eq(rhov, T)
-                    liquido = self._eq(rhol, T)
-                    vu = vapor["h"]-Ps/rhov
-                    lu = liquido["h"]-Ps/rhol
+                    liquido = self._flashDerivatives(rhol, T)
+                    vapor = self._flashDerivatives(rhov, T)
                     x = (1./rho-1/rhol)/(1/rhov-1/rhol)
-                    return vapor["s"]*1000.*x+liquido["s"]*1000.*(1-x)-s, vu*x+lu*(1-x)-u
+                    return (vapor[key1][0]*x+liquido[key1][0]*(1-x)-v1,
+                            vapor[key2][0]*x+liquido[key2][0]*(1-x)-v2)
 
-                rho, T = self.fsolve(funcion, True, funcion2, **{"u": u, "s": s})
+                sol = self._flashPair(key1, v1, key2, v2)
+                if sol is None:
+                    rho, T = self.fsolve(funcion, True, funcion2, jacobiano,
+                                         **{key1: v1, key2: v2})
+                else:
+                    rho, T, self.iterations = sol
 
             if self._mode == "T-rho" and self.kwargs["rho"] == 0:
                 self.status = 3
@@ -598,8 +771,14 @@ class MEoS(ThermoAdvanced):
             T = float(T)
             propiedades = self._eq(rho, T)
             if T <= self.Tc:
-                rhol = self._Liquid_Density(T)
-                rhov = self._Vapor_Density(T)
+                table = self._saturationTable()
+                if table and table["T"][0] <= T <= table["T"][-1]:
+                    # Exact saturation densities to avoid misclassify the
+                    # states near the saturation curve
+                    rhol, rhov, Ps = self._saturation(T)
+                else:
+                    rhol = self._Liquid_Density(T)
+                    rhov = self._Vapor_Density(T)
                 if rhol > rho > rhov:
                     rhol, rhov, Ps = self._saturation(T)
                     x = (1/rho-1/rhol)/(1/rhov-1/rhol)
@@ -648,7 +827,13 @@ class MEoS(ThermoAdvanced):
                 T = float(T)
                 rhol, rhov, Ps = self._saturation(T)
                 return Ps-P
-            T = fsolve(funcion, 0.9*self.Tc)[0]
+
+            To = 0.9*self.Tc
+            table = self._saturationTable()
+            if table and exp(table["Ps"](table["T"][0])) <= P <= \
+                    exp(table["Ps"](table["T"][-1])):
+                To = float(table["T_Ps"](log(P)))
+            T = fsolve(funcion, To)[0]
             rhol, rhov, Ps = self._saturation(T)
             rho = 1/(1/rhov*x+1/rhol*(1-x))
             vapor = self._eq(rhov, T)
@@ -667,26 +852,10 @@ class MEoS(ThermoAdvanced):
         self.x = unidades.Dimensionless(x)
 
         # Ideal properties
-        cp0 = self._prop0(rho, self.T)
-        self.v0 = unidades.SpecificVolume(cp0["v"])
-        self.rho0 = unidades.Density(1./self.v0)
-        self.rhoM0 = unidades.MolarDensity(self.rho0/self.M)
-        self.h0 = unidades.Enthalpy(cp0["h"])
-        self.hM0 = unidades.MolarEnthalpy(self.h0/self.M)
-        self.u0 = unidades.Enthalpy(self.h0-self.P*self.v0)
-        self.uM0 = unidades.MolarEnthalpy(self.u0/self.M)
-        self.s0 = unidades.SpecificHeat(cp0["s"])
-        self.sM0 = unidades.MolarSpecificHeat(self.s0/self.M)
-        self.a0 = unidades.Enthalpy(self.u0-self.T*self.s0)
-        self.aM0 = unidades.MolarEnthalpy(self.a0/self.M)
-        self.g0 = unidades.Enthalpy(self.h0-self.T*self.s0)
-        self.gM0 = unidades.MolarEnthalpy(self.g0/self.M)
-        self.cp0 = unidades.SpecificHeat(cp0["cp"])
-        self.cpM0 = unidades.MolarSpecificHeat(self.cp0/self.M)
-        self.cv0 = unidades.SpecificHeat(cp0["cv"])
-        self.cvM0 = unidades.MolarSpecificHeat(self.cv0/self.M)
-        self.cp0_cv = unidades.Dimensionless(self.cp0/self.cv0)
-        self.gamma0 = self.cp0_cv
+        if self.kwargs["lazy"]:
+            self._setLazy(self._lazyIdeal, self._fillIdeal, rho)
+        else:
+            self._fillIdeal(rho)
 
         self.Liquido = ThermoAdvanced()
         self.Gas = ThermoAdvanced()
@@ -726,10 +895,10 @@ class MEoS(ThermoAdvanced):
             # self.IntP = unidades.Pressure(x*self.Gas.IntP+(1-x)*self.Liquido.IntP)
 
         # Calculate special properties useful only for one phase
-        if x < 1 and self.Tt <= T <= self.Tc:
-            self.sigma = unidades.Tension(self._Surface())
+        if self.kwargs["lazy"]:
+            self._setLazy(("sigma", ), self._fillSurface, x, T)
         else:
-            self.sigma = unidades.Tension(None)
+            self._fillSurface(x, T)
 
         if 0 < x < 1:
             self.virialB = unidades.SpecificVolume(vapor["B"]/self.rhoc)
@@ -747,11 +916,13 @@ class MEoS(ThermoAdvanced):
         self.invT = unidades.InvTemperature(-1/self.T)
 
 
-    def fsolve(self, function, phases=True, function2phase=None, **kwargs):
+    def fsolve(self, function, phases=True, function2phase=None, fprime=None,
+               **kwargs):
         """Iterate to calculate T and rho
         function: function to iterate
         phases: calculate two phases region
-        funtion2phase: function to iterate in two phase region"""
+        funtion2phase: function to iterate in two phase region
+        fprime: jacobian of function, only for two variables iteration"""
         if "T" not in kwargs:
             to = [self.Tc, self._constants["Tmin"], self._constants["Tmax"]]
             if self.kwargs["T0"]:
@@ -771,6 +942,7 @@ class MEoS(ThermoAdvanced):
             for r in ro:
                 try:
                     rinput = fsolve(function, r, full_output=True)
+                    self.iterations += rinput[1]["nfev"]
                     rho = rinput[0][0]
                 except:
                     pass
@@ -783,6 +955,7 @@ class MEoS(ThermoAdvanced):
             for t in to:
                 try:
                     rinput = fsolve(function, t, full_output=True)
+                    self.iterations += rinput[1]["nfev"]
                     T = rinput[0][0]
                 except:
                     pass
@@ -793,7 +966,9 @@ class MEoS(ThermoAdvanced):
         else:
             for r, t in product(ro, to):
                 try:
-                    rinput = fsolve(function, [r, t], full_output=True)
+                    rinput = fsolve(function, [r, t], fprime=fprime,
+                                    full_output=True)
+                    self.iterations += rinput[1]["nfev"]
                     rho, T = rinput[0]
                 except:
                     pass
@@ -821,6 +996,7 @@ class MEoS(ThermoAdvanced):
                         for r in ro:
                             try:
                                 rinput = fsolve(function2phase, r, full_output=True)
+                                self.iterations += rinput[1]["nfev"]
                                 rho = rinput[0][0]
                             except:
                                 pass
@@ -832,6 +1008,7 @@ class MEoS(ThermoAdvanced):
                         for t in to:
                             try:
                                 rinput = fsolve(function2phase, t, full_output=True)
+                                self.iterations += rinput[1]["nfev"]
                                 T = rinput[0][0]
                             except:
                                 pass
@@ -843,12 +1020,12 @@ class MEoS(ThermoAdvanced):
                         for r, t in zip(ro, to):
                             try:
                                 rinput = fsolve(function2phase, [r, t], full_output=True)
+                                self.iterations += rinput[1]["nfev"]
                                 rho, T = rinput[0]
                             except:
                                 pass
                             else:
                                 f1, f2 = function2phase([rho, T])
-                                print(rho, T, f1, f2)
                                 if (rho != r or T != t) and 0 < rho < self._constants["rhomax"]*self.M and abs(f1) < 1e-3 and abs(f2) < 1e-3:
                                     break
 
@@ -859,8 +1036,743 @@ class MEoS(ThermoAdvanced):
         else:
             return rho, T
 
+    def _flashDerivatives(self, rho, T):
+        """Calculate the properties used as input in flash calculations with
+        its analytic partial derivatives respect to density and temperature
+
+        Parameters
+        ----------
+        rho : float
+            Density, [kg/m³]
+        T : float
+            Temperature, [K]
+
+        Returns
+        -------
+        prop : dict
+            Dict with the tuple (value, ∂/∂rho at constant T, ∂/∂T at
+            constant rho) of P, h, s, u and rho, in SI base units
+        """
+        prop = self._eq(rho, T)
+        P = float(prop["P"])
+        h = float(prop["h"])*1000
+        cv = float(prop["cv"])*1000
+        if "dhdrho" in prop and "drhodt" in prop:
+            Prho = float(prop["dpdrho"])
+            PT = -float(prop["drhodt"])*Prho
+            hrho = float(prop["dhdrho"])
+        else:
+            # Numerical derivatives for equations without analytic values
+            dr = rho*1e-6
+            dt = T*1e-6
+            p1 = self._eq(rho+dr, T)
+            p2 = self._eq(rho-dr, T)
+            p3 = self._eq(rho, T+dt)
+            p4 = self._eq(rho, T-dt)
+            Prho = float(p1["P"]-p2["P"])/2/dr
+            PT = float(p3["P"]-p4["P"])/2/dt
+            hrho = float(p1["h"]-p2["h"])*1000/2/dr
+
+        hT = cv+PT/rho
+        return {"P": (P, Prho, PT),
+                "h": (h, hrho, hT),
+                "s": (float(prop["s"])*1000, -PT/rho**2, cv/T),
+                "u": (h-P/rho, hrho-Prho/rho+P/rho**2, cv),
+                "rho": (rho, 1., 0.)}
+
+    def _rhoGuess(self, T, P):
+        """Initial value of density for a temperature-pressure calculation
+        from the ancillary equations"""
+        if T < 0.99*self.Tc and self._Vapor_Pressure(T) < P:
+            rhoo = self._Liquid_Density(T)
+        elif T < 0.99*self.Tc:
+            rhoo = min(self._Vapor_Density(T), P/T/self.R)
+        elif T > 2*self.Tc or P > 2*self.Pc:
+            rhoo = self._constants["rhomax"]*self.M
+        elif 0.99*self.Tc <= T < self.Tc and self.Pc*0.9 < P < self.Pc:
+            rhoo = self.rhoc
+        else:
+            rhoo = P/T/self.R
+        return float(rhoo)
+
+    def _rhoTP(self, T, P, rho0=None):
+        """Solve the density from temperature and pressure with a Newton
+        iteration using the analytic derivative of pressure. The iteration
+        start from the ancillary equations and rho0, and if both reach a
+        mechanically unstable region, from the maximum density of equation.
+        Below the critical point rho0 is used first only if it's in the
+        phase selected by the ancillary equations
+
+        Returns
+        -------
+        rho : float
+            Density, [kg/m³], None if don't converge
+        n : int
+            Number of function evaluations
+        """
+        guess = self._rhoGuess(T, P)
+        rhomax = self._constants["rhomax"]*self.M
+        if T < 0.99*self.Tc:
+            # The ancillary equations select the correct phase, the equation
+            # can have spurious roots inside the saturation curve
+            if rho0 and (rho0-self.rhoc)*(guess-self.rhoc) > 0:
+                init = (rho0, guess, rhomax)
+            else:
+                init = (guess, rho0, rhomax)
+        else:
+            init = (rho0, guess, rhomax)
+        n = 0
+        for rho in init:
+            if not rho:
+                continue
+            for it in range(50):
+                p, dpdrho, dpdT = self._flashDerivatives(rho, T)["P"]
+                n += 1
+                if dpdrho <= 0:
+                    break
+                new = rho-(p-P)/dpdrho
+                if new <= 0:
+                    new = rho/2
+                if abs(new-rho) <= 1e-13*new:
+                    return new, n
+                rho = new
+
+        # Fallback to the calculo procedure
+        rinput = fsolve(lambda rho: self._eq(rho, T)["P"]-P, guess,
+                        full_output=True)
+        n += rinput[1]["nfev"]
+        if rinput[2] == 1 and rinput[0][0] > 0:
+            return float(rinput[0][0]), n
+        return None, n
+
+    def _saturationP(self, P):
+        """Calculate the saturation state at pressure P with a Newton
+        iteration in temperature using the Clausius-Clapeyron equation for
+        the derivative of vapor pressure
+
+        Returns
+        -------
+        T : float
+            Saturation temperature, [K]
+        rhol, rhov : float
+            Saturated liquid and vapor densities, [kg/m³]
+        liquido, vapor : dict
+            Properties of saturated phases as returned by _flashDerivatives
+        n : int
+            Number of iterations
+        None if P is out of the range of saturation curve
+        """
+        table = self._saturationTable()
+        if table:
+            if not exp(table["Ps"](table["T"][0])) <= P <= \
+                    exp(table["Ps"](table["T"][-1])):
+                return None
+            T = float(table["T_Ps"](log(P)))
+        else:
+            if not self._Vapor_Pressure(self.Tt) <= P < self.Pc:
+                return None
+            T = 0.9*self.Tc
+
+        for n in range(1, 51):
+            rhol, rhov, Ps = self._saturation(T)
+            liquido = self._flashDerivatives(rhol, T)
+            vapor = self._flashDerivatives(rhov, T)
+            if abs(Ps-P) <= 1e-12*P:
+                return T, rhol, rhov, liquido, vapor, n
+            dPdT = (vapor["s"][0]-liquido["s"][0])/(1/rhov-1/rhol)
+            dT = (Ps-P)/dPdT
+            T -= max(min(dT, 0.1*T), -0.1*T)
+            if abs(dT) <= 1e-13*T:
+                rhol, rhov, Ps = self._saturation(T)
+                liquido = self._flashDerivatives(rhol, T)
+                vapor = self._flashDerivatives(rhov, T)
+                return T, rhol, rhov, liquido, vapor, n
+
+    def _saturationRho(self, rho):
+        """Calculate the temperature where the density is a saturated
+        density, return None if rho is not in the two phases region at any
+        temperature"""
+        table = self._saturationTable()
+        if table:
+            Tmin, Tmax = table["T"][0], table["T"][-1]
+        else:
+            Tmin, Tmax = float(self.Tt), 0.99*float(self.Tc)
+
+        rhol, rhov, Ps = self._saturation(Tmin)
+        if not rhov < rho < rhol:
+            return None
+        if rho >= self.rhoc:
+            idx = 0
+        else:
+            idx = 1
+
+        def f(T):
+            return self._saturation(T)[idx]-rho
+
+        try:
+            return brentq(f, Tmin, Tmax)
+        except ValueError:
+            return None
+
+    def _flashT(self, T, key, value):
+        """Solve the density from temperature and other property
+
+        The enthalpy isn't monotonic along the isotherms, so a value can have
+        several solutions. The enthalpy of a compressed liquid increases
+        with pressure where Tβ < 1, so a liquid state can have a value between
+        the saturated ones, that single phase state is preferred to the two
+        phases state if its pressure is lower than 10·Pc. In other cases the solution nearest to
+        the saturated phase or to the ideal gas limit is returned. The rho0
+        kwarg, if it's defined, selects the solution nearest to it
+
+        Parameters
+        ----------
+        T : float
+            Temperature, [K]
+        key : str
+            Name of the other input property, h | s | u
+        value : float
+            Value of the input property in SI base units
+
+        Returns
+        -------
+        rho, T : float
+            Density and temperature of solution
+        n : int
+            Number of iterations
+        None if the solution is not found
+
+        Examples
+        --------
+        Round trips in compressed liquid, with enthalpy between the saturated
+        values, vapor and supercritical states
+
+        >>> from lib.mEoS import H2O, CH4
+        >>> for fluid, T, P in ((H2O, 0.7*H2O.Tc, 11e6), (H2O, 500, 1e6),
+        ...                     (H2O, 700, 3e7), (CH4, 0.7*CH4.Tc, 2e6)):
+        ...     st = fluid(T=T, P=P)
+        ...     sth = fluid(T=T, h=st.h)
+        ...     sts = fluid(T=T, s=st.s)
+        ...     stu = fluid(T=T, u=st.u)
+        ...     print("%0.6f %0.6f %0.6f" % (sth.P/P, sts.P/P, stu.P/P))
+        1.000000 1.000000 1.000000
+        1.000000 1.000000 1.000000
+        1.000000 1.000000 1.000000
+        1.000000 1.000000 1.000000
+
+        The two phases state is returned when there isn't a liquid solution
+        below 10·Pc or the initial density is nearest to it
+
+        >>> st = H2O(T=400, x=0.001)
+        >>> liq = H2O(T=400, h=st.h)
+        >>> "%0.4f %0.4f" % (liq.x, liq.P.MPa)
+        '0.0000 3.4276'
+        >>> "%0.4f" % H2O(T=400, h=st.h, rho0=st.rho).x
+        '0.0010'
+        >>> st = H2O(T=400, x=0.5)
+        >>> "%0.4f" % H2O(T=400, h=st.h, rho0=st.rho).x
+        '0.5000'
+        >>> st = CH4(T=150, x=0.5)
+        >>> "%0.4f" % CH4(T=150, h=st.h).x
+        '0.5000'
+        """
+        rhomax = self._constants["rhomax"]*self.M
+        rhomin = 1e-8*self.rhoc
+        rho0 = self.kwargs["rho0"] or None
+        n = 0
+
+        def f(rho):
+            prop = self._flashDerivatives(rho, T)[key]
+            return prop[0]-value, prop[1]
+
+        def nearest(*rhos):
+            """Choose the solution nearest to rho0, the first by default"""
+            rhos = [rho for rho in rhos if rho is not None]
+            if rho0 is None or not rhos:
+                return rhos[0] if rhos else None
+            return min(rhos, key=lambda rho: abs(log(rho/rho0)))
+
+        if self.Tt <= T < self.Tc:
+            rhol, rhov, Ps = self._saturation(T)
+            vl = self._flashDerivatives(rhol, T)[key][0]
+            vv = self._flashDerivatives(rhov, T)[key][0]
+            n += 2
+            if min(vl, vv) <= value <= max(vl, vv):
+                # Two phases region, direct calculation of quality
+                x = (value-vl)/(vv-vl)
+                rho = 1/(x/rhov+(1-x)/rhol)
+
+                # Compressed liquid with the same value, searched up to
+                # 10·Pc, the states with higher quality would need unusual
+                # pressures
+                Pmax = min(10*self.Pc, self._constants["Pmax"]*1000)
+                rhoP, i = self._rhoTP(T, Pmax, rhol)
+                n += i
+                rhoL = None
+                if rhoP is not None:
+                    fP = f(rhoP)[0]
+                    n += 1
+                    if isfinite(fP) and fP*(vl-value) < 0:
+                        rhoL, i = _newtonBracket(
+                            f, rhol, rhoP, x0=rho0, fa=vl-value, fb=fP)
+                        n += i
+                return nearest(rhoL, rho), T, n
+
+            if (value-vl)*(vv-vl) < 0:
+                lim = (rhol, rhomax)
+                rho, i = _newtonBracket(
+                    f, rhol, rhomax, x0=rho0, fa=vl-value)
+            else:
+                lim = (rhov, rhomin)
+                rho, i = _newtonBracket(
+                    f, rhomin, rhov, x0=rho0, fb=vv-value)
+        else:
+            lim = (rhomin, rhomax)
+            rho, i = _newtonBracket(f, rhomin, rhomax, x0=rho0)
+        n += i
+
+        if rho is None:
+            # The property isn't monotonic along the isotherm, so the limits
+            # can have the same sign with two solutions between them. Split
+            # the interval at the extreme of property, found as a change of
+            # sign of derivative
+            points = geomspace(lim[0], lim[1], 30)
+            bracket, i = _scanBracket(lambda rho: f(rho)[::-1], points)
+            n += i
+            if bracket:
+                a, b = bracket[:2]
+                rhoe, r = brentq(lambda rho: f(rho)[1], a, b,
+                                 full_output=True)
+                n += r.function_calls
+                fe = f(rhoe)[0]
+                n += 1
+                rhos = []
+                for limit in lim:
+                    sol, i = _newtonBracket(f, limit, rhoe, x0=rho0, fb=fe)
+                    n += i
+                    rhos.append(sol)
+                rho = nearest(*rhos)
+
+        if rho is None:
+            # Search the bracket nearest to the saturated phase or the ideal
+            # gas limit
+            bracket, i = _scanBracket(f, geomspace(lim[0], lim[1], 30))
+            n += i
+            if bracket:
+                a, b, fa, fb = bracket
+                rho, i = _newtonBracket(f, a, b, fa=fa, fb=fb)
+                n += i
+
+        if rho is not None:
+            return rho, T, n
+
+    def _flashRho(self, rho, key, value):
+        """Solve the temperature from density and other property
+
+        Parameters
+        ----------
+        rho : float
+            Density, [kg/m³]
+        key : str
+            Name of the other input property, P | h | s | u
+        value : float
+            Value of the input property in SI base units
+
+        Returns
+        -------
+        rho, T : float
+            Density and temperature of solution
+        n : int
+            Number of iterations
+        None if the solution is not found
+        """
+        Tmin = self._constants["Tmin"]
+        Tmax = self._constants["Tmax"]
+
+        def f(T):
+            prop = self._flashDerivatives(rho, T)[key]
+            return prop[0]-value, prop[2]
+
+        Td = self._saturationRho(rho)
+        if Td is None:
+            T, n = _newtonBracket(f, Tmin, Tmax)
+        else:
+            # Value in the saturation curve, single phase above it
+            vd = f(Td)[0]
+            if vd < 0:
+                T, n = _newtonBracket(f, Td, Tmax, fa=vd)
+                n += 1
+            else:
+                # Two phases region, Brent method in temperature
+                def g(T):
+                    rhol, rhov, Ps = self._saturation(T)
+                    if key == "P":
+                        return Ps-value
+                    x = (1/rho-1/rhol)/(1/rhov-1/rhol)
+                    vl = self._flashDerivatives(rhol, T)[key][0]
+                    vv = self._flashDerivatives(rhov, T)[key][0]
+                    return vl*(1-x)+vv*x-value
+
+                table = self._saturationTable()
+                if table:
+                    Tlow = table["T"][0]
+                else:
+                    Tlow = float(self.Tt)
+                try:
+                    T, r = brentq(g, Tlow, Td, xtol=1e-14*Td,
+                                  full_output=True)
+                    n = r.function_calls+1
+                except ValueError:
+                    T = None
+
+        if T is not None:
+            return rho, T, n
+
+    def _flashP(self, P, key, value):
+        """Solve the temperature and density from pressure and other property,
+        iterating in temperature along the isobar with the derivative at
+        constant pressure
+
+        Parameters
+        ----------
+        P : float
+            Pressure, [Pa]
+        key : str
+            Name of the other input property, rho | h | s | u
+        value : float
+            Value of the input property in SI base units
+
+        Returns
+        -------
+        rho, T : float
+            Density and temperature of solution
+        n : int
+            Number of iterations
+        None if the solution is not found
+        """
+        Tmin = self._constants["Tmin"]
+        Tmax = self._constants["Tmax"]
+        state = {"rho": None}
+
+        # Optional initial values of iteration, T0 and rho0 kwargs
+        T0 = self.kwargs["T0"] or None
+        rho0 = self.kwargs["rho0"] or None
+
+        def f(T):
+            rho = self._rhoTP(T, P, state["rho"])[0]
+            if rho is None:
+                return float("nan"), float("nan")
+            state["rho"] = rho
+            prop = self._flashDerivatives(rho, T)
+            drhodT = -prop["P"][2]/prop["P"][1]
+            v, dvdrho, dvdT = prop[key]
+            return v-value, dvdT+dvdrho*drhodT
+
+        n = 0
+        sat = self._saturationP(P)
+        if sat:
+            Ts, rhol, rhov, liquido, vapor, n = sat
+            vl = liquido[key][0]
+            vv = vapor[key][0]
+            if min(vl, vv) <= value <= max(vl, vv):
+                # Two phases region, direct calculation of quality
+                if key == "rho":
+                    x = (1/value-1/rhol)/(1/rhov-1/rhol)
+                else:
+                    x = (value-vl)/(vv-vl)
+                return 1/(x/rhov+(1-x)/rhol), Ts, n
+
+            if (value-vl)*(vv-vl) < 0:
+                # The liquid density can have a maximum near the triple
+                # point, so use the metastable region only if necessary
+                state["rho"] = rho0 or rhol
+                T, i = _newtonBracket(f, max(Tmin, self.Tt), Ts, x0=T0,
+                                      fb=vl-value)
+                if T is None and Tmin < self.Tt:
+                    n += i
+                    state["rho"] = rhol
+                    T, i = _newtonBracket(f, Tmin, Ts, fb=vl-value)
+            else:
+                state["rho"] = rho0 or rhov
+                T, i = _newtonBracket(f, Ts, Tmax, x0=T0, fa=vv-value)
+        else:
+            state["rho"] = rho0
+            T, i = _newtonBracket(f, Tmin, Tmax, x0=T0)
+
+        if T is not None:
+            rho = self._rhoTP(T, P, state["rho"])[0]
+            if rho is not None:
+                return rho, T, n+i
+
+    def _flashPair(self, key1, v1, key2, v2):
+        """Solve the temperature and density from two caloric properties,
+        iterating in pressure with the P flash of first property as inner
+        loop. The second property is monotonic in pressure for the pairs
+        h-s, (∂s/∂P)h = -v/T, and s-u, (∂u/∂P)s = P/(ρ·w)², the h-u pair is
+        only well defined in the liquid region
+
+        Parameters
+        ----------
+        key1, key2 : str
+            Name of properties, h-s | h-u | s-u
+        v1, v2 : float
+            Value of properties, [J/kg] or [J/kgK]
+
+        Returns
+        -------
+        rho, T : float
+            Density and temperature of solution
+        n : int
+            Number of iterations
+        None if the solution is not found
+        """
+        Pmax = self._constants["Pmax"]*1000
+        count = [0]
+
+        def f(lnP):
+            P = exp(lnP)
+            sol = self._flashP(P, key1, v1)
+            if sol is None:
+                return float("nan"), float("nan")
+            rho, T, i = sol
+            count[0] += i
+            prop = self._flashDerivatives(rho, T)
+            if self.Tt <= T < self.Tc:
+                rhol, rhov, Ps = self._saturation(T)
+                if rhov < rho < rhol:
+                    # Two phases, the derivative is only known for h-s
+                    x = (1/rho-1/rhol)/(1/rhov-1/rhol)
+                    vl = self._flashDerivatives(rhol, T)[key2][0]
+                    vv = self._flashDerivatives(rhov, T)[key2][0]
+                    if key2 == "s":
+                        df = -P/rho/T
+                    else:
+                        df = float("nan")
+                    return vl*(1-x)+vv*x-v2, df
+
+            # Derivative along the inner flash, constant key1
+            A = prop[key1]
+            Pr = prop["P"]
+            B = prop[key2]
+            det = A[1]*Pr[2]-A[2]*Pr[1]
+            df = P*(-B[1]*A[2]+B[2]*A[1])/det
+            return B[0]-v2, df
+
+        # Search the bracket from the critical pressure by decades
+        a = log(float(self.Pc))
+        fa = f(a)[0]
+        if not isfinite(fa):
+            return None
+        step = log(10) if fa > 0 else -log(10)
+        if key2 == "u":
+            step = -step
+        for i in range(15):
+            b = a+step
+            if b > log(Pmax):
+                b = log(Pmax)
+            fb = f(b)[0]
+            if not isfinite(fb):
+                return None
+            if fa*fb <= 0:
+                break
+            if b == log(Pmax):
+                return None
+            a, fa = b, fb
+        else:
+            return None
+
+        lnP, n = _newtonBracket(f, a, b, fa=fa, fb=fb)
+        if lnP is not None:
+            sol = self._flashP(exp(lnP), key1, v1)
+            if sol is not None:
+                rho, T, i = sol
+                return rho, T, n+i
+
+    @classmethod
+    def batch(cls, T, P=None, rho=None, props=("rho", "h", "s", "cp", "w"),
+              eq=0, ref=None, refvalues=None):
+        """Bulk calculation of states for arrays of input, the states are
+        calculated with the vectorized evaluation of equation of state and
+        without create the phases and the unit objects of normal instances
+
+        Parameters
+        ----------
+        T : array_like
+            Temperature, [K]
+        P : array_like, optional
+            Pressure, [Pa]
+        rho : array_like, optional
+            Density, [kg/m³]
+        props : list
+            Name of properties to calculate, availables are T, P, rho, v, x,
+            h, s, u, a, g, cp, cv, cp_cv, w, Z, alfap, betap, fi
+        eq : int
+            Index of equation of state to use
+        ref : str, optional
+            Reference state, OTO | NBP | IIR | ASHRAE | CUSTOM
+        refvalues : list, optional
+            Custom values of reference state
+
+        Returns
+        -------
+        prop : dict
+            Dict with the array of each property in SI base units, Pa, kg/m³,
+            J/kg, J/kg·K, m/s, the points without solution are filled with nan
+
+        Examples
+        --------
+        >>> from lib.mEoS import CH4
+        >>> bulk = CH4.batch(T=[300, 400], P=[1e6, 5e6], props=["rho", "h"])
+        >>> st = CH4(T=400, P=5e6)
+        >>> "%0.6f %0.3f" % (st.rho, st.h)
+        '24.597747 213536.385'
+        >>> "%0.6f %0.3f" % (bulk["rho"][1], bulk["h"][1])
+        '24.597747 213536.385'
+        """
+        st = cls(eq=eq, ref=ref, refvalues=refvalues)
+        st._setEquation()
+
+        if P is not None:
+            mode = "T-P"
+            T, P = broadcast_arrays(asarray(T, dtype=float),
+                                    asarray(P, dtype=float))
+            T = T.copy()
+            P = P.copy()
+            rho = st._solveRhoArray(T, P)
+        elif rho is not None:
+            mode = "T-rho"
+            T, rho = broadcast_arrays(asarray(T, dtype=float),
+                                      asarray(rho, dtype=float))
+            T = T.copy()
+            rho = rho.copy()
+        else:
+            raise ValueError("batch needs P or rho as second input")
+
+        valid = (st._constants["Tmin"] <= T) & (T <= st._constants["Tmax"]) \
+            & (rho > 0)
+        rho[~valid] = float("nan")
+
+        x = ones(T.shape)
+        if mode == "T-P":
+            # Liquid phase below the saturation pressure of ancillary equation
+            for i in nonzero((T < st.Tc) & valid)[0]:
+                if P.flat[i] > st._Vapor_Pressure(T.flat[i]):
+                    x.flat[i] = 0
+
+        propiedades = st._eqArray(rho, T)
+        if mode == "T-rho":
+            P = propiedades["P"]
+
+        R = float(st.R)
+        h = propiedades["h"]*1000
+        s = propiedades["s"]*1000
+        v = 1/rho
+        prop = {"T": T, "P": P, "rho": rho, "v": v, "h": h, "s": s,
+                "cp": propiedades["cp"]*1000, "cv": propiedades["cv"]*1000,
+                "w": propiedades["w"], "alfap": propiedades["alfap"],
+                "betap": propiedades["betap"], "fi": propiedades["fugacity"]}
+
+        if mode == "T-rho":
+            # Density input, the points in the saturation dome are
+            # calculated with the saturation densities
+            for i in nonzero((T < st.Tc) & valid)[0]:
+                t = T.flat[i]
+                r = rho.flat[i]
+                if not st._Liquid_Density(t) > r > st._Vapor_Density(t):
+                    if r >= st._Liquid_Density(t):
+                        x.flat[i] = 0
+                    continue
+                rhol, rhov, Ps = st._saturation(t)
+                xi = (1/r-1/rhol)/(1/rhov-1/rhol)
+                xi = min(max(xi, 0), 1)
+                liquido = st._eq(rhol, t)
+                vapor = st._eq(rhov, t)
+                x.flat[i] = xi
+                P.flat[i] = Ps
+                h.flat[i] = (xi*vapor["h"]+(1-xi)*liquido["h"])*1000
+                s.flat[i] = (xi*vapor["s"]+(1-xi)*liquido["s"])*1000
+                for key in ("cp", "cv", "w", "alfap", "betap", "fi"):
+                    prop[key].flat[i] = float("nan")
+
+        prop["x"] = x
+        prop["u"] = h-P*v
+        prop["a"] = prop["u"]-T*s
+        prop["g"] = h-T*s
+        prop["cp_cv"] = prop["cp"]/prop["cv"]
+        prop["Z"] = P*v/R/T
+        return {key: prop[key] for key in props}
+
+    def _solveRhoArray(self, T, P):
+        """Calculate the density for arrays of temperature and pressure, using
+        a vectorized Newton iteration with the initial values of calculo, the
+        points without convergence are solved point by point with fsolve"""
+        rho = P/T/self.R
+        rhomax = self._constants["rhomax"]*self.M
+        for i, (t, p) in enumerate(zip(T.flat, P.flat)):
+            if t < 0.99*self.Tc and self._Vapor_Pressure(t) < p:
+                rho.flat[i] = self._Liquid_Density(t)
+            elif t < 0.99*self.Tc:
+                rho.flat[i] = self._Vapor_Density(t)
+            elif t > 2*self.Tc or p > 2*self.Pc:
+                rho.flat[i] = rhomax
+            elif 0.99*self.Tc <= t < self.Tc and self.Pc*0.9 < p < self.Pc:
+                rho.flat[i] = self.rhoc
+
+        todo = ones(T.shape, dtype=bool)
+        if self._eq == self._Helmholtz:
+            R = float(self.R)
+            tau = self.Tc/T
+            for it in range(50):
+                idx = nonzero(todo)
+                if not idx[0].size:
+                    break
+                r = rho[idx]
+                t = T[idx]
+                delta = r/self.rhoc
+                fir, firt, firtt, fird, firdd = self._phirArray(
+                    tau[idx], delta)[:5]
+                f = (1+delta*fird)*R*t*r-P[idx]
+                df = R*t*(1+2*delta*fird+delta**2*firdd)
+                with errstate(all="ignore"):
+                    step = f/df
+                    new = r-step
+                    new = where(new > 0, new, r/2)
+                    new = where(df > 0, new, float("nan"))
+                rho[idx] = new
+                todo[idx] = abs(step) > 1e-12*abs(new)
+
+        # Fallback to the point by point calculation of calculo
+        for i in nonzero(todo.ravel() | ~isfinite(rho.ravel()))[0]:
+            t = T.flat[i]
+            p = P.flat[i]
+            r0 = rho.flat[i] if isfinite(rho.flat[i]) else p/t/self.R
+            rinput = fsolve(lambda r: self._eq(r, t)["P"]-p, r0,
+                            full_output=True)
+            if rinput[2] == 1 and \
+                    abs(self._eq(rinput[0][0], t)["P"]-p) < 1e-6*p:
+                rho.flat[i] = rinput[0][0]
+            else:
+                rho.flat[i] = float("nan")
+        return rho
+
     def fill(self, fase, estado):
-        """Fill phase properties"""
+        """Fill phase properties, in lazy mode only the basic properties are
+        calculated and the others groups are deferred to the first access
+
+        Examples
+        --------
+        >>> from lib.mEoS import CH4
+        >>> st = CH4(T=300, P=1e6, lazy=True)
+        >>> "mu" in st.Gas.__dict__
+        False
+        >>> "%0.4f" % st.Gas.mu.muPas
+        '11.2521'
+
+        The transport group is calculated together in the first access
+
+        >>> "k" in st.Gas.__dict__, "epsilon" in st.Gas.__dict__
+        (True, False)
+        """
         fase._bool = True
         fase.M = unidades.Dimensionless(self.M)
         fase.v = unidades.SpecificVolume(estado["v"])
@@ -881,7 +1793,34 @@ class MEoS(ThermoAdvanced):
         fase.gamma = fase.cp_cv
 #        fase.cps = estado["cps"]
         fase.w = unidades.Speed(estado["w"])
+        fase.fraccion = [1]
+        fase.fraccion_masica = [1]
 
+        for function, keys in (
+                (self._fillMolar, self._lazyMolar),
+                (self._fillDerivatives, self._lazyDerivatives),
+                (self._fillTransport, self._lazyTransport),
+                (self._fillDielectric, ("epsilon", ))):
+            if self.kwargs["lazy"]:
+                fase._setLazy(keys, function, fase, estado)
+            else:
+                function(fase, estado)
+
+    # Properties calculated by the fill procedures, deferred in lazy mode
+    _lazyMolar = ("rhoM", "hM", "sM", "uM", "aM", "gM", "cvM", "cpM")
+    _lazyDerivatives = (
+        "alfap", "betap", "joule", "Gruneisen", "alfav", "kappa", "kappas",
+        "betas", "kt", "ks", "Ks", "Kt", "dhdT_rho", "dhdT_P", "dhdP_T",
+        "deltat", "dhdP_rho", "dhdrho_T", "dhdrho_P", "dpdT_rho", "dpdrho_T",
+        "drhodP_T", "drhodT_P", "Z_rho", "IntP", "hInput", "virialB",
+        "virialC", "invT")
+    _lazyTransport = ("mu", "k", "nu", "alfa", "Prandt")
+    _lazyIdeal = (
+        "v0", "rho0", "rhoM0", "h0", "hM0", "u0", "uM0", "s0", "sM0", "a0",
+        "aM0", "g0", "gM0", "cp0", "cpM0", "cv0", "cvM0", "cp0_cv", "gamma0")
+
+    def _fillMolar(self, fase, estado):
+        """Fill the molar properties of phase"""
         fase.rhoM = unidades.MolarDensity(fase.rho/self.M)
         fase.hM = unidades.MolarEnthalpy(fase.h*self.M)
         fase.sM = unidades.MolarSpecificHeat(fase.s*self.M)
@@ -891,6 +1830,9 @@ class MEoS(ThermoAdvanced):
         fase.cvM = unidades.MolarSpecificHeat(fase.cv*self.M)
         fase.cpM = unidades.MolarSpecificHeat(fase.cp*self.M)
 
+    def _fillDerivatives(self, fase, estado):
+        """Fill the thermodynamic derivatives and virial coefficients of
+        phase"""
         fase.alfap = unidades.InvTemperature(estado["alfap"])
         fase.betap = unidades.Density(estado["betap"])
         fase.joule = unidades.TemperaturePressure(
@@ -944,6 +1886,8 @@ class MEoS(ThermoAdvanced):
                 estado["C"]/self.rhoc**2)
             fase.invT = unidades.InvTemperature(-1/self.T)
 
+    def _fillTransport(self, fase, estado):
+        """Fill the transport properties of phase"""
         fase.mu = self._Viscosity(fase.rho, self.T, fase)
         fase.k = self._ThCond(fase.rho, self.T, fase)
         if fase.mu and fase.rho:
@@ -958,16 +1902,67 @@ class MEoS(ThermoAdvanced):
             fase.Prandt = unidades.Dimensionless(fase.mu*fase.cp/fase.k)
         else:
             fase.Prandt = unidades.Dimensionless(None)
+
+    def _fillDielectric(self, fase, estado):
+        """Fill the dielectric constant of phase"""
         fase.epsilon = unidades.Dimensionless(
             self._Dielectric(fase.rho, self.T))
-        fase.fraccion = [1]
-        fase.fraccion_masica = [1]
+
+    def _fillIdeal(self, rho):
+        """Fill the ideal gas properties of state"""
+        cp0 = self._prop0(rho, self.T)
+        self.v0 = unidades.SpecificVolume(cp0["v"])
+        self.rho0 = unidades.Density(1./self.v0)
+        self.rhoM0 = unidades.MolarDensity(self.rho0/self.M)
+        self.h0 = unidades.Enthalpy(cp0["h"])
+        self.hM0 = unidades.MolarEnthalpy(self.h0/self.M)
+        self.u0 = unidades.Enthalpy(self.h0-self.P*self.v0)
+        self.uM0 = unidades.MolarEnthalpy(self.u0/self.M)
+        self.s0 = unidades.SpecificHeat(cp0["s"])
+        self.sM0 = unidades.MolarSpecificHeat(self.s0/self.M)
+        self.a0 = unidades.Enthalpy(self.u0-self.T*self.s0)
+        self.aM0 = unidades.MolarEnthalpy(self.a0/self.M)
+        self.g0 = unidades.Enthalpy(self.h0-self.T*self.s0)
+        self.gM0 = unidades.MolarEnthalpy(self.g0/self.M)
+        self.cp0 = unidades.SpecificHeat(cp0["cp"])
+        self.cpM0 = unidades.MolarSpecificHeat(self.cp0/self.M)
+        self.cv0 = unidades.SpecificHeat(cp0["cv"])
+        self.cvM0 = unidades.MolarSpecificHeat(self.cv0/self.M)
+        self.cp0_cv = unidades.Dimensionless(self.cp0/self.cv0)
+        self.gamma0 = self.cp0_cv
+
+    def _fillSurface(self, x, T):
+        """Fill the surface tension of state"""
+        if x < 1 and self.Tt <= T <= self.Tc:
+            self.sigma = unidades.Tension(self._Surface())
+        else:
+            self.sigma = unidades.Tension(None)
 
     def _saturation(self, T=None):
         """Saturation calculation for two phase search"""
         if not T:
             T = self.T
         T = float(T)
+
+        table = self._saturationTable()
+        if table and table["T"][0] <= T <= table["T"][-1]:
+            # Newton polishing of interpolated values from saturation table
+            rhoL, rhoG, conv = self._saturationNewton(
+                T, table["rhoL"](T), table["rhoG"](T))
+            if conv[0]:
+                rhoL = float(rhoL[0])
+                rhoG = float(rhoG[0])
+                deltaL = rhoL/self.rhoc
+                deltaG = rhoG/self.rhoc
+                firL, firG = self._phirArray(self.Tc/T, [deltaL, deltaG])[0]
+                Ps = self.R*T*rhoL*rhoG/(rhoL-rhoG)*(
+                    firL-firG+log(deltaL/deltaG))
+                return rhoL, rhoG, Ps
+        return self._saturationAncillary(T)
+
+    def _saturationAncillary(self, T):
+        """Saturation calculation with initial values from ancillary
+        equations"""
         rhoLo = self._Liquid_Density(T)
         rhoGo = self._Vapor_Density(T)
 
@@ -994,6 +1989,165 @@ class MEoS(ThermoAdvanced):
             Ps = self.R*T*rhoL*rhoG/(rhoL-rhoG)*(liquido["fir"]-vapor["fir"]+log(deltaL/deltaG))
         return rhoL, rhoG, Ps
 
+    def _saturationNewton(self, T, rhoL, rhoG):
+        """Solve the Maxwell criterion with a vectorized Newton iteration
+        using the analytic derivatives of residual Helmholtz energy
+
+        Parameters
+        ----------
+        T : array
+            Temperature, [K]
+        rhoL : array
+            Initial value of saturated liquid density, [kg/m³]
+        rhoG : array
+            Initial value of saturated gas density, [kg/m³]
+
+        Returns
+        -------
+        rhoL, rhoG : array
+            Saturated liquid and gas densities, [kg/m³]
+        converge : array
+            Boolean array with the points with a non trivial solution
+        """
+        tau = self.Tc/atleast_1d(asarray(T, dtype=float))
+        dl = atleast_1d(asarray(rhoL, dtype=float))/self.rhoc
+        dg = atleast_1d(asarray(rhoG, dtype=float))/self.rhoc
+        # Discard unphysical initial values, the log of scipy would return a
+        # complex array
+        dl = where(dl > 0, dl, float("nan"))
+        dg = where(dg > 0, dg, float("nan"))
+        n = len(tau)
+        converge = ones(n, dtype=bool)
+        with errstate(all="ignore"):
+            for it in range(50):
+                fir, firt, firtt, fird, firdd = self._phirArray(
+                    concatenate([tau, tau]), concatenate([dl, dg]))[:5]
+                fl, fg = fir[:n], fir[n:]
+                fdl, fdg = fird[:n], fird[n:]
+                fddl, fddg = firdd[:n], firdd[n:]
+
+                F1 = dg*fdg+fg+log(dg)-dl*fdl-fl-log(dl)
+                F2 = dg*(1+dg*fdg)-dl*(1+dl*fdl)
+                a = -(2*fdl+dl*fddl+1/dl)
+                b = 2*fdg+dg*fddg+1/dg
+                c = -(1+2*dl*fdl+dl**2*fddl)
+                d = 1+2*dg*fdg+dg**2*fddg
+                det = a*d-b*c
+                xl = -(d*F1-b*F2)/det
+                xg = -(a*F2-c*F1)/det
+
+                # Limit the relative step to avoid divergence from poor
+                # initial values
+                xl = dl*clip(xl/dl, -0.5, 0.5)
+                xg = dg*clip(xg/dg, -0.9, 2)
+                dl = dl+xl
+                dg = dg+xg
+                if (abs(xl) <= 1e-12*dl).all() and (abs(xg) <= 1e-12*dg).all():
+                    break
+
+            converge = (abs(xl) <= 1e-10*dl) & (abs(xg) <= 1e-10*dg) & \
+                (dl > dg*(1+1e-6)) & isfinite(dl) & isfinite(dg)
+        return dl*self.rhoc, dg*self.rhoc, converge
+
+    def _saturationTable(self):
+        """Return the saturation table of fluid for the configured equation,
+        with the monotone spline interpolation of saturated densities and
+        vapor pressure, the table is calculated the first time and saved in
+        the user config folder to use in later sessions, the saved table is
+        recalculated if the equation coefficients change
+
+        Only available for helmholtz equations, return None in other case"""
+        if not self._cacheSaturation or self._eq != self._Helmholtz:
+            return None
+        for i, eq in enumerate(self.eq):
+            if eq is self._constants:
+                break
+        else:
+            return None
+
+        name = "%s-%i" % (self.__class__.__name__, i)
+        if name in _saturationTables:
+            return _saturationTables[name]
+
+        key = _hashConstants(self._constants)
+        filename = os.path.join(conf_dir, "meos", name+".json")
+        data = None
+        try:
+            with open(filename) as archivo:
+                data = json.load(archivo)
+            if data.get("hash") != key:
+                data = None
+        except (OSError, ValueError):
+            pass
+
+        if data is None:
+            data = self._buildSaturationTable()
+            data["hash"] = key
+            try:
+                if not os.path.isdir(os.path.dirname(filename)):
+                    os.makedirs(os.path.dirname(filename))
+                with open(filename, "w") as archivo:
+                    json.dump(data, archivo)
+            except OSError:
+                pass
+
+        if len(data["T"]) < 2:
+            table = None
+        else:
+            table = {"T": data["T"],
+                     "rhoL": PchipInterpolator(data["T"], data["rhoL"]),
+                     "rhoG": PchipInterpolator(data["T"], data["rhoG"]),
+                     "Ps": PchipInterpolator(data["T"], log(data["Ps"])),
+                     "T_Ps": PchipInterpolator(log(data["Ps"]), data["T"])}
+        _saturationTables[name] = table
+        return table
+
+    def _buildSaturationTable(self):
+        """Calculate the saturation properties from triple point to near the
+        critical point, with a denser grid near the critical point"""
+        Tc = float(self.Tc)
+        Tmin = max(float(self.Tt), self._constants["Tmin"])
+        u = linspace(0, 1, self._nSaturation)
+        T = Tc-(Tc-Tmin)*(1-u)**2
+        T = T[T < Tc*(1-1e-5)]
+
+        rhoL = array([self._Liquid_Density(t) for t in T], dtype=float)
+        rhoG = array([self._Vapor_Density(t) for t in T], dtype=float)
+        rhoL, rhoG, converge = self._saturationNewton(T, rhoL, rhoG)
+
+        # Use the slower fsolve procedure for points without convergence
+        # and polish the values obtained
+        idx = nonzero(~converge)[0]
+        if idx.size:
+            for i in idx:
+                rl, rg = self._saturationAncillary(T[i])[:2]
+                rhoL[i], rhoG[i] = rl.real, rg.real
+            rhoL[idx], rhoG[idx], converge[idx] = self._saturationNewton(
+                T[idx], rhoL[idx], rhoG[idx])
+
+        T, rhoL, rhoG = T[converge], rhoL[converge], rhoG[converge]
+        deltaL = rhoL/self.rhoc
+        deltaG = rhoG/self.rhoc
+        fir = self._phirArray(concatenate([Tc/T, Tc/T]),
+                              concatenate([deltaL, deltaG]))[0]
+        n = len(T)
+        Ps = float(self.R)*T*rhoL*rhoG/(rhoL-rhoG)*(
+            fir[:n]-fir[n:]+log(deltaL/deltaG))
+
+        # Discard non monotone points, spurious roots near the critical point
+        valid = Ps > 0
+        for i in range(1, n):
+            j = nonzero(valid[:i])[0]
+            if j.size and (Ps[i] <= Ps[j[-1]] or rhoL[i] >= rhoL[j[-1]] or
+                           rhoG[i] <= rhoG[j[-1]]):
+                valid[i] = False
+
+        return {"T": T[valid].tolist(),
+                "rhoL": rhoL[valid].tolist(),
+                "rhoG": rhoG[valid].tolist(),
+                "Ps": Ps[valid].tolist()}
+
+    @_memoize
     def _Helmholtz(self, rho, T):
         """Implementación general de la ecuación de estado Setzmann-Wagner, ecuación de estado de multiparámetros basada en la energía libre de Helmholtz"""
         delta = rho/self.rhoc
@@ -1042,6 +2196,70 @@ class MEoS(ThermoAdvanced):
         return propiedades
 
 
+    def _HelmholtzArray(self, rho, T):
+        """Vectorized version of _Helmholtz, evaluate the equation of state
+        for arrays of density and temperature, return a dict with the same
+        keys and units than _Helmholtz"""
+        rho, T = broadcast_arrays(asarray(rho, dtype=float),
+                                  asarray(T, dtype=float))
+        delta = rho/self.rhoc
+        tau = self.Tc/T
+
+        fio, fiot, fiott, fiod, fiodd, fiodt = self._phi0Array(
+            self._constants["cp"], tau, delta)
+        fir, firt, firtt, fird, firdd, firdt, firdtt, B, C = \
+            self._phirArray(tau, delta)
+
+        R = float(self.R)
+        Rk = self.R.kJkgK
+        propiedades = {}
+        propiedades["fir"] = fir
+        propiedades["fird"] = fird
+        propiedades["firdd"] = firdd
+
+        propiedades["T"] = T
+        propiedades["P"] = (1+delta*fird)*R*T*rho
+        with errstate(divide="ignore"):
+            propiedades["v"] = 1./rho
+
+        propiedades["h"] = Rk*T*(1+tau*(fiot+firt)+delta*fird)
+        propiedades["s"] = Rk*(tau*(fiot+firt)-fio-fir)
+        propiedades["cv"] = -Rk*tau**2*(fiott+firtt)
+        propiedades["cp"] = Rk*(-tau**2*(fiott+firtt) +
+            (1+delta*fird-delta*tau*firdt)**2/(1+2*delta*fird+delta**2*firdd))
+        propiedades["w"] = abs(R*T*(1+2*delta*fird+delta**2*firdd -
+            (1+delta*fird-delta*tau*firdt)**2/tau**2/(fiott+firtt)))**0.5
+        propiedades["alfap"] = (1-delta*tau*firdt/(1+delta*fird))/T
+        propiedades["betap"] = rho*(1+(delta*fird+delta**2*firdd)/(1+delta*fird))
+        propiedades["fugacity"] = exp(fir+delta*fird-log(1+delta*fird))
+        propiedades["B"] = B
+        propiedades["C"] = C
+        propiedades["dpdrho"] = R*T*(1+2*delta*fird+delta**2*firdd)
+        propiedades["drhodt"] = -rho*(1+delta*fird-delta*tau*firdt) / \
+            (T*(1+2*delta*fird+delta**2*firdd))
+        with errstate(divide="ignore", invalid="ignore"):
+            propiedades["dhdrho"] = where(rho > 0, R*T/rho *
+                (tau*delta*(fiodt+firdt)+delta*fird+delta**2*firdd), 0)
+        return propiedades
+
+    def _eqArray(self, rho, T):
+        """Evaluate the configured equation of state for arrays of density
+        and temperature, use the vectorized Helmholtz evaluation when
+        available and a point by point evaluation in other case"""
+        if self._eq == self._Helmholtz:
+            return self._HelmholtzArray(rho, T)
+
+        rho, T = broadcast_arrays(asarray(rho, dtype=float),
+                                  asarray(T, dtype=float))
+        states = [self._eq(r, t) for r, t in zip(rho.flat, T.flat)]
+        propiedades = {}
+        for key in ("T", "P", "v", "h", "s", "cv", "cp", "w", "alfap",
+                    "betap", "fugacity", "B", "C"):
+            propiedades[key] = array(
+                [st[key] for st in states], dtype=float).reshape(rho.shape)
+        return propiedades
+
+    @_memoize
     def _ECS(self,  rho, T):
         delta = rho/self.rhoc
         tau = self.Tc/T
@@ -1093,6 +2311,7 @@ class MEoS(ThermoAdvanced):
 #        propiedades["cps"]=propiedades["cv"] Add cps from Argon pag.27
         return propiedades
 
+    @_memoize
     def _MBWR(self, rho, T):
         """Multimaparameter euation of state of Benedict-Webb-Rubin"""
         rho = rho/self.M
@@ -1231,6 +2450,7 @@ class MEoS(ThermoAdvanced):
         propiedades["fird"] = fird
         return propiedades
 
+    @_memoize
     def _PengRobinson(self, rho, T):
         """Peng, D.-Y.; Robinson, D.B. A New Two-Constant Equation of State. I&EC Fundam. 1976, 15(1), 59
         Peneloux, A.; Rauzy, E.; Freze, R. A consistent correction for Redlich-Kwong-Soave volumes. Fluid Phase Eq. 1982, 8, 7.
@@ -1540,6 +2760,31 @@ class MEoS(ThermoAdvanced):
             fio *= factor
         return fio, factor*fiot, factor*fiott, fiod, fiodd, fiodt
 
+    def _phi0Array(self, cp, tau, delta):
+        """Vectorized version of _phi0 for arrays of tau and delta"""
+        fio, fiot, fiott = self._phi0(cp, tau, 0)[:3]
+        if "ao_log" in cp:
+            Fi0 = cp
+        else:
+            Fi0 = self._PHIO(cp)
+        factor = cp.get("R", self._constants["R"])/self._constants["R"]
+
+        with errstate(all="ignore"):
+            logdelta = where(delta > 0, log(delta), 0)
+            invdelta = where(delta > 0, 1/delta, 0)
+            fiod = invdelta
+            fiodd = -invdelta**2
+            fiodt = 0*invdelta
+            if "tau*logdelta" in Fi0:
+                c = Fi0["tau*logdelta"]
+                fio = fio+factor*c*tau*logdelta
+                fiot = fiot+factor*c*logdelta
+                fiod = fiod+c*tau*invdelta
+                fiodd = fiodd-c*tau*invdelta**2
+                fiodt = c*invdelta
+            fio = fio+Fi0["ao_log"][0]*logdelta
+        return fio, fiot, fiott, fiod, fiodd, fiodt
+
     def _Cp0(self, T=False):
         Tc = self._constants.get("Tref", self.Tc)
         if not T:
@@ -1838,6 +3083,253 @@ class MEoS(ThermoAdvanced):
 
         return fir, firt, firtt, fird, firdd, firdt, firdtt, B, C
 
+    def _phirArray(self, tau, delta):
+        """Vectorized version of _phir, evaluate the residual part of
+        helmholtz free energy for arrays of reduced temperature and density
+
+        Parameters
+        ----------
+        tau : array_like
+            Inverse reduced temperature, Tc/T
+        delta : array_like
+            Reduced density, rho/rhoc
+
+        Returns
+        -------
+        fir, firt, firtt, fird, firdd, firdt, firdtt, B, C : ndarray
+            Residual helmholtz free energy and its derivatives with the
+            broadcasted shape of input, same order as _phir
+
+        Examples
+        --------
+        >>> from lib.mEoS import CH4
+        >>> st = CH4(T=300, P=1e6)
+        >>> fir = st._phirArray([2, 1.5, 1.2], [0.5, 1, 1.5])
+        >>> scalar = [st._phir(t, d) for t, d in [(2, 0.5), (1.5, 1), (1.2, 1.5)]]
+        >>> all(abs(v-s[i]) <= 1e-12*abs(s[i]) for i, val in enumerate(fir)
+        ...     for v, s in zip(val, scalar))
+        True
+        """
+        tau, delta = broadcast_arrays(asarray(tau, dtype=float),
+                                      asarray(delta, dtype=float))
+        zero = delta == 0
+        # Avoid spurious infinites in the null density points, the masked
+        # values are restored to zero at the end like in _phir
+        delta = where(zero, 1., delta)
+        coef = _compilePhir(self._constants)
+        delta_0 = 1e-200
+
+        ta = tau[..., None]
+        de = delta[..., None]
+
+        with errstate(all="ignore"):
+            # Polinomial terms
+            n, d, t = coef["pol"]
+            dd = de**d
+            tt = ta**t
+            fir = (n*dd*tt).sum(-1)
+            fird = (n*d*de**(d-1)*tt).sum(-1)
+            firdd = (n*d*(d-1)*de**(d-2)*tt).sum(-1)
+            firt = (n*t*dd*ta**(t-1)).sum(-1)
+            firtt = (n*t*(t-1)*dd*ta**(t-2)).sum(-1)
+            firdt = (n*t*d*de**(d-1)*ta**(t-1)).sum(-1)
+            firdtt = (n*t*d*(t-1)*de**(d-1)*ta**(t-2)).sum(-1)
+            B = (n*coef["polB"]*tt).sum(-1)
+            C = (n*coef["polC"]*tt).sum(-1)
+
+            # Exponential terms
+            n, d, g, t, c = coef["exp"]
+            dc = de**c
+            E = exp(-g*dc)
+            dd = de**d
+            tt = ta**t
+            fir += (n*dd*tt*E).sum(-1)
+            fird += (n*E*de**(d-1)*tt*(d-g*c*dc)).sum(-1)
+            firdd += (n*E*de**(d-2)*tt *
+                      ((d-g*c*dc)*(d-1-g*c*dc)-g**2*c**2*dc)).sum(-1)
+            firt += (n*t*dd*ta**(t-1)*E).sum(-1)
+            firtt += (n*t*(t-1)*dd*ta**(t-2)*E).sum(-1)
+            firdt += (n*t*de**(d-1)*ta**(t-1)*(d-g*c*dc)*E).sum(-1)
+            firdtt += (n*t*(t-1)*de**(d-1)*ta**(t-2)*(d-g*c*dc)*E).sum(-1)
+            B += (n*coef["expB"]*tt).sum(-1)
+            C += (n*coef["expC"]*tt).sum(-1)
+
+            # Gaussian terms
+            n, d, t, a, e, b, g, ex1, ex2 = coef["gauss"]
+            Ex = exp(-a*(de-e)**ex1-b*(ta-g)**ex2)
+            fi = n*de**d*ta**t*Ex
+            Ft = t/ta-2*b*(ta-g)
+            Ftt = Ft**ex2-t/ta**2-2*b
+            Fd = d/de-2*a*(de-e)
+            fir += fi.sum(-1)
+            fird += (fi*(d/de-ex1*a*(de-e)**(ex1-1))).sum(-1)
+            firdd += (n*ta**t*Ex*(-2*a*de**d+4*a**2*de**d*(de-e)**ex1 -
+                      4*d*a*de**(d-1)*(de-e)+d*(d-1)*de**(d-2))).sum(-1)
+            firt += (fi*Ft).sum(-1)
+            firtt += (fi*Ftt).sum(-1)
+            firdt += (fi*Ft*Fd).sum(-1)
+            firdtt += (fi*Ftt*Fd).sum(-1)
+            Ex0 = exp(-a*(delta_0-e)**ex1-b*(ta-g)**ex2)
+            B += (n*delta_0**d*ta**t*Ex0*(d/delta_0-2*a*(delta_0-e))).sum(-1)
+            C += (n*ta**t*Ex0*(-2*a*delta_0**d+4*a**2*delta_0**d *
+                  (delta_0-e)**ex1-4*d*a*delta_0**2*(delta_0-e) +
+                  d*2*delta_0)).sum(-1)
+
+            # Non analitic terms
+            n, a4, b, A, Bi, Ci, D, bt = coef["nonanalytic"]
+            if len(n):
+                one = de == 1
+                dm = de-1
+                sq = where(one, 1., dm**2)
+                Tita = (1-ta)+A*where(one, 0., sq**(0.5/bt))
+                F = exp(-Ci*dm**2-D*(ta-1)**2)
+                Fd = -2*Ci*F*dm
+                Fdd = 2*Ci*F*(2*Ci*dm**2-1)
+                Ft = -2*D*F*(ta-1)
+                Ftt = 2*D*F*(2*D*(ta-1)**2-1)
+                Fdt = 4*Ci*D*F*dm*(ta-1)
+                Fdtt = 4*Ci*D*F*dm*(2*D*(ta-1)**2-1)
+
+                Delta = Tita**2+Bi*where(one, 0., sq**a4)
+                Deltad = dm*(A*Tita*2/bt*sq**(0.5/bt-1)+2*Bi*a4*sq**(a4-1))
+                Deltadd = Deltad/dm+dm**2*(
+                    4*Bi*a4*(a4-1)*sq**(a4-2)+2*A**2/bt**2*(sq**(0.5/bt-1))**2 +
+                    A*Tita*4/bt*(0.5/bt-1)*sq**(0.5/bt-2))
+                DeltaB = Delta**b
+                DeltaBd = b*Delta**(b-1)*Deltad
+                DeltaBdd = b*(Delta**(b-1)*Deltadd +
+                              (b-1)*Delta**(b-2)*Deltad**2)
+                DeltaBt = -2*Tita*b*Delta**(b-1)
+                DeltaBtt = 2*b*Delta**(b-1)+4*Tita**2*b*(b-1)*Delta**(b-2)
+                DeltaBdt = -A*b*2/bt*Delta**(b-1)*dm*sq**(0.5/bt-1) - \
+                    2*Tita*b*(b-1)*Delta**(b-2)*Deltad
+                DeltaBdtt = 2*b*(b-1)*Delta**(b-2)*(
+                    Deltad*(1+2*Tita**2*(b-2)/Delta) +
+                    4*Tita*A*dm/bt*sq**(0.5/bt-1))
+
+                # The derivatives of distance function are not defined at
+                # the critical density, use the same values than _phir
+                Deltad = where(one, 0., Deltad)
+                Deltadd = where(one, 0., Deltadd)
+                DeltaBd = where(one, 0., DeltaBd)
+                DeltaBdd = where(one, 0., DeltaBdd)
+                DeltaBt = where(one, 0., DeltaBt)
+                DeltaBtt = where(one, 0., DeltaBtt)
+                DeltaBdt = where(one, 0., DeltaBdt)
+                DeltaBdtt = where(one, 0., DeltaBdtt)
+
+                fir += (n*DeltaB*de*F).sum(-1)
+                fird += (n*(DeltaB*(F+de*Fd)+DeltaBd*de*F)).sum(-1)
+                firdd += (n*(DeltaB*(2*Fd+de*Fdd)+2*DeltaBd*(F+de*Fd) +
+                             DeltaBdd*de*F)).sum(-1)
+                firt += (n*de*(DeltaBt*F+DeltaB*Ft)).sum(-1)
+                firtt += (n*de*(DeltaBtt*F+2*DeltaBt*Ft+DeltaB*Ftt)).sum(-1)
+                firdt += (n*(DeltaB*(Ft+de*Fdt)+de*DeltaBd*Ft +
+                             DeltaBt*(F+de*Fd)+DeltaBdt*de*F)).sum(-1)
+                firdtt += (n*((DeltaBtt*F+2*DeltaBt*Ft+DeltaB*Ftt) +
+                              de*(DeltaBdtt*F+DeltaBtt*Fd+2*DeltaBdt*Ft +
+                                  2*DeltaBt*Fdt+DeltaBt*Ftt+DeltaB*Fdtt))
+                           ).sum(-1)
+
+                dm_ = delta_0-1
+                Tita_ = (1-ta)+A*(dm_**2)**(0.5/bt)
+                Delta_ = Tita_**2+Bi*(dm_**2)**a4
+                Deltad_ = dm_*(A*Tita_*2/bt*(dm_**2)**(0.5/bt-1) +
+                               2*Bi*a4*(dm_**2)**(a4-1))
+                Deltadd_ = Deltad_/dm_+dm_**2*(
+                    4*Bi*a4*(a4-1)*(dm_**2)**(a4-2)+2*A**2/bt**2 *
+                    ((dm_**2)**(0.5/bt-1))**2+A*Tita_*4/bt*(0.5/bt-1) *
+                    (dm_**2)**(0.5/bt-2))
+                DeltaBd_ = b*Delta_**(b-1)*Deltad_
+                DeltaBdd_ = b*(Delta_**(b-1)*Deltadd_ +
+                               (b-1)*Delta_**(b-2)*Deltad_**2)
+                F_ = exp(-Ci*dm_**2-D*(ta-1)**2)
+                Fd_ = -2*Ci*F_*dm_
+                Fdd_ = 2*Ci*F_*(2*Ci*dm_**2-1)
+
+                B += (n*(Delta_**b*(F_+delta_0*Fd_) +
+                         DeltaBd_*delta_0*F_)).sum(-1)
+                C += (n*(Delta_**b*(2*Fd_+delta_0*Fdd_) +
+                         2*DeltaBd_*(F_+delta_0*Fd_) +
+                         DeltaBdd_*delta_0*F_)).sum(-1)
+
+            # Hard sphere term
+            if self._constants.get("Fi", None):
+                f = self._constants["Fi"]
+                n = 0.1617
+                a = 0.689
+                g = 0.3674
+                X = n*delta/(a+(1-a)/tau**g)
+                Xd = n/(a+(1-a)/tau**g)
+                Xt = n*delta*(1-a)*g/tau**(g+1)/(a+(1-a)/tau**g)**2
+                Xdt = n*(1-a)*g/tau**(g+1)/(a+(1-a)/tau**g)**2
+                Xtt = -n*delta*((1-a)*g/tau**(g+2)*(
+                    (g+1)*(a+(1-a)/tau**g)-2*g*(1-a)/tau**g)) / \
+                    (a+(1-a)/tau**g)**3
+                Xdtt = -n*((1-a)*g/tau**(g+2)*(
+                    (g+1)*(a+(1-a)/tau**g)-2*g*(1-a)/tau**g)) / \
+                    (a+(1-a)/tau**g)**3
+
+                ahdX = -(f**2-1)/(1-X)+(f**2+3*f+X*(f**2-3*f))/(1-X)**3
+                ahdXX = -(f**2-1)/(1-X)**2 + \
+                    (3*(f**2+3*f)+(f**2-3*f)*(1+2*X))/(1-X)**4
+                ahdXXX = -2*(f**2-1)/(1-X)**3 + \
+                    6*(2*(f**2+3*f)+(f**2-3*f)*(1+X))/(1-X)**5
+
+                fir += (f**2-1)*log(1-X)+((f**2+3*f)*X-3*f*X**2)/(1-X)**2
+                fird += ahdX*Xd
+                firdd += ahdXX*Xd**2
+                firt += ahdX*Xt
+                firtt += ahdXX*Xt**2+ahdX*Xtt
+                firdt += ahdXX*Xt*Xd+ahdX*Xdt
+                firdtt += ahdXXX*Xt**2*Xd+ahdXX*(Xtt*Xd+2*Xdt*Xt)*ahdX*Xdtt
+
+                X_virial = n*delta_0/(a+(1-a)/tau**g)
+                ahdX_virial = -(f**2-1)/(1-X_virial) + \
+                    (f**2+3*f+X_virial*(f**2-3*f))/(1-X_virial)**3
+                ahdXX_virial = -(f**2-1)/(1-X_virial)**2 + \
+                    (3*(f**2+3*f)+(f**2-3*f)*(1+2*X_virial))/(1-X_virial)**4
+                B += ahdX_virial*Xd
+                C += ahdXX_virial*Xd**2
+
+            # Special form from Saul, A. and Wagner, W. Water 58 coefficient
+            # equation
+            n, d, t = coef["nr5"]
+            if len(n):
+                d6 = delta**6
+                factor = where(delta < 0.2, 1.6*d6*(1-1.2*d6),
+                               exp(0.4*d6)-exp(-2*d6))
+                factord = -2.4*exp(-0.4*d6)+12*exp(-2*d6)
+                factordd = 5.76*exp(-0.4*d6)-144*exp(-2*d6)
+                tt = ta**t
+                tt1 = t*ta**(t-1)
+                tt2 = t*(t-1)*ta**(t-2)
+                fir += factor*(n*de**d*tt).sum(-1)
+                fird += factord*(n*de**(d+5)*tt).sum(-1) + \
+                    factor*(n*d*de**(d-1)*tt).sum(-1)
+                firdd += factordd*(n*de**(d+10)*tt).sum(-1) + \
+                    factord*(n*(2*d+5)*de**(d+4)*tt).sum(-1) + \
+                    factor*(n*d*(d-1)*de**(d-2)*tt).sum(-1)
+                firt += factor*(n*de**d*tt1).sum(-1)
+                firtt += factor*(n*de**d*tt2).sum(-1)
+                firdt += factord*(n*de**(d+5)*tt1).sum(-1) + \
+                    factor*(n*d*de**(d-1)*tt1).sum(-1)
+                firdtt += factord*(n*de**(d+5)*tt2).sum(-1) + \
+                    factor*(n*d*de**(d-1)*tt2).sum(-1)
+                B += (-2.4*exp(-0.4*delta_0**6)+12*exp(-2*delta_0**6)) * \
+                    (n*delta_0**(d+5)*tt).sum(-1) + \
+                    (exp(0.4*delta_0**6)-exp(-2*delta_0**6)) * \
+                    (n*d*delta_0**(d-1)*tt).sum(-1)
+                C += (5.76*exp(-0.4*delta_0**6)-144*exp(-2*delta_0**6)) * \
+                    (n*delta_0**(d+10)*tt).sum(-1) + \
+                    (-2.4*exp(-0.4*delta_0**6)+12*exp(-2*delta_0**6)) * \
+                    (n*(2*d+5)*delta_0**(d+4)*tt).sum(-1) + \
+                    (exp(0.4*delta_0**6)-exp(-2*delta_0**6)) * \
+                    (n*d*(d-1)*delta_0**(d-2)*tt).sum(-1)
+
+        prop = [fir, firt, firtt, fird, firdd, firdt, firdtt, B, C]
+        return tuple(where(zero, 0., p) for p in prop)
+
 
     def derivative(self, z, x, y, fase):
         """Calculate generic partial derivative: (δz/δx)y
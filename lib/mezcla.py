@@ -24,6 +24,9 @@ This module implement mixture component properties
 properties in database and calculate state properties with the methods chosen
 in configuration
 
+:class:`Constants`: Constant properties of the components of a mixture, with
+an array for each property
+
 Liquid density calculation methods:
     * :func:`RhoL_RackettMix`
     * :func:`RhoL_CostaldMix`
@@ -72,16 +75,20 @@ Mixture mass definition:
 """
 
 
+from collections import namedtuple
+from copy import copy
 from math import pi
 
+from numpy import (add, array, asarray, dot, fill_diagonal, outer, r_, sqrt,
+                   tril)
 from numpy.linalg import solve
 from scipy import log, log10, exp
 
-from lib.compuestos import (Componente, RhoL_Costald, RhoL_AaltoKeskinen,
+from lib.compuestos import (getComponente, RhoL_Costald, RhoL_AaltoKeskinen,
                             RhoL_TaitCostald, RhoL_Nasrifar, MuG_DeanStiel,
                             MuG_API, ThG_StielThodos)
 from lib.physics import R_atml, R, Collision_Neufeld
-from lib import unidades, config
+from lib import unidades, config, sql
 
 
 __doi__ = {
@@ -624,33 +631,24 @@ def RhoL_CostaldMix(T, xi, Tci, wi, Vci, Mi):
     [3]_ Poling, Bruce E. The Properties of Gases and Liquids. 5th edition.
        New York: McGraw-Hill Professional, 2000.
     """
+    xi = asarray(xi, dtype=float)
+    Tci = asarray(Tci, dtype=float)
+    Mi = asarray(Mi, dtype=float)
+
     # Convert critical volumes to molar base
-    Vci = [Vc*M for Vc, M in zip(Vci, Mi)]
+    Vci = asarray(Vci, dtype=float)*Mi
 
     # Apply mixing rules
     # Eq 24
-    wm = 0
-    for x, w in zip(xi, wi):
-        wm += x*w
+    wm = dot(xi, wi)
 
     # Eq 21
-    sum1 = 0
-    sum2 = 0
-    sum3 = 0
-    for x, Vc, Tc in zip(xi, Vci, Tci):
-        sum1 += x*Vc
-        sum2 += x*Vc**(2/3)
-        sum3 += x*Vc**(1/3)
-    Vcm = (sum1+3*sum2*sum3)/4
+    Vcm = (dot(xi, Vci)+3*dot(xi, Vci**(2/3))*dot(xi, Vci**(1/3)))/4
 
-    # Eq 19 & 21
-    Tcm = 0
-    for x_i, Vc_i, Tc_i in zip(xi, Vci, Tci):
-        for x_j, Vc_j, Tc_j in zip(xi, Vci, Tci):
-            Tcm += x_i*x_j*(Vc_i*Tc_i*Vc_j*Tc_j)**0.5
-    Tcm /= Vcm
+    # Eq 19 & 21, the double sum is the square of a single sum
+    Tcm = dot(xi, sqrt(Vci*Tci))**2/Vcm
 
-    Mm = sum([M*x for M, x in zip(Mi, xi)])
+    Mm = dot(Mi, xi)
 
     # Apply the pure component procedure with the mixing parameters
     rho = RhoL_Costald(T, Tcm, wm, Vcm)
@@ -1287,76 +1285,45 @@ def MuG_Reichenberg(T, xi, Tci, Pci, Mi, mui, Di):
     [3]_ Poling, Bruce E. The Properties of Gases and Liquids. 5th edition.
        New York: McGraw-Hill Professional, 2000.
     """
+    xi = asarray(xi, dtype=float)
+    Tci = asarray(Tci, dtype=float)
+    Pci = asarray(Pci, dtype=float)
+    Mi = asarray(Mi, dtype=float)
+    mui = asarray(mui, dtype=float)
+    Di = asarray(Di, dtype=float)
+
     # Calculate reduced temperatures
-    Tri = [T/Tc for Tc in Tci]
-    Trij = []
-    for Tc_i in Tci:
-        Triji = []
-        for Tc_j in Tci:
-            Triji.append(T/(Tc_i*Tc_j)**0.5)
-        Trij.append(Triji)
+    Tri = T/Tci
+    Trij = T/sqrt(outer(Tci, Tci))
 
     # Calculate reduced viscosity
-    muri = [52.46*D**2*Pc*1e-5/Tc**2 for D, Pc, Tc in zip(Di, Pci, Tci)]
-    murij = []
-    for mur_i in muri:
-        muriji = []
-        for mur_j in muri:
-            muriji.append((mur_i*mur_j)**0.5)
-        murij.append(muriji)
+    muri = 52.46*Di**2*Pci*1e-5/Tci**2
+    murij = sqrt(outer(muri, muri))
 
     # Polar correction, Eq 9-5.5
-    Fri = []
-    for Tr, mur in zip(Tri, muri):
-        Fri.append((Tr**3.5+(10*mur)**7)/Tr**3.5/(1+(10*mur)**7))
-    Frij = []
-    for Triji, muriji in zip(Trij, murij):
-        Friji = []
-        for Tr, mur in zip(Triji, muriji):
-            Friji.append((Tr**3.5+(10*mur)**7)/Tr**3.5/(1+(10*mur)**7))
-        Frij.append(Friji)
+    Fri = (Tri**3.5+(10*muri)**7)/Tri**3.5/(1+(10*muri)**7)
+    Frij = (Trij**3.5+(10*murij)**7)/Trij**3.5/(1+(10*murij)**7)
 
     # Eq 9-5.3
-    Ui = []
-    for Tr, Fr in zip(Tri, Fri):
-        Ui.append((1+0.36*Tr*(Tr-1))**(1/6)*Fr/Tr**0.5)
+    Ui = (1+0.36*Tri*(Tri-1))**(1/6)*Fri/Tri**0.5
 
     # Eq 9-5.4
-    Ci = [M**0.25/(mu*U)**0.5 for M, mu, U in zip(Mi, mui, Ui)]
+    Ci = Mi**0.25/(mui*Ui)**0.5
 
     # Eq 9-5.6
-    Hij = []
-    for M_i, C_i, Triji, Friji in zip(Mi, Ci, Trij, Frij):
-        Hiji = []
-        for M_j, C_j, Tr, Fr in zip(Mi, Ci, Triji, Friji):
-            Hiji.append((M_i*M_j/32/(M_i+M_j)**3)**0.5*(C_i+C_j)**2*(
-                        1+0.36*Tr*(Tr-1))**(1/6)*Fr/Tr**0.5)
-        Hij.append(Hiji)
-
-    # Eq 9-5.2
-    sumai = []
-    for i, M_i in enumerate(Mi):
-        sumaij = 0
-        for j, M_j in enumerate(Mi):
-            if i != j:
-                sumaij += xi[j]*Hij[i][j]*(3+2*M_j/M_i)
-        sumai.append(sumaij)
-    Ki = [x*mu/(x+mu*suma) for x, mu, suma in zip(xi, mui, sumai)]
-
-    # Eq 9-5.1
-    mu = 0
-    for i, K_i in enumerate(Ki):
-        sum1 = 0
-        for H, K_j in zip(Hij[i], Ki[:i]):
-            sum1 += H*K_j
+    Hij = sqrt(outer(Mi, Mi)/32/add.outer(Mi, Mi)**3)*add.outer(Ci, Ci)**2 * (
+        1+0.36*Trij*(Trij-1))**(1/6)*Frij/Trij**0.5
 
-        sum2 = 0
-        for j, K_j in enumerate(Ki):
-            for k, K_k in enumerate(Ki):
-                if j != i and k != i:
-                    sum2 += Hij[i][j]*Hij[i][k]*K_j*K_k
+    # Eq 9-5.2, the sum doesn't include the j=i terms
+    Hij_ = Hij.copy()
+    fill_diagonal(Hij_, 0)
+    sumai = dot(Hij_*(3+2*outer(1/Mi, Mi)), xi)
+    Ki = xi*mui/(xi+mui*sumai)
 
-        mu += K_i*(1+2*sum1+sum2)
+    # Eq 9-5.1, the double sum over j≠i, k≠i is the square of sum over j≠i
+    sum1 = dot(tril(Hij, -1), Ki)
+    sum2 = dot(Hij_, Ki)**2
+    mu = dot(Ki, 1+2*sum1+sum2)
 
     return unidades.Viscosity(mu)
 
@@ -1429,31 +1396,23 @@ def MuG_Wilke(xi, Mi, mui):
     [3]_ Poling, Bruce E. The Properties of Gases and Liquids. 5th edition.
        New York: McGraw-Hill Professional, 2000.
     """
+    xi = asarray(xi, dtype=float)
+    Mi = asarray(Mi, dtype=float)
+    mui = asarray(mui, dtype=float)
+
     # Eq 4
-    kij = []
-    for i, mi in enumerate(Mi):
-        kiji = []
-        for j, mj in enumerate(Mi):
-            if i == j:
-                kiji.append(0)
-            else:
-                kiji.append((1+(mui[i]/mui[j])**0.5*(mj/mi)**0.25)**2 /
-                            8**0.5/(1+mi/mj)**0.5)
-        kij.append(kiji)
+    kij = (1+sqrt(outer(mui, 1/mui))*outer(1/Mi, Mi)**0.25)**2 / \
+        8**0.5/sqrt(1+outer(Mi, 1/Mi))
+    fill_diagonal(kij, 0)
 
     # Eq 13
-    # Precalculate of internal sum
-    suma = []
-    for i, Xi in enumerate(xi):
-        sumai = 0
-        if Xi != 0:
-            for j, Xj in enumerate(xi):
-                sumai += kij[i][j]*Xj/Xi
-        suma.append(sumai)
+    # Precalculate of internal sum, null for components not present
+    suma = dot(kij, xi)
+    present = xi != 0
+    suma[present] /= xi[present]
+    suma[~present] = 0
 
-    mu = 0
-    for mu_i, sumai in zip(mui, suma):
-        mu += mu_i/(1+sumai)
+    mu = (mui/(1+suma)).sum()
     return unidades.Viscosity(mu)
 
 
@@ -1636,7 +1595,7 @@ def MuG_Lucas(T, P, xi, Tci, Pci, Vci, Zci, Mi, Di):
     # Calculate A factor
     Mh = max(Mi)
     Ml = min(Mi)
-    xh = xi[Mi.index(Mh)]
+    xh = xi[list(Mi).index(Mh)]
     if Mh/Ml > 9 and 0.05 < xh < 0.7:
         A = 1 - 0.01*(Mh/Ml)**0.87
     else:
@@ -1673,6 +1632,91 @@ def MuG_Lucas(T, P, xi, Tci, Pci, Vci, Zci, Mi, Di):
     return unidades.Viscosity(mu, "microP")
 
 
+def _ChungMix(xi, Tci, Vci, Mi, wi, Di=None, ki=None):
+    """Mixing rules of Chung method, common to viscosity and thermal
+    conductivity correlations, Eq 14-27 in [15]_
+
+    Parameters
+    ----------
+    xi : list
+        Mole fractions of components, [-]
+    Tci : list
+        Critical temperature of components, [K]
+    Vci : list
+        Critical volume of components, [m³/kg]
+    Mi : list
+        Molecular weights of components, [g/mol]
+    wi : list
+        Acentric factor of components, [-]
+    Di : list, optional
+        Dipole moment of components, [Debye]
+    ki : list, optional
+        Correction factor for polar substances, [-]
+
+    Returns
+    -------
+    sm : float
+        Mixture characteristic size, [Å]
+    ekm : float
+        Mixture characteristic energy ε/k, [K]
+    wm : float
+        Mixture acentric factor, [-]
+    Mm : float
+        Mixture molecular weight, [g/mol]
+    Dm : float
+        Mixture dipole moment, [Debye], 0 if Di isn't given
+    km : float
+        Mixture polar correction factor, [-], 0 if ki isn't given
+    """
+    xi = asarray(xi, dtype=float)
+    Tci = asarray(Tci, dtype=float)
+    Mi = asarray(Mi, dtype=float)
+    wi = asarray(wi, dtype=float)
+
+    # Use critical volume in molar base
+    Vci = asarray(Vci, dtype=float)*Mi*1000
+
+    sigmai = 0.809*Vci**(1/3)                                           # Eq 4
+    eki = Tci/1.2593                                                    # Eq 5
+
+    sigmaij = sqrt(outer(sigmai, sigmai))                              # Eq 23
+    ekij = sqrt(outer(eki, eki))                                       # Eq 24
+    wij = add.outer(wi, wi)/2                                          # Eq 25
+    Mij = 2*outer(Mi, Mi)/add.outer(Mi, Mi)                            # Eq 26
+
+    xij = outer(xi, xi)
+    sij3 = xij*sigmaij**3
+
+    # Eq 14
+    sm = sij3.sum()**(1/3)
+
+    # Eq 15
+    ekm = (sij3*ekij).sum()/sm**3
+
+    # Eq 18
+    wm = (sij3*wij).sum()/sm**3
+
+    # Eq 19
+    Mm = (xij*ekij*sigmaij**2*sqrt(Mij)).sum()
+    Mm = (Mm/(ekm*sm**2))**2
+
+    # Eq 20
+    Dm = 0
+    if Di is not None:
+        Di = asarray(Di, dtype=float)
+        Dm = (xij*outer(Di, Di)**2/ekij/sigmaij**3).sum()
+        Dm = (Dm*ekm*sm**3)**0.25
+
+    # Eq 21
+    km = 0
+    if ki is not None:
+        ki = asarray(ki, dtype=float)
+        kij = sqrt(outer(ki, ki))                                      # Eq 27
+        km = (xij*kij).sum()
+
+    return sm, ekm, wm, Mm, Dm, km
+
+
 def MuG_Chung(T, xi, Tci, Vci, Mi, wi, Di, ki):
     r"""Calculate the viscosity of a gas mixture using the Chung correlation
 
@@ -1786,92 +1830,8 @@ def MuG_Chung(T, xi, Tci, Vci, Mi, wi, Di, ki):
     [3]_ Poling, Bruce E. The Properties of Gases and Liquids. 5th edition.
        New York: McGraw-Hill Professional, 2000.
     """
-    # Use critical volume in molar base
-    Vci = [Vc*M*1000 for Vc, M in zip(Vci, Mi)]
-
-    sigmai = [0.809*Vc**(1/3) for Vc in Vci]                            # Eq 4
-    eki = [Tc/1.2593 for Tc in Tci]                                     # Eq 5
-
-    # Eq 23
-    sigmaij = []
-    for s_i in sigmai:
-        sigmaiji = []
-        for s_j in sigmai:
-            sigmaiji.append((s_i*s_j)**0.5)
-        sigmaij.append(sigmaiji)
-
-    # Eq 24
-    ekij = []
-    for ek_i in eki:
-        ekiji = []
-        for ek_j in eki:
-            ekiji.append((ek_i*ek_j)**0.5)
-        ekij.append(ekiji)
-
-    # Eq 25
-    wij = []
-    for w_i in wi:
-        wiji = []
-        for w_j in wi:
-            wiji.append((w_i+w_j)/2)
-        wij.append(wiji)
-
-    # Eq 26
-    Mij = []
-    for M_i in Mi:
-        Miji = []
-        for M_j in Mi:
-            Miji.append(2*M_i*M_j/(M_i+M_j))
-        Mij.append(Miji)
-
-    # Eq 27
-    kij = []
-    for k_i in ki:
-        kiji = []
-        for k_j in ki:
-            kiji.append((k_i*k_j)**0.5)
-        kij.append(kiji)
-
-    # Eq 14
-    sm = 0
-    for x_i, sigmaiji in zip(xi, sigmaij):
-        for x_j, sij in zip(xi, sigmaiji):
-            sm += x_i*x_j*sij**3
-    sm = sm**(1/3)
-
-    # Eq 15
-    ekm = 0
-    for x_i, sigmaiji, ekiji in zip(xi, sigmaij, ekij):
-        for x_j, sij, ek in zip(xi, sigmaiji, ekiji):
-            ekm += x_i*x_j*ek*sij**3
-    ekm /= sm**3
-
-    # Eq 18
-    wm = 0
-    for x_i, sigmaiji, wiji in zip(xi, sigmaij, wij):
-        for x_j, sij, w in zip(xi, sigmaiji, wiji):
-            wm += x_i*x_j*w*sij**3
-    wm /= sm**3
-
-    # Eq 19
-    Mm = 0
-    for x_i, sigmaiji, ekiji, Miji in zip(xi, sigmaij, ekij, Mij):
-        for x_j, s, ek, M in zip(xi, sigmaiji, ekiji, Miji):
-            Mm += x_i*x_j*ek*s**2*M**0.5
-    Mm = (Mm/(ekm*sm**2))**2
-
-    # Eq 20
-    Dm = 0
-    for x_i, sigmaiji, ekiji, D_i in zip(xi, sigmaij, ekij, Di):
-        for x_j, s, ek, D_j in zip(xi, sigmaiji, ekiji, Di):
-            Dm += x_i*x_j*(D_i*D_j)**2/ek/s**3
-    Dm = (Dm*ekm*sm**3)**0.25
-
-    # Eq 21
-    km = 0
-    for x_i, kiji in zip(xi, kij):
-        for x_j, k in zip(xi, kiji):
-            km += x_i*x_j*k
+    # Apply mixing rules
+    sm, ekm, wm, Mm, Dm, km = _ChungMix(xi, Tci, Vci, Mi, wi, Di, ki)
 
     Vcm = (sm/0.809)**3                                                # Eq 16
     Tcm = 1.2593*ekm                                                   # Eq 17
@@ -1927,92 +1887,8 @@ def MuG_P_Chung(T, xi, Tci, Vci, Mi, wi, Di, ki, rho, muo):
     [1]_ Poling, Bruce E. The Properties of Gases and Liquids. 5th edition.
        New York: McGraw-Hill Professional, 2000.
     """
-    # Use critical volume in molar base
-    Vci = [Vc*M*1000 for Vc, M in zip(Vci, Mi)]
-
-    sigmai = [0.809*Vc**(1/3) for Vc in Vci]                            # Eq 4
-    eki = [Tc/1.2593 for Tc in Tci]                                     # Eq 5
-
-    # Eq 23
-    sigmaij = []
-    for s_i in sigmai:
-        sigmaiji = []
-        for s_j in sigmai:
-            sigmaiji.append((s_i*s_j)**0.5)
-        sigmaij.append(sigmaiji)
-
-    # Eq 24
-    ekij = []
-    for ek_i in eki:
-        ekiji = []
-        for ek_j in eki:
-            ekiji.append((ek_i*ek_j)**0.5)
-        ekij.append(ekiji)
-
-    # Eq 25
-    wij = []
-    for w_i in wi:
-        wiji = []
-        for w_j in wi:
-            wiji.append((w_i+w_j)/2)
-        wij.append(wiji)
-
-    # Eq 26
-    Mij = []
-    for M_i in Mi:
-        Miji = []
-        for M_j in Mi:
-            Miji.append(2*M_i*M_j/(M_i+M_j))
-        Mij.append(Miji)
-
-    # Eq 27
-    kij = []
-    for k_i in ki:
-        kiji = []
-        for k_j in ki:
-            kiji.append((k_i*k_j)**0.5)
-        kij.append(kiji)
-
-    # Eq 14
-    sm = 0
-    for x_i, sigmaiji in zip(xi, sigmaij):
-        for x_j, sij in zip(xi, sigmaiji):
-            sm += x_i*x_j*sij**3
-    sm = sm**(1/3)
-
-    # Eq 15
-    ekm = 0
-    for x_i, sigmaiji, ekiji in zip(xi, sigmaij, ekij):
-        for x_j, sij, ek in zip(xi, sigmaiji, ekiji):
-            ekm += x_i*x_j*ek*sij**3
-    ekm /= sm**3
-
-    # Eq 18
-    wm = 0
-    for x_i, sigmaiji, wiji in zip(xi, sigmaij, wij):
-        for x_j, sij, w in zip(xi, sigmaiji, wiji):
-            wm += x_i*x_j*w*sij**3
-    wm /= sm**3
-
-    # Eq 19
-    Mm = 0
-    for x_i, sigmaiji, ekiji, Miji in zip(xi, sigmaij, ekij, Mij):
-        for x_j, s, ek, M in zip(xi, sigmaiji, ekiji, Miji):
-            Mm += x_i*x_j*ek*s**2*M**0.5
-    Mm = (Mm/(ekm*sm**2))**2
-
-    # Eq 20
-    Dm = 0
-    for x_i, sigmaiji, ekiji, D_i in zip(xi, sigmaij, ekij, Di):
-        for x_j, s, ek, D_j in zip(xi, sigmaiji, ekiji, Di):
-            Dm += x_i*x_j*(D_i*D_j)**2/ek/s**3
-    Dm = (Dm*ekm*sm**3)**0.25
-
-    # Eq 21
-    km = 0
-    for x_i, kiji in zip(xi, kij):
-        for x_j, k in zip(xi, kiji):
-            km += x_i*x_j*k
+    # Apply mixing rules
+    sm, ekm, wm, Mm, Dm, km = _ChungMix(xi, Tci, Vci, Mi, wi, Di, ki)
 
     rho = rho/Mm/1000
     Vcm = (sm/0.809)**3                                                # Eq 16
@@ -2664,42 +2540,27 @@ def ThG_LindsayBromley(T, xi, Mi, Tbi, mui, ki):
         Ind. & Eng. Chem. 42(8) (1950) 1508-1511
     [2]_ API. Technical Data book: Petroleum Refining 6th Edition
     """
+    xi = asarray(xi, dtype=float)
+    Mi = asarray(Mi, dtype=float)
+    Tbi = asarray(Tbi, dtype=float)
+    mui = asarray(mui, dtype=float)
+    ki = asarray(ki, dtype=float)
+
     # Calculation of Sutherland constants, Eq 14
-    S = []
-    for Tb, M in zip(Tbi, Mi):
-        if M == 2.0158 or M == 4.0026:
-            # Hydrogen or helium case
-            S.append(79)
-        else:
-            S.append(1.5*Tb)
+    S = 1.5*Tbi
+    # Hydrogen or helium case
+    S[(Mi == 2.0158) | (Mi == 4.0026)] = 79
 
     # Geometric mean of collision Sutherland constants, Eq 15
-    Sij = []
-    for Si in S:
-        Siji = []
-        for Sj in S:
-            Siji.append((Si*Sj)**0.5)
-        Sij.append(Siji)
+    Sij = sqrt(outer(S, S))
 
     # Eq 12
-    Aij = []
-    for mu_i, M_i, Si, Siji in zip(mui, Mi, S, Sij):
-        Aiji = []
-        for mu_j, M_j, Sj, S_ij in zip(mui, Mi, S, Siji):
-            Aiji.append(0.25*(1+(mu_i/mu_j*(M_j/M_i)**0.75*(1+Si/T)/(
-                1+Sj/T))**0.5)**2 * (1+S_ij/T)/(1+Si/T))
-        Aij.append(Aiji)
+    ST = 1+S/T
+    Aij = 0.25*(1+(outer(mui, 1/mui)*outer(1/Mi, Mi)**0.75*outer(
+        ST, 1/ST))**0.5)**2 * (1+Sij/T)/ST[:, None]
 
     # Calculate thermal conductivity, Eq 11
-    sumaj = []
-    for Aiji in Aij:
-        suma = 0
-        for xj, A_ij in zip(xi, Aiji):
-            suma += A_ij*xj
-        sumaj.append(suma)
-    k = 0
-    for x_i, k_i, si in zip(xi, ki, sumaj):
-        k += k_i*x_i/si
+    k = (ki*xi/dot(Aij, xi)).sum()
     return unidades.ThermalConductivity(k)
 
 
@@ -2752,26 +2613,20 @@ def ThG_MasonSaxena(xi, Mi, mui, ki):
     [3]_ Poling, Bruce E. The Properties of Gases and Liquids. 5th edition.
        New York: McGraw-Hill Professional, 2000.
     """
+    xi = asarray(xi, dtype=float)
+    Mi = asarray(Mi, dtype=float)
+    mui = asarray(mui, dtype=float)
+    ki = asarray(ki, dtype=float)
+
+    # Monatomic value of thermal conductivity ratio, Eq 22
+    Mij = outer(Mi, 1/Mi)
+    ltij = outer(mui, 1/mui)/Mij
+
     # Aij coefficient with ε=1 as explain in [3]_, Eq 21
-    Aij = []
-    for mu_i, M_i in zip(mui, Mi):
-        Aiji = []
-        for mu_j, M_j in zip(mui, Mi):
-            # Monatomic value of thermal conductivity ratio, Eq 22
-            lt_ij = mu_i*M_j/mu_j/M_i
-            Aiji.append((1+lt_ij**0.5*(M_i/M_j)**0.25)**2/(8*(1+M_i/M_j))**0.5)
-        Aij.append(Aiji)
+    Aij = (1+ltij**0.5*Mij**0.25)**2/(8*(1+Mij))**0.5
 
     # Calculate thermal conductivity, Eq 20
-    sumaj = []
-    for Aiji in Aij:
-        suma = 0
-        for xj, A_ij in zip(xi, Aiji):
-            suma += A_ij*xj
-        sumaj.append(suma)
-    k = 0
-    for x_i, k_i, si in zip(xi, ki, sumaj):
-        k += k_i*x_i/si
+    k = (ki*xi/dot(Aij, xi)).sum()
     return unidades.ThermalConductivity(k)
 
 
@@ -2847,72 +2702,11 @@ def ThG_Chung(T, xi, Tci, Vci, Mi, wi, Cvi, mu):
        New York: McGraw-Hill Professional, 2000.
     """
     # Molar values
-    Vci = [Vc*M*1000 for Vc, M in zip(Vci, Mi)]
     Cvi = [Cv*M/1000 for Cv, M in zip(Cvi, Mi)]
     Cvm = sum([x*Cv for x, Cv in zip(xi, Cvi)])
 
-    sigmai = [0.809*Vc**(1/3) for Vc in Vci]                            # Eq 4
-    eki = [Tc/1.2593 for Tc in Tci]                                     # Eq 5
-
-    # Eq 23
-    sigmaij = []
-    for s_i in sigmai:
-        sigmaiji = []
-        for s_j in sigmai:
-            sigmaiji.append((s_i*s_j)**0.5)
-        sigmaij.append(sigmaiji)
-
-    # Eq 24
-    ekij = []
-    for ek_i in eki:
-        ekiji = []
-        for ek_j in eki:
-            ekiji.append((ek_i*ek_j)**0.5)
-        ekij.append(ekiji)
-
-    # Eq 25
-    wij = []
-    for w_i in wi:
-        wiji = []
-        for w_j in wi:
-            wiji.append((w_i+w_j)/2)
-        wij.append(wiji)
-
-    # Eq 26
-    Mij = []
-    for M_i in Mi:
-        Miji = []
-        for M_j in Mi:
-            Miji.append(2*M_i*M_j/(M_i+M_j))
-        Mij.append(Miji)
-
-    # Eq 14
-    sm = 0
-    for x_i, sigmaiji in zip(xi, sigmaij):
-        for x_j, sij in zip(xi, sigmaiji):
-            sm += x_i*x_j*sij**3
-    sm = sm**(1/3)
-
-    # Eq 15
-    ekm = 0
-    for x_i, sigmaiji, ekiji in zip(xi, sigmaij, ekij):
-        for x_j, sij, ek in zip(xi, sigmaiji, ekiji):
-            ekm += x_i*x_j*ek*sij**3
-    ekm /= sm**3
-
-    # Eq 18
-    wm = 0
-    for x_i, sigmaiji, wiji in zip(xi, sigmaij, wij):
-        for x_j, sij, w in zip(xi, sigmaiji, wiji):
-            wm += x_i*x_j*w*sij**3
-    wm /= sm**3
-
-    # Eq 19
-    Mm = 0
-    for x_i, sigmaiji, ekiji, Miji in zip(xi, sigmaij, ekij, Mij):
-        for x_j, s, ek, M in zip(xi, sigmaiji, ekiji, Miji):
-            Mm += x_i*x_j*ek*s**2*M**0.5
-    Mm = (Mm/(ekm*sm**2))**2
+    # Apply mixing rules
+    sm, ekm, wm, Mm, Dm, km = _ChungMix(xi, Tci, Vci, Mi, wi)
 
     Tcm = 1.2593*ekm
     Trm = T/Tcm
@@ -2989,92 +2783,8 @@ def ThG_P_Chung(T, xi, Tci, Vci, Mi, wi, Di, ki, rho, ko):
     # Thermal conductivity in procedure in cal/s·cm·K
     ko = unidades.ThermalConductivity(ko).calscmK
 
-    # Use critical volume in molar base
-    Vci = [Vc*M*1000 for Vc, M in zip(Vci, Mi)]
-
-    sigmai = [0.809*Vc**(1/3) for Vc in Vci]                            # Eq 4
-    eki = [Tc/1.2593 for Tc in Tci]                                     # Eq 5
-
-    # Eq 23
-    sigmaij = []
-    for s_i in sigmai:
-        sigmaiji = []
-        for s_j in sigmai:
-            sigmaiji.append((s_i*s_j)**0.5)
-        sigmaij.append(sigmaiji)
-
-    # Eq 24
-    ekij = []
-    for ek_i in eki:
-        ekiji = []
-        for ek_j in eki:
-            ekiji.append((ek_i*ek_j)**0.5)
-        ekij.append(ekiji)
-
-    # Eq 25
-    wij = []
-    for w_i in wi:
-        wiji = []
-        for w_j in wi:
-            wiji.append((w_i+w_j)/2)
-        wij.append(wiji)
-
-    # Eq 26
-    Mij = []
-    for M_i in Mi:
-        Miji = []
-        for M_j in Mi:
-            Miji.append(2*M_i*M_j/(M_i+M_j))
-        Mij.append(Miji)
-
-    # Eq 27
-    kij = []
-    for k_i in ki:
-        kiji = []
-        for k_j in ki:
-            kiji.append((k_i*k_j)**0.5)
-        kij.append(kiji)
-
-    # Eq 14
-    sm = 0
-    for x_i, sigmaiji in zip(xi, sigmaij):
-        for x_j, sij in zip(xi, sigmaiji):
-            sm += x_i*x_j*sij**3
-    sm = sm**(1/3)
-
-    # Eq 15
-    ekm = 0
-    for x_i, sigmaiji, ekiji in zip(xi, sigmaij, ekij):
-        for x_j, sij, ek in zip(xi, sigmaiji, ekiji):
-            ekm += x_i*x_j*ek*sij**3
-    ekm /= sm**3
-
-    # Eq 18
-    wm = 0
-    for x_i, sigmaiji, wiji in zip(xi, sigmaij, wij):
-        for x_j, sij, w in zip(xi, sigmaiji, wiji):
-            wm += x_i*x_j*w*sij**3
-    wm /= sm**3
-
-    # Eq 19
-    Mm = 0
-    for x_i, sigmaiji, ekiji, Miji in zip(xi, sigmaij, ekij, Mij):
-        for x_j, s, ek, M in zip(xi, sigmaiji, ekiji, Miji):
-            Mm += x_i*x_j*ek*s**2*M**0.5
-    Mm = (Mm/(ekm*sm**2))**2
-
-    # Eq 20
-    Dm = 0
-    for x_i, sigmaiji, ekiji, D_i in zip(xi, sigmaij, ekij, Di):
-        for x_j, s, ek, D_j in zip(xi, sigmaiji, ekiji, Di):
-            Dm += x_i*x_j*(D_i*D_j)**2/ek/s**3
-    Dm = (Dm*ekm*sm**3)**0.25
-
-    # Eq 21
-    km = 0
-    for x_i, kiji in zip(xi, kij):
-        for x_j, k in zip(xi, kiji):
-            km += x_i*x_j*k
+    # Apply mixing rules
+    sm, ekm, wm, Mm, Dm, km = _ChungMix(xi, Tci, Vci, Mi, wi, Di, ki)
 
     rho = rho/Mm/1000
     Vcm = (sm/0.809)**3                                                # Eq 16
@@ -3430,6 +3140,28 @@ def Tension(xi, sigmai):
     return unidades.Tension(sigma)
 
 
+# Constant properties of the components of a mixture, struct of arrays with
+# the values of all components for each property, in the order of components
+#   M: Molecular weight, [g/mol]
+#   Tc: Critical temperature, [K]
+#   Pc: Critical pressure, [Pa]
+#   Vc: Critical volume, [m³/kg]
+#   Zc: Critical compressibility factor, [-]
+#   f_acent: Acentric factor, [-]
+#   f_acent_mod: Acentric factor optimized to SRK, [-]
+#   Tb: Normal boiling point, [K]
+#   SG: Specific gravity, [-]
+#   rackett: Rackett constant, [-]
+#   dipole: Dipole moment, [Debye]
+#   K_Chung: Polar correction factor of Chung correlations, [-]
+#   isHydrocarbon: Boolean with the hydrocarbon condition
+#   cp: Coefficients of ideal gas specific heat polynomial, a row for each
+#       component, [cal/mol·K]
+Constants = namedtuple("Constants", [
+    "M", "Tc", "Pc", "Vc", "Zc", "f_acent", "f_acent_mod", "Tb", "SG",
+    "rackett", "dipole", "K_Chung", "isHydrocarbon", "cp"])
+
+
 class Mezcla(config.Entity):
     """
     Class to model mixture calculation, components, physics properties, mixing
@@ -3621,7 +3353,11 @@ class Mezcla(config.Entity):
                 self.ids = eval(txt)
             else:
                 self.ids = txt
-        self.componente = [Componente(int(i), **kwargs) for i in self.ids]
+        # Load all components from databank in a single query
+        sql.getElements(self.ids)
+        self.componente = [
+            getComponente(int(i), **kwargs) for i in self.ids]
+        self._setConstants()
         fraccionMolar = self.kwargs.get("fraccionMolar", None)
         fraccionMasica = self.kwargs.get("fraccionMasica", None)
         caudalMasico = self.kwargs.get("caudalMasico", None)
@@ -3695,66 +3431,97 @@ class Mezcla(config.Entity):
             self._bool = True
             self.status = 1
 
+        cte = self.constants
+        x = array(self.fraccion, dtype=float)
+
         # Calculate critic temperature, API procedure 4B1.1 pag 304
-        V = sum([xi*cmp.Vc for xi, cmp in zip(self.fraccion, self.componente)])
-        k = [xi*cmp.Vc/V for xi, cmp in zip(self.fraccion, self.componente)]
-        Tcm = sum([ki*cmp.Tc for ki, cmp in zip(k, self.componente)])
-        self.Tc = unidades.Temperature(Tcm)
+        k = x*cte.Vc/dot(x, cte.Vc)
+        self.Tc = unidades.Temperature(dot(k, cte.Tc))
 
         # Calculate pseudocritic temperature
-        t = sum([xi*cmp.Tc for xi, cmp in zip(self.fraccion, self.componente)])
-        self.tpc = unidades.Temperature(t)
+        self.tpc = unidades.Temperature(dot(x, cte.Tc))
 
         # Calculate pseudocritic pressure
-        p = sum([xi*cmp.Pc for xi, cmp in zip(self.fraccion, self.componente)])
-        self.ppc = unidades.Pressure(p)
+        self.ppc = unidades.Pressure(dot(x, cte.Pc))
+
+        # Calculate acentric factor, API procedure 6B2.2-6 pag 523
+        self.f_acent = dot(x, cte.f_acent)
+        self.f_acent_mod = dot(x, cte.f_acent_mod)
 
         # Calculate critic pressure, API procedure 4B2.1 pag 307
-        sumaw = 0
-        for xi, cmp in zip(self.fraccion, self.componente):
-            sumaw += xi*cmp.f_acent
-        pc = self.ppc+self.ppc*(5.808+4.93*sumaw)*(self.Tc-self.tpc)/self.tpc
+        pc = self.ppc+self.ppc*(5.808+4.93*self.f_acent)*(
+            self.Tc-self.tpc)/self.tpc
         self.Pc = unidades.Pressure(pc)
 
-        # Calculate acentric factor, API procedure 6B2.2-6 pag 523
-        self.f_acent = sum([xi*cmp.f_acent for xi, cmp in
-                            zip(self.fraccion, self.componente)])
-        self.f_acent_mod = sum([xi*cmp.f_acent_mod for xi, cmp in
-                                zip(self.fraccion, self.componente)])
-
         # Calculate critic volume
-        Vci = self._arraylize("Vc")
-        Mi = self._arraylize("M")
-        hc = self._arraylize("isHydrocarbon")
-        self.Vc = Vc_ChuehPrausnitz(self.fraccion, Vci, Mi, hydrocarbon=hc)
+        self.Vc = Vc_ChuehPrausnitz(
+            self.fraccion, cte.Vc, cte.M, hydrocarbon=cte.isHydrocarbon)
 
-        tb = [xi*cmp.Tb for xi, cmp in zip(self.fraccion, self.componente)]
-        self.Tb = unidades.Temperature(sum(tb))
-        self.SG = sum([xi*cmp.SG for xi, cmp in
-                       zip(self.fraccion, self.componente)])
+        self.Tb = unidades.Temperature(dot(x, cte.Tb))
+        self.SG = dot(x, cte.SG)
 
     def __call__(self):
         pass
 
-    def _arraylize(self, prop, unit=None):
-        """Get the compounds property prop as list
-        prop: a string code with the property to return
-            f_acent, M, Vc, Tc,...
+    def scale(self, factor=1):
+        """Return a copy of mixture with the flows multiplied by factor, the
+        components and the composition dependent properties are shared with
+        the instance
+
+        >>> mix = Mezcla(2, ids=[2, 3], caudalUnitarioMolar=[0.3, 0.7])
+        >>> half = mix.scale(0.5)
+        >>> "%0.2f %0.2f %0.3f" % (half.caudalmolar, half.Tc, mix.caudalmolar)
+        '0.50 264.96 1.000'
+        """
+        mezcla = copy(self)
+        mezcla.kwargs = self.kwargs.copy()
+        for key in ("caudalMasico", "caudalMolar"):
+            if mezcla.kwargs[key]:
+                mezcla.kwargs[key] = factor*mezcla.kwargs[key]
+        for key in ("caudalUnitarioMasico", "caudalUnitarioMolar"):
+            mezcla.kwargs[key] = [factor*q for q in mezcla.kwargs[key]]
+
+        mezcla.caudalmasico = unidades.MassFlow(factor*self.caudalmasico)
+        mezcla.caudalmolar = unidades.MolarFlow(factor*self.caudalmolar)
+        mezcla.caudalunitariomasico = [
+            unidades.MassFlow(factor*q) for q in self.caudalunitariomasico]
+        mezcla.caudalunitariomolar = [
+            unidades.MolarFlow(factor*q) for q in self.caudalunitariomolar]
+        return mezcla
+
+    def _setConstants(self):
+        """Save the constant properties of components in constants attribute,
+        read once from the components for all the mixture calculations
+
+        >>> mix = Mezcla(2, ids=[2, 3], caudalUnitarioMolar=[0.3, 0.7])
+        >>> " ".join(["%0.2f" % Tc for Tc in mix.constants.Tc])
+        '190.63 305.43'
         """
-        array = []
-        for cmp in self.componente:
-            value = cmp.__getattribute__(prop)
-            if unit:
-                value = value.__getattribute__(unit)
-            array.append(value)
-        return array
+        cmps = self.componente
+        self.constants = Constants(
+            M=array([cmp.M for cmp in cmps], dtype=float),
+            Tc=array([cmp.Tc for cmp in cmps], dtype=float),
+            Pc=array([cmp.Pc for cmp in cmps], dtype=float),
+            Vc=array([cmp.Vc for cmp in cmps], dtype=float),
+            Zc=array([cmp.Zc for cmp in cmps], dtype=float),
+            f_acent=array([cmp.f_acent for cmp in cmps], dtype=float),
+            f_acent_mod=array([cmp.f_acent_mod for cmp in cmps], dtype=float),
+            Tb=array([cmp.Tb for cmp in cmps], dtype=float),
+            SG=array([cmp.SG for cmp in cmps], dtype=float),
+            rackett=array([cmp.rackett for cmp in cmps], dtype=float),
+            dipole=array([cmp.dipole.Debye for cmp in cmps], dtype=float),
+            K_Chung=array([cmp._K_Chung() for cmp in cmps], dtype=float),
+            isHydrocarbon=array([cmp.isHydrocarbon for cmp in cmps]),
+            cp=array([cmp.cp for cmp in cmps], dtype=float).reshape(-1, 6))
 
     def _Ho(self, T):
-        """Ideal gas enthalpy"""
-        h = 0
-        for xw, cmp in zip(self.fraccion_masica, self.componente):
-            h += xw*cmp._Ho(T)
-        return unidades.Enthalpy(h)
+        """Ideal gas enthalpy, mass fraction average of the ideal gas
+        enthalpy of components, see Componente._Ho"""
+        To = 298.15
+        n = r_[1:7]
+        H = dot(self.constants.cp, T**n/n) - dot(self.constants.cp, To**n/n)
+        h = dot(self.fraccion_masica, H/self.constants.M)
+        return unidades.Enthalpy(h, "calg")
 
     def _so(self, T):
         """Ideal gas entropy, referenced in API procedure 7F2.1, pag 741
@@ -3784,6 +3551,14 @@ class Mezcla(config.Entity):
             Cp += xi*cmp.Cp_Gas_DIPPR(T)
         return unidades.SpecificHeat(Cp)
 
+    def Cp_Liquido(self, T):
+        """Calculate specific heat from liquid as the mass fraction weighted
+        average of components values"""
+        Cp = 0
+        for xi, cmp in zip(self.fraccion_masica, self.componente):
+            Cp += xi*cmp.Cp_Liquido_DIPPR(T)
+        return unidades.SpecificHeat(Cp)
+
     def RhoL(self, T, P):
         """Calculate the density of liquid phase using any of available
         correlation"""
@@ -3796,51 +3571,46 @@ class Mezcla(config.Entity):
 
         # Calculate of low pressure viscosity
         if method == 0:
-            Tci = self._arraylize("Tc")
-            Pci = self._arraylize("Pc")
-            Vci = self._arraylize("Vc")
-            Zrai = self._arraylize("rackett")
-            Mi = self._arraylize("M")
+            Tci = self.constants.Tc
+            Pci = self.constants.Pc
+            Vci = self.constants.Vc
+            Zrai = self.constants.rackett
+            Mi = self.constants.M
             rhos = RhoL_RackettMix(T, self.fraccion, Tci, Pci, Vci, Zrai, Mi)
         elif method == 1:
-            Tci = self._arraylize("Tc")
-            Vci = self._arraylize("Vc")
-            wi = self._arraylize("f_acent")
-            Mi = self._arraylize("M")
+            Tci = self.constants.Tc
+            Vci = self.constants.Vc
+            wi = self.constants.f_acent
+            Mi = self.constants.M
             rhos = RhoL_CostaldMix(T, self.fraccion, Tci, wi, Vci, Mi)
 
         # Add correction factor for high pressure
         if P < 1e6:
             rho = rhos
         elif Pcorr == 0:
-            Tci = self._arraylize("Tc")
-            Pci = self._arraylize("Pc")
-            Vci = self._arraylize("Vc")
-            Mi = self._arraylize("M")
-            wi = self._arraylize("f_acent")
-            Mi = self._arraylize("M")
+            Tci = self.constants.Tc
+            Pci = self.constants.Pc
+            Vci = self.constants.Vc
+            Mi = self.constants.M
+            wi = self.constants.f_acent
             rho = RhoL_AaltoKeskinenMix(
                 T, P, self.fraccion, Tci, Pci, Vci, wi, Mi, rhos)
         elif Pcorr == 1:
-            Tci = self._arraylize("Tc")
-            Vci = self._arraylize("Vc")
-            Mi = self._arraylize("M")
-            wi = self._arraylize("f_acent")
-            Mi = self._arraylize("M")
+            Tci = self.constants.Tc
+            Vci = self.constants.Vc
+            Mi = self.constants.M
+            wi = self.constants.f_acent
             rho = RhoL_TaitCostaldMix(
                 T, P, self.fraccion, Tci, Vci, wi, Mi, rhos)
         elif Pcorr == 2:
-            Tci = self._arraylize("Tc")
-            Vci = self._arraylize("Vc")
-            Mi = self._arraylize("M")
-            wi = self._arraylize("f_acent")
-            Mi = self._arraylize("M")
+            Tci = self.constants.Tc
+            Vci = self.constants.Vc
+            Mi = self.constants.M
+            wi = self.constants.f_acent
             rho = RhoL_NasrifarMix(T, P, self.fraccion, Tci, Vci, wi, Mi, rhos)
         elif Pcorr == 3:
-            Tci = self._arraylize("Tc")
-            Mi = self._arraylize("M")
-            wi = self._arraylize("f_acent")
-            Mi = self._arraylize("M")
+            Tci = self.constants.Tc
+            Pci = self.constants.Pc
             rho = RhoL_APIMix(T, P, self.fraccion, Tci, Pci, rhos)
 
         return rho
@@ -3856,36 +3626,35 @@ class Mezcla(config.Entity):
 
         # Calculate of low pressure viscosity
         if method == 0:
-            Tci = self._arraylize("Tc")
-            Pci = self._arraylize("Pc")
-            Mi = self._arraylize("M")
-            Mi = self._arraylize("M")
-            Di = self._arraylize("dipole", "Debye")
+            Tci = self.constants.Tc
+            Pci = self.constants.Pc
+            Mi = self.constants.M
+            Di = self.constants.dipole
             mui = [cmp.Mu_Gas(T, 101325, rho) for cmp in self.componente]
             muo = MuG_Reichenberg(T, self.fraccion, Tci, Pci, Mi, mui, Di)
         elif method == 1:
-            Tci = self._arraylize("Tc")
-            Pci = self._arraylize("Pc")
-            Vci = self._arraylize("Vc")
-            Zci = self._arraylize("Zc")
-            Mi = self._arraylize("M")
-            Di = self._arraylize("dipole", "Debye")
+            Tci = self.constants.Tc
+            Pci = self.constants.Pc
+            Vci = self.constants.Vc
+            Zci = self.constants.Zc
+            Mi = self.constants.M
+            Di = self.constants.dipole
             muo = MuG_Lucas(
                 T, 101325, self.fraccion, Tci, Pci, Vci, Zci, Mi, Di)
         elif method == 2:
-            Tci = self._arraylize("Tc")
-            Vci = self._arraylize("Vc")
-            Mi = self._arraylize("M")
-            wi = self._arraylize("f_acent")
-            Di = self._arraylize("dipole", "Debye")
-            ki = [cmp._K_Chung() for cmp in self.componente]
+            Tci = self.constants.Tc
+            Vci = self.constants.Vc
+            Mi = self.constants.M
+            wi = self.constants.f_acent
+            Di = self.constants.dipole
+            ki = self.constants.K_Chung
             muo = MuG_Chung(T, self.fraccion, Tci, Vci, Mi, wi, Di, ki)
         elif method == 3:
-            Mi = self._arraylize("M")
+            Mi = self.constants.M
             mui = [cmp.Mu_Gas(T, 101325, None) for cmp in self.componente]
             muo = MuG_Wilke(self.fraccion, Mi, mui)
         elif method == 4:
-            Mi = self._arraylize("M")
+            Mi = self.constants.M
             mui = [cmp.Mu_Gas(T, 101325, None) for cmp in self.componente]
             muo = MuG_Herning(self.fraccion, Mi, mui)
 
@@ -3893,40 +3662,40 @@ class Mezcla(config.Entity):
         if P < 1e6:
             mu = muo
         elif Pcorr == 0:
-            Tci = self._arraylize("Tc")
-            Pci = self._arraylize("Pc")
-            Vci = self._arraylize("Vc")
-            Zci = self._arraylize("Zc")
-            Mi = self._arraylize("M")
-            Di = self._arraylize("dipole", "Debye")
+            Tci = self.constants.Tc
+            Pci = self.constants.Pc
+            Vci = self.constants.Vc
+            Zci = self.constants.Zc
+            Mi = self.constants.M
+            Di = self.constants.dipole
             mu = MuG_Lucas(T, P, self.fraccion, Tci, Pci, Vci, Zci, Mi, Di)
         elif Pcorr == 1:
-            Tci = self._arraylize("Tc")
-            Vci = self._arraylize("Vc")
-            Mi = self._arraylize("M")
-            wi = self._arraylize("f_acent")
-            Di = self._arraylize("dipole", "Debye")
-            ki = [cmp._K_Chung() for cmp in self.componente]
+            Tci = self.constants.Tc
+            Vci = self.constants.Vc
+            Mi = self.constants.M
+            wi = self.constants.f_acent
+            Di = self.constants.dipole
+            ki = self.constants.K_Chung
             mu = MuG_P_Chung(
                 T, self.fraccion, Tci, Vci, Mi, wi, Di, ki, rho, muo)
         elif Pcorr == 2:
-            Tci = self._arraylize("Tc")
-            Vci = self._arraylize("Vc")
-            Zci = self._arraylize("Zc")
-            Mi = self._arraylize("M")
-            wi = self._arraylize("f_acent")
+            Tci = self.constants.Tc
+            Vci = self.constants.Vc
+            Zci = self.constants.Zc
+            Mi = self.constants.M
+            wi = self.constants.f_acent
             mu = MuG_TRAPP(
                 T, P, self.fraccion, Tci, Vci, Zci, Mi, wi, rho, muo)
         elif Pcorr == 3:
-            Tci = self._arraylize("Tc")
-            Pci = self._arraylize("Pc")
-            Vci = self._arraylize("Vc")
-            Mi = self._arraylize("M")
+            Tci = self.constants.Tc
+            Pci = self.constants.Pc
+            Vci = self.constants.Vc
+            Mi = self.constants.M
             rhoc = 1/Vc_ChuehPrausnitz(self.fraccion, Vci, Mi)
             mu = MuG_DeanStielMix(self.fraccion, Tci, Pci, Mi, rhoc, rho, muo)
         elif Pcorr == 4:
-            Tci = self._arraylize("Tc")
-            Pci = self._arraylize("Pc")
+            Tci = self.constants.Tc
+            Pci = self.constants.Pc
             mu = MuG_APIMix(T, P, self.fraccion, Tci, Pci, muo)
 
         return mu
@@ -3941,7 +3710,7 @@ class Mezcla(config.Entity):
             mui = [cmp.Mu_Liquido(T, P) for cmp in self.componente]
             mu = MuL_KendallMonroe(self.fraccion, mui)
         elif method == 1:
-            Mi = self._arraylize("M")
+            Mi = self.constants.M
             mui = [cmp.Mu_Liquido(T, P) for cmp in self.componente]
             mu = MuL_Chemcad(self.fraccion, Mi, mui)
 
@@ -3961,7 +3730,7 @@ class Mezcla(config.Entity):
 
         if method == 0:
             Vi = [1/cmp.RhoL(T, P) for cmp in self.componente]
-            Mi = self._arraylize("M")
+            Mi = self.constants.M
             ki = [cmp.ThCond_Liquido(T, P, rho) for cmp in self.componente]
             k = ThL_Li(self.fraccion, Vi, Mi, ki)
         elif method == 1:
@@ -3981,24 +3750,24 @@ class Mezcla(config.Entity):
 
         # Calculate of low pressure viscosity
         if method == 0:
-            Mi = self._arraylize("M")
+            Mi = self.constants.M
             mui = [cmp.Mu_Gas(T, 101325, rho) for cmp in self.componente]
             ki = [cmp.ThCond_Gas(T, P, rho) for cmp in self.componente]
             ko = ThG_MasonSaxena(self.fraccion, Mi, mui, ki)
         elif method == 1:
-            Mi = self._arraylize("M")
-            Tbi = self._arraylize("Tb")
+            Mi = self.constants.M
+            Tbi = self.constants.Tb
             mui = [cmp.Mu_Gas(T, 101325, rho) for cmp in self.componente]
             ki = [cmp.ThCond_Gas(T, P, rho) for cmp in self.componente]
             ko = ThG_LindsayBromley(T, self.fraccion, Mi, Tbi, mui, ki)
         elif method == 2:
-            Tci = self._arraylize("Tc")
-            Vci = self._arraylize("Vc")
-            Mi = self._arraylize("M")
-            wi = self._arraylize("f_acent")
+            Tci = self.constants.Tc
+            Vci = self.constants.Vc
+            Mi = self.constants.M
+            wi = self.constants.f_acent
             Cvi = [cmp.Cv(T) for cmp in self.componente]
-            Di = self._arraylize("dipole", "Debye")
-            ki = [cmp._K_Chung() for cmp in self.componente]
+            Di = self.constants.dipole
+            ki = self.constants.K_Chung
             mu = MuG_Chung(T, self.fraccion, Tci, Vci, Mi, wi, Di, ki)
             ko = ThG_Chung(T, self.fraccion, Tci, Vci, Mi, wi, Cvi, mu)
 
@@ -4006,27 +3775,27 @@ class Mezcla(config.Entity):
         if P < 1e6:
             k = ko
         elif Pcorr == 0:
-            Tci = self._arraylize("Tc")
-            Pci = self._arraylize("Pc")
-            Vci = self._arraylize("Vc")
-            wi = self._arraylize("f_acent")
-            Mi = self._arraylize("M")
+            Tci = self.constants.Tc
+            Pci = self.constants.Pc
+            Vci = self.constants.Vc
+            wi = self.constants.f_acent
+            Mi = self.constants.M
             k = ThG_StielThodosYorizane(
                 T, self.fraccion, Tci, Pci, Vci, wi, Mi, 1/rho, ko)
         elif Pcorr == 1:
-            Tci = self._arraylize("Tc")
-            Vci = self._arraylize("Vc")
-            Zci = self._arraylize("Zc")
-            wi = self._arraylize("f_acent")
-            Mi = self._arraylize("M")
+            Tci = self.constants.Tc
+            Vci = self.constants.Vc
+            Zci = self.constants.Zc
+            wi = self.constants.f_acent
+            Mi = self.constants.M
             k = ThG_TRAPP(T, self.fraccion, Tci, Vci, Zci, wi, Mi, rho, ko)
         elif Pcorr == 2:
-            Tci = self._arraylize("Tc")
-            Vci = self._arraylize("Vc")
-            Mi = self._arraylize("M")
-            wi = self._arraylize("f_acent")
-            Di = self._arraylize("dipole", "Debye")
-            ki = [cmp._K_Chung() for cmp in self.componente]
+            Tci = self.constants.Tc
+            Vci = self.constants.Vc
+            Mi = self.constants.M
+            wi = self.constants.f_acent
+            Di = self.constants.dipole
+            ki = self.constants.K_Chung
             k = ThG_P_Chung(
                 T, self.fraccion, Tci, Vci, Mi, wi, Di, ki, rho, ko)
 
@@ -4060,7 +3829,8 @@ class Mezcla(config.Entity):
         if mezcla:
             self._bool = True
             self.ids = mezcla["ids"]
-            self.componente = [Componente(int(i)) for i in self.ids]
+            self.componente = [getComponente(int(i)) for i in self.ids]
+            self._setConstants()
             self.fraccion = [
                 unidades.Dimensionless(x) for x in mezcla["fraction"]]
             self.fraccion_masica = [
@@ -22,26 +22,112 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 # Module for project definition (pdf of equipment, configuration and many more)
 ###############################################################################
 
-import os
+from concurrent.futures import ProcessPoolExecutor
 from configparser import ConfigParser
+import logging
+import multiprocessing
+import os
 
-# from pygraph.classes.graph import graph
-# from pygraph.algorithms.cycles import find_cycle
-# try:
-   # from pygraph.readwrite.dot import write
-# except:
-   # from pygraph.readwrite.markup import write
-
-from lib.config import conf_dir
+from lib.config import conf_dir, setMainWindowConfig
 from lib.corriente import Corriente
 from equipment import equipments
 from equipment.flux import Mixer
 
 
+def _streamToJSON(stream):
+    """Return the json definition of stream, to send it to other process"""
+    if not stream:
+        return None
+    data = {}
+    stream.writeToJSON(data)
+    return data
+
+
+def _streamFromJSON(data):
+    """Return the stream instance from its json definition"""
+    stream = Corriente()
+    if data is not None:
+        stream.readFromJSON(data)
+    return stream
+
+
+def _initWorker(data):
+    """Initialize a worker process with the project config, as a dict with
+    the options of each section, so the streams are calculated with the same
+    thermodynamic methods and components than in the main process"""
+    config = ConfigParser()
+    config.read_dict(data)
+    setMainWindowConfig(config)
+
+
+def _calculateRemote(index, data, inputs):
+    """Calculate an equipment in a worker process
+
+    index: Index of equipment class in equipments list
+    data: Dict with the equipment definition, as saved in project files
+    inputs: Dict with the input streams kwargs in json format
+
+    Return the json definition of calculated equipment and its output
+    streams"""
+    equip = equipments[index]()
+    equip.readFromJSON(data)
+    kwargs = {}
+    for key, value in inputs.items():
+        if isinstance(value, list):
+            kwargs[key] = [_streamFromJSON(stream) for stream in value]
+        else:
+            kwargs[key] = _streamFromJSON(value)
+    equip(**kwargs)
+
+    result = {}
+    equip.writeToJSON(result)
+    return result, [_streamToJSON(stream) for stream in equip.salida]
+
+
 class Project(object):
+    """Class to define a project, the flowsheet with its equipments and
+    streams and the configuration
+
+    The flowsheet is solved in topological order, each equipment is
+    calculated only when all its input streams are updated. The recycle loops
+    are detected as strongly connected components of the flowsheet graph and
+    solved iteratively over a set of tear streams, using successive
+    substitution with optional Wegstein acceleration
+
+    Parameters to configure the recycle calculation:
+
+        maxIter: Maximum number of iterations in recycle loops
+        tolerance: Relative tolerance in tear streams variables
+        acceleration: Convergence acceleration method, "Wegstein" or None for
+            simple successive substitution
+        qmin, qmax: Bounds of Wegstein acceleration parameter
+
+    Only the items affected by a change are recalculated. Each stream keeps a
+    fingerprint, its temperature, pressure and component molar flows, and an
+    item is marked dirty only when any of its input streams change more than
+    changeTolerance from its fingerprint, so the propagation stop where an
+    equipment output don't change. The items recalculated in the last run,
+    with its changed output streams, are saved in changelog
+
+    The independent equipments, without dependences between them like the
+    branches after a divider or separated feed trains, can be calculated in
+    parallel in a pool of process, configured with workers, the number of
+    process to use, with 1 all the calculation is done in current process.
+    The worker processes are created with the startMethod of multiprocessing,
+    None for the platform default, and use the project config
+    """
     MAGIC_NUMBER = 0x3051E
     FILE_VERSION = 10
 
+    maxIter = 50
+    tolerance = 1e-5
+    acceleration = "Wegstein"
+    qmin = -5
+    qmax = 0
+    workers = 1
+    startMethod = None
+    changeTolerance = 1e-6
+
     def __init__(self, items={}, streams={}, config=None):
         """
         items: diccionario con los equipos
@@ -54,12 +140,19 @@ class Project(object):
             config.read(conf_dir+"pychemqtrc")
         self.config = config
         self.streams = streams
-        # self.graph = self.calGraph()
+
+        # Result of last recycle calculations, list with tuple with the
+        # tear streams, the iterations and the convergence status
+        self.recycles = []
+
+        # Incremental calculation status, streams fingerprint, items pending
+        # of calculation and log of items calculated in last run
+        self.fingerprints = {}
+        self._newFingerprints = {}
+        self.dirty = set()
+        self.changelog = []
 
         self.downToStream = {}
-#        import gv
-#        for item in items:
-#           print gv.tailof(item)
 
     def __bool__(self):
         return True
@@ -71,14 +164,6 @@ class Project(object):
     def streamCount(self):
         return len(self.streams)
 
-    # def calGraph(self):
-        # grafo = graph()
-        # for item in self.items:
-            # grafo.add_node(item, attrs=[("splines",  "")])
-        # for key, stream in self.streams.items():
-            # grafo.add_edge((stream[0], stream[1]), attrs=[("splines",  "")])
-        # return grafo
-
     def getObject(self, id):
         if id[0] in ["e", "i", "o"]:
             return self.items[id]
@@ -100,7 +185,6 @@ class Project(object):
     def addItem(self, id, obj):
         if id not in self.items:
             self.items[id] = obj
-            # self.graph.add_node(id)
 
     def setItem(self, id, obj):
         self.items["e%i" % id] = obj
@@ -129,7 +213,6 @@ class Project(object):
         stream = (up, down, ind_up, ind_down, obj)
         if id not in list(self.streams.keys()):
             self.streams[id] = stream
-            # self.graph.add_edge((up, down))
 
         if down[0] == "e":
             eq = self.items[down]
@@ -150,7 +233,7 @@ class Project(object):
     def getDownToStream(self, id):
         up, down, ind_up, ind_down, obj = self.streams[id]
         if down[0] == "e":
-            return self.getItem(int(down[1]))
+            return self.items[down]
         else:
             return obj
 
@@ -161,38 +244,445 @@ class Project(object):
                 lista.append((key, value))
         return lista
 
+    def getUpToEquip(self, str):
+        """Return the list of streams with input to the item str"""
+        lista = []
+        for key, value in self.streams.items():
+            if value[1] == str:
+                lista.append((key, value))
+        return lista
+
+    def getGraph(self):
+        """Return the flowsheet as a directed graph, a dict with the items as
+        keys and the list of (stream id, downstream item) as values"""
+        graph = {}
+        for key, (up, down, ind_up, ind_down, obj) in self.streams.items():
+            graph.setdefault(up, []).append((key, down))
+            graph.setdefault(down, [])
+        return graph
+
+    def getOrder(self, nodes=None):
+        """Return the strongly connected components of flowsheet graph in
+        topological order, using the Tarjan algorithm. Each component is a
+        list of items, a component with several items is a recycle loop
+
+        nodes: Optional set of items to restrict the graph"""
+        graph = self.getGraph()
+        if nodes is None:
+            nodes = set(graph)
+
+        index = {}
+        lowlink = {}
+        stack = []
+        onStack = set()
+        components = []
+        for root in sorted(nodes):
+            if root in index:
+                continue
+
+            # Iterative depth first search to avoid recursion limit in big
+            # flowsheets
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            onStack.add(root)
+            work = [(root, iter(graph[root]))]
+            while work:
+                node, children = work[-1]
+                for key, child in children:
+                    if child not in nodes:
+                        continue
+                    if child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        onStack.add(child)
+                        work.append((child, iter(graph[child])))
+                        break
+                    elif child in onStack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            item = stack.pop()
+                            onStack.remove(item)
+                            component.append(item)
+                            if item == node:
+                                break
+                        components.append(component)
+
+        # Tarjan algorithm return the components in reverse topological order
+        components.reverse()
+        return components
+
+    def getTearStreams(self, nodes):
+        """Return the tear streams of recycle loop with items nodes, the back
+        edges of a depth first search of the loop, so the loop without that
+        streams is acyclic"""
+        graph = self.getGraph()
+        nodes = set(nodes)
+        tears = []
+        visited = set()
+        active = set()
+        for root in sorted(nodes):
+            if root in visited:
+                continue
+            visited.add(root)
+            active.add(root)
+            work = [(root, iter(graph[root]))]
+            while work:
+                node, children = work[-1]
+                for key, child in children:
+                    if child not in nodes:
+                        continue
+                    if child in active:
+                        tears.append(key)
+                    elif child not in visited:
+                        visited.add(child)
+                        active.add(child)
+                        work.append((child, iter(graph[child])))
+                        break
+                else:
+                    work.pop()
+                    active.remove(node)
+        return tears
+
+    def hasCycle(self):
+        """Detect cycle in project"""
+        for component in self.getOrder():
+            if len(component) > 1 or self.getTearStreams(component):
+                return True
+        return False
+
+    def getDownstream(self, name):
+        """Return the set of items affected by a change in name"""
+        graph = self.getGraph()
+        if name[0] == "s":
+            up, down, ind_up, ind_down, obj = self.streams[int(name[1:])]
+            name = down
+        nodes = {name}
+        work = [name]
+        while work:
+            for key, child in graph.get(work.pop(), []):
+                if child not in nodes:
+                    nodes.add(child)
+                    work.append(child)
+        return nodes
+
     def run(self, name):
-        """Ejecuta el projecto de forma recursiva hasta que encuentra un equipo no resuelto"""
-        tipo = name[0]
-        ind = int(name[1])
-
-        if tipo == "i":
-            obj = self.getInput(ind)
-            if obj.status:
-                key, (up, down, ind_up, ind_down, oldobj) = self.getDownToEquip(name)[0]
-                self.setStream(key, obj)
-                self.run("s%i" % key)
-
-        elif tipo == "e":
-            obj = self.getItem(ind)
-            if obj.status:
-                for key, (up, down, ind_up, ind_down, oldobj) in self.getDownToEquip(name):
-                    self.setStream(key, obj.salida[ind_up])
-                    self.run("s%i" % key)
-
-        elif tipo == "s":
-            up, down, ind_up, ind_down, stream = self.streams[ind]
-            if stream.status:
-                if down[0] == "e":
-                    equip = self.items[down]
-                    if isinstance(equip, Mixer):
-                        kwargs = {"entrada": stream, "id_entrada": ind_down}
+        """Calculate the flowsheet downstream of the changed item name, in
+        topological order and solving the recycle loops"""
+        self._newFingerprints = {}
+        if name[0] == "s":
+            up, down, ind_up, ind_down, stream = self.streams[int(name[1:])]
+            self._newFingerprints[int(name[1:])] = self._streamVector(stream)
+            self.dirty.add(down)
+        else:
+            self.dirty.add(name)
+        self._run(self.getDownstream(name), name)
+
+    def solve(self):
+        """Calculate the whole flowsheet, used to solve a project loaded from
+        file or after several changes done without calculation"""
+        self._newFingerprints = {}
+        nodes = set(self.getGraph())
+        self.dirty.update(nodes)
+        self._run(nodes)
+
+    def _run(self, nodes, name=None):
+        """Calculate the items nodes marked as dirty
+
+        nodes: Set of items to calculate
+        name: Optional changed item, if it's an equipment it's already
+            calculated"""
+        self.recycles = []
+        self.changelog = []
+        components = self.getOrder(nodes)
+
+        # Calculate the level of each component, the components in the same
+        # level are independent and can be calculated in parallel
+        position = {}
+        for i, component in enumerate(components):
+            for node in component:
+                position[node] = i
+        levels = []
+        level = {}
+        for i, component in enumerate(components):
+            lvl = 0
+            for node in component:
+                for key, value in self.getUpToEquip(node):
+                    j = position.get(value[0])
+                    if j is not None and j != i:
+                        lvl = max(lvl, level[j]+1)
+            level[i] = lvl
+            if lvl == len(levels):
+                levels.append([])
+            levels[lvl].append(component)
+
+        executor = None
+        try:
+            for group in levels:
+                remote = []
+                for component in group:
+                    if not self.dirty.intersection(component):
+                        continue
+                    tears = self.getTearStreams(component)
+                    node = component[0]
+                    if tears:
+                        self._solveRecycle(component, tears)
+                    elif node[0] == "e" and node != name and \
+                            self.workers > 1:
+                        remote.append(node)
                     else:
-                        kwargs = {equip.kwargsInput[ind_down]: stream}
-                    equip(**kwargs)
-                    self.run(down)
-                elif down[0] == "o":
-                    self.setOutput(int(down[1]), stream)
+                        # The changed equipment is already calculated, only
+                        # its output streams must be updated
+                        self._calculateItem(node, node != name)
+
+                if len(remote) == 1:
+                    self._calculateItem(remote[0])
+                elif remote:
+                    if executor is None:
+                        executor = self._executor()
+                    self._calculateParallel(executor, remote)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            self.fingerprints.update(self._newFingerprints)
+
+    def _executor(self):
+        """Return the process pool to calculate the equipments, the workers
+        are initialized with the project config"""
+        config = {section: dict(self.config.items(section, raw=True))
+                  for section in self.config.sections()}
+        return ProcessPoolExecutor(
+            self.workers, multiprocessing.get_context(self.startMethod),
+            _initWorker, (config, ))
+
+    def _calculateParallel(self, executor, names):
+        """Calculate the independent equipments names in the process pool
+        executor, and update the equipments and its output streams with the
+        results"""
+        futures = {}
+        for name in names:
+            kwargs = self._inputKwargs(name)
+            if not kwargs:
+                continue
+            inputs = {}
+            for key, value in kwargs.items():
+                if isinstance(value, list):
+                    inputs[key] = [_streamToJSON(stream) for stream in value]
+                else:
+                    inputs[key] = _streamToJSON(value)
+
+            equip = self.items[name]
+            data = {}
+            equip.writeToJSON(data)
+            index = equipments.index(equip.__class__)
+            futures[name] = (kwargs, executor.submit(
+                _calculateRemote, index, data, inputs))
+
+        for name, (kwargs, future) in futures.items():
+            data, salida = future.result()
+            equip = self.items[name]
+            if isinstance(equip, Mixer):
+                equip.cleanOldValues(**kwargs)
+            else:
+                equip.kwargs.update(kwargs)
+            equip.readFromJSON(data)
+            equip.salida = [_streamFromJSON(stream) for stream in salida]
+            self._calculateItem(name, False)
+
+    def _setStreamObject(self, id, obj):
+        """Change the Corriente instance of stream without calculation"""
+        stream = self.streams[id]
+        self.streams[id] = stream[0:4]+(obj, )
+
+    def _changedStream(self, id, obj):
+        """Update the stream id with the new calculated Corriente instance
+        and mark its downstream item as dirty if it's changed, return the
+        changed status"""
+        self._setStreamObject(id, obj)
+        new = self._streamVector(obj)
+        old = self.fingerprints.get(id)
+        self._newFingerprints[id] = new
+
+        changed = True
+        if new is not None and old is not None and len(new) == len(old):
+            changed = False
+            for xnew, xold in zip(new, old):
+                if abs(xnew-xold) > self.changeTolerance*max(abs(xold), 1):
+                    changed = True
+                    break
+        elif new is None and old is None:
+            changed = False
+
+        if changed:
+            self.dirty.add(self.streams[id][1])
+        return changed
+
+    def _calculateItem(self, name, calculate=True):
+        """Calculate the item name with its input streams and update its
+        output streams
+
+        calculate: Boolean to calculate the equipment, else only update its
+            output streams"""
+        changed = []
+        if name[0] == "i":
+            obj = self.items.get(name)
+            if obj is not None and obj.status:
+                for key, value in self.getDownToEquip(name):
+                    if self._changedStream(key, obj):
+                        changed.append(key)
+
+        elif name[0] == "o":
+            for key, (up, down, ind_up, ind_down, stream) in \
+                    self.getUpToEquip(name):
+                if stream.status:
+                    self.items[name] = stream
+
+        elif name[0] == "e":
+            equip = self.items[name]
+            if calculate and not self._calculateEquipment(name):
+                return
+
+            if equip.status:
+                for key, (up, down, ind_up, ind_down, obj) in \
+                        self.getDownToEquip(name):
+                    if self._changedStream(key, equip.salida[ind_up]):
+                        changed.append(key)
+            else:
+                # Equipment not calculable, it remain dirty
+                return
+
+        self.dirty.discard(name)
+        self.changelog.append((name, changed))
+
+    def _calculateEquipment(self, name):
+        """Calculate the equipment name with its defined input streams, return
+        False if there isn't any input stream defined"""
+        kwargs = self._inputKwargs(name)
+        if not kwargs:
+            return False
+
+        self.items[name](**kwargs)
+        return True
+
+    def _inputKwargs(self, name):
+        """Return the kwargs to define the input streams of equipment name"""
+        equip = self.items[name]
+        kwargs = {}
+        entrada = None
+        for key, (up, down, ind_up, ind_down, stream) in \
+                self.getUpToEquip(name):
+            if not stream.status:
+                continue
+            if isinstance(equip, Mixer):
+                # Mixer get all the inputs as a list in a single call
+                if entrada is None:
+                    entrada = equip.kwargs["entrada"][:]
+                while len(entrada) <= ind_down:
+                    entrada.append(Corriente())
+                entrada[ind_down] = stream
+            else:
+                kwargs[equip.kwargsInput[ind_down]] = stream
+        if entrada is not None:
+            kwargs["entrada"] = entrada
+        return kwargs
+
+    def _orderRecycle(self, nodes, tears):
+        """Return the calculation order of items in a recycle loop, the
+        topological order of the loop without tear streams"""
+        graph = self.getGraph()
+        nodes = set(nodes)
+        inputs = {node: 0 for node in nodes}
+        for node in nodes:
+            for key, child in graph[node]:
+                if child in nodes and key not in tears:
+                    inputs[child] += 1
+
+        order = []
+        work = sorted(node for node in nodes if not inputs[node])
+        while work:
+            node = work.pop(0)
+            order.append(node)
+            for key, child in graph[node]:
+                if child in nodes and key not in tears:
+                    inputs[child] -= 1
+                    if not inputs[child]:
+                        work.append(child)
+        return order
+
+    @staticmethod
+    def _streamVector(stream):
+        """Return the iteration variables of a tear stream, temperature,
+        pressure and unitary molar flows"""
+        if not stream or not stream.status:
+            return None
+        return [stream.T, stream.P] + list(stream.caudalunitariomolar)
+
+    @staticmethod
+    def _vectorStream(stream, x):
+        """Return a stream clone with the iteration variables x"""
+        return stream.clone(T=x[0], P=x[1], x=None,
+                            caudalUnitarioMolar=list(x[2:]),
+                            caudalUnitarioMasico=[], fraccionMolar=[],
+                            fraccionMasica=[], caudalMasico=0.0,
+                            caudalMolar=0.0, caudalVolumetrico=0.0)
+
+    def _solveRecycle(self, nodes, tears):
+        """Solve a recycle loop by iteration over its tear streams"""
+        order = self._orderRecycle(nodes, tears)
+        logging.info("Recycle loop %s, tear streams %s" % (order, tears))
+
+        xold = {}
+        gold = {}
+        converged = False
+        for iteration in range(1, self.maxIter+1):
+            x = {key: self._streamVector(self.getStream(key)) for key in tears}
+            for name in order:
+                self._calculateItem(name)
+            g = {key: self._streamVector(self.getStream(key)) for key in tears}
+
+            # Loop not yet fully defined, the tear streams are calculated in
+            # the first iteration
+            if None in x.values() or None in g.values():
+                if None in g.values() and iteration > 1:
+                    break
+                continue
+
+            error = 0
+            for key in tears:
+                for xi, gi in zip(x[key], g[key]):
+                    error = max(error, abs(gi-xi)/max(abs(gi), 1e-10))
+            if error < self.tolerance:
+                converged = True
+                break
+
+            if self.acceleration == "Wegstein" and gold:
+                for key in tears:
+                    xnew = []
+                    for xi, gi, xo, go in zip(
+                            x[key], g[key], xold[key], gold[key]):
+                        if xi != xo:
+                            s = (gi-go)/(xi-xo)
+                            q = s/(s-1) if s != 1 else self.qmin
+                            q = min(max(q, self.qmin), self.qmax)
+                        else:
+                            q = 0
+                        xnew.append(q*xi+(1-q)*gi)
+                    self._setStreamObject(
+                        key, self._vectorStream(self.getStream(key), xnew))
+            xold = x
+            gold = g
+
+        if converged:
+            logging.info("Recycle converged in %i iterations" % iteration)
+        else:
+            logging.warning("Recycle not converged in %i iterations" % iteration)
+        self.recycles.append((tears, iteration, converged))
 
     def writeToJSON(self, data):
         """Write the project to a dictionary to save to file in json format"""
@@ -293,24 +783,6 @@ class Project(object):
         if not huella:
             os.rename(conf_dir+"pychemqtrc_temporal_bak", conf_dir+"pychemqtrc_temporal")
 
-    # def printer(self):
-        # # Draw as PNG
-        # dot = write(self.graph)
-        # gvv = gv.readstring(dot)
-        # gv.layout(gvv, 'dot')
-        # gv.render(gvv, 'png', 'project.png')
-
-    # def cycle(self):
-        # cicle = find_cycle(self.graph)
-        # if cicle:
-            # return cicle
-        # else:
-            # return None
-
-    # def hasCycle(self):
-        # """Detect cycle in project"""
-        # cicle = self.cycle()
-        # return bool(cicle)
 
 
 if __name__ == '__main__':
@@ -29,7 +29,7 @@ from scipy.optimize import leastsq
 from scipy.special import erf
 from PyQt5.QtWidgets import QApplication
 
-from lib.compuestos import Componente
+from lib.compuestos import getComponente
 from lib.config import Entity, getMainWindowConfig
 from lib.unidades import Density, MassFlow, Length, Temperature
 
@@ -88,7 +88,7 @@ class Solid(Entity):
                 self.ids = eval(txt)
             else:
                 self.ids = txt
-        self.componente = [Componente(int(i)) for i in self.ids]
+        self.componente = [getComponente(int(i)) for i in self.ids]
 
         caudal = self.kwargs.get("caudalSolido", [])
         diametro_medio = self.kwargs.get("diametroMedio", 0.0)
@@ -242,7 +242,7 @@ class Solid(Entity):
             self._bool = True
             self.status = solid["status"]
             self.ids = solid["ids"]
-            self.componente = [Componente(int(i)) for i in self.ids]
+            self.componente = [getComponente(int(i)) for i in self.ids]
             self.caudalUnitario = [MassFlow(q) for q in solid["unitFlow"]]
             self.caudal = MassFlow(solid["caudal"])
             self.diametros = [Length(d, "m", "ParticleDiameter") for d in solid["diametros"]]
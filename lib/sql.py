@@ -25,12 +25,15 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 #   -updateElement: Update element with indice in database
 #   -deleteElement: Delete Element with indice from custom Database
 #   -getElement: Get element from database
+#   -getElements: Get several elements from database
 #   -copyElement: Create a copy of element of indice in custom Database
+#   -clearCache: Clear the cache of elements
 ###############################################################################
 
 
 import os
 import sqlite3
+from urllib.request import pathname2url
 
 
 databank_name = os.path.join(os.environ["pychemqt"], 'dat', 'databank.db')
@@ -47,6 +50,33 @@ if os.path.isfile(databank_Custom_name):
 else:
     N_comp_Custom = 0
 
+# Shared read only connections to databases, opened on first use
+_connections = {}
+
+# Cache of elements read from databases, as {indice: row}
+_elements = {}
+
+
+def _getConnection(name):
+    """Return the shared read only connection to the database with filename
+    name. The connections are opened by process, a sqlite connection can't be
+    used in a forked child process"""
+    key = (os.getpid(), name)
+    if key not in _connections:
+        uri = "file:%s?mode=ro" % pathname2url(name)
+        _connections[key] = sqlite3.connect(
+            uri, uri=True, check_same_thread=False)
+    return _connections[key]
+
+
+def clearCache(indice=None):
+    """Clear the cache of elements, all or only the element with indice,
+    it must be called after any change in the databases"""
+    if indice is None:
+        _elements.clear()
+    else:
+        _elements.pop(indice, None)
+
 
 def transformElement(elemento):
     vals = []
@@ -183,6 +213,7 @@ def inserElementsFromArray(name, lista):
         curs.execute(query+str(tuple(vals)))
     conn.commit()
     conn.close()
+    clearCache()
 
 
 def updateElement(elemento, indice):
@@ -247,6 +278,7 @@ def updateElement(elemento, indice):
                          % (variable, valor, indice))
     conn.commit()
     conn.close()
+    clearCache(indice)
 
 
 def deleteElement(indice):
@@ -256,20 +288,48 @@ def deleteElement(indice):
     curs.execute("DELETE FROM compuestos WHERE id=%i" % indice)
     conn.commit()
     conn.close()
+    clearCache(indice)
 
 
 def getElement(indice):
     """Get element from database
-    indice: index in databank of element"""
-    if indice > 1000:
-        db_Custom = sqlite3.connect(databank_Custom_name).cursor()
-        db_Custom.execute("select * from compuestos where id==%i" % indice)
-        componente = db_Custom.fetchone()
-    else:
-        db = sqlite3.connect(databank_name).cursor()
-        db.execute("select * from compuestos where id==%i" % indice)
-        componente = db.fetchone()
-    return componente
+    indice: index in databank of element
+
+    >>> getElement(2)[1:3]
+    ('CH4', 'Methane')
+    """
+    if indice not in _elements:
+        if indice > 1000:
+            name = databank_Custom_name
+        else:
+            name = databank_name
+        curs = _getConnection(name).execute(
+            "select * from compuestos where id==?", (indice, ))
+        componente = curs.fetchone()
+        if componente is None:
+            return None
+        _elements[indice] = componente
+    return _elements[indice]
+
+
+def getElements(indices):
+    """Get several elements from database with only a query for each
+    database, the elements are returned in the same order as indices
+
+    >>> [cmp[1] for cmp in getElements([4, 1, 2])]
+    ['C3H8', 'H2', 'CH4']
+    """
+    indices = [int(i) for i in indices]
+    missing = [i for i in indices if i not in _elements]
+    for name, ids in (
+            (databank_name, [i for i in missing if i <= 1000]),
+            (databank_Custom_name, [i for i in missing if i > 1000])):
+        if ids:
+            query = "select * from compuestos where id in (%s)" % \
+                ",".join("?"*len(ids))
+            for componente in _getConnection(name).execute(query, ids):
+                _elements[componente[0]] = componente
+    return [_elements.get(i) for i in indices]
 
 
 def copyElement(indice):
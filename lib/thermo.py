@@ -35,6 +35,33 @@ from iapws._utils import getphase
 from lib import unidades
 
 
+class _LazyProperty(object):
+    """Descriptor of a property deferred in lazy mode, it calculate the
+    property group in the first access. The value is saved in the instance
+    dict so the next accesses don't use the descriptor"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        lazy = instance.__dict__.get("_lazy")
+        if not lazy or self.name not in lazy:
+            raise AttributeError(self.name)
+        _fillLazyGroup(lazy, lazy[self.name])
+        return instance.__dict__[self.name]
+
+
+def _fillLazyGroup(lazy, group):
+    """Calculate a group of properties deferred in lazy mode and remove it
+    from the pending dict"""
+    for key in [k for k, g in lazy.items() if g is group]:
+        del lazy[key]
+    function, args = group
+    function(*args)
+
+
 class Thermo(object):
     """Class with common functionality for special thermo model, children class
     are iapws, coolprop, refprop"""
@@ -54,6 +81,31 @@ class Thermo(object):
         self.kwargs = self.__class__.kwargs.copy()
         self.__call__(**kwargs)
 
+    def _setLazy(self, keys, function, *args):
+        """Defer the calculation of a group of properties to the first access
+        to any of them
+        keys: name of properties calculated by function
+        function: procedure to define the properties, called with args"""
+        cls = self.__class__
+        for key in keys:
+            if not hasattr(cls, key):
+                setattr(cls, key, _LazyProperty(key))
+            elif not isinstance(getattr(cls, key), _LazyProperty):
+                # Name used by class, the group can't be deferred
+                function(*args)
+                return
+
+        lazy = self.__dict__.setdefault("_lazy", {})
+        group = (function, args)
+        for key in keys:
+            lazy[key] = group
+
+    def fillLazy(self):
+        """Calculate all the properties pending in lazy mode"""
+        lazy = self.__dict__.get("_lazy")
+        while lazy:
+            _fillLazyGroup(lazy, next(iter(lazy.values())))
+
     def _new(self, **kw):
         """Create a new instance"""
         return self.__class__(**kw)
@@ -0,0 +1,712 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+'''Pychemqt, Chemical Engineering Process simulator
+Copyright (C) 2009-2017, Juan José Gómez Romera <jjgomera@gmail.com>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
+
+
+###############################################################################
+# Tabular Taylor Series Expansion (TTSE) backend for multiparameter equations
+# of state
+#   o   Tables of T, rho, s and its derivatives over a (log P, h) grid
+#   o   Second order Taylor series expansion from the nearest node
+#   o   Error bound checked in each cell against the full equation of state
+#
+#   getTTSE: Return the shared TTSE instance of a fluid
+###############################################################################
+
+import hashlib
+import os
+
+from numpy import (arange, argmin, asarray, broadcast_arrays, clip, errstate,
+                   floor, full, isfinite, isin, linspace, load, nan, nanmax,
+                   nanmin, nonzero, ones, rint, savez, searchsorted, where,
+                   zeros)
+from scipy import exp, log
+from scipy.interpolate import PchipInterpolator
+
+from lib.config import conf_dir
+from lib.meos import _hashConstants
+
+
+# Tables in memory, indexed by file name
+_tables = {}
+
+# TTSE instances, indexed by fluid name and equation index
+_instances = {}
+
+# Name of node arrays saved in tables
+_nodeKeys = ["T", "rho", "s"]
+_derivativeKeys = ["_h", "_p", "_hh", "_pp", "_hp"]
+_satKeys = ["satP", "satT", "satrhoL", "satrhoV", "sathL", "sathV", "satsL",
+            "satsV"]
+
+
+def _diff(y, phase, dx):
+    """Finite differences derivative of y along the last axis, only between
+    nodes of compatible phase, using central differences where possible and
+    one-sided differences at the boundaries of regions"""
+    ok = isfinite(y) & (phase >= 0)
+    link = ok[:, :-1] & ok[:, 1:] & (
+        (phase[:, :-1] == phase[:, 1:]) | (phase[:, :-1] == 2) |
+        (phase[:, 1:] == 2))
+    fwd = full(y.shape, nan)
+    with errstate(invalid="ignore"):
+        fwd[:, :-1] = where(link, (y[:, 1:]-y[:, :-1])/dx, nan)
+    bwd = full(y.shape, nan)
+    bwd[:, 1:] = fwd[:, :-1]
+    central = (fwd+bwd)/2
+    d = where(isfinite(central), central,
+              where(isfinite(fwd), fwd, where(isfinite(bwd), bwd, 0)))
+    return where(ok, d, nan)
+
+
+class TTSE(object):
+    """Tabular Taylor Series Expansion backend for a MEoS fluid
+
+    The tables store the temperature, density and entropy, with its first
+    and second derivatives, over a regular grid in logarithm of pressure and
+    enthalpy. The first derivatives are calculated analytically from the
+    Helmholtz equation, the second derivatives by finite differences of the
+    first derivatives. A property at any point is calculated with the second
+    order Taylor series expansion from the nearest node of the same phase.
+    The two phase region is calculated with the saturation tables of MEoS.
+
+    The tables are calculated the first time and saved in the user config
+    folder, later instances of the same fluid reuse them.
+
+    Parameters
+    ----------
+    fluid : MEoS
+        MEoS class of fluid, the equation must be a Helmholtz equation
+    eq : int
+        Index of equation of state to use
+    ref : str, optional
+        Reference state, OTO | NBP | IIR | ASHRAE | CUSTOM
+    refvalues : list, optional
+        Custom values of reference state
+    NP : int
+        Number of nodes in pressure
+    Nh : int
+        Number of nodes in enthalpy
+    error : float
+        Maximum relative error in temperature and density allowed, the
+        points in cells with greater error return nan, so the calculation
+        must be done with the full equation of state
+    build : bool
+        Calculate the tables if they aren't saved, else raise LookupError
+
+    Examples
+    --------
+    >>> from lib.mEoS import CH4
+    >>> table = TTSE(CH4)
+    >>> st = CH4(T=300, P=5e6)
+    >>> prop = table.batch(P=5e6, h=st.h)
+    >>> "%0.3f %0.3f" % (prop["T"], prop["rho"])
+    '300.000 34.972'
+
+    Isentropic expansion to the two phase region
+
+    >>> prop = table.batch(P=1e5, s=st.s)
+    >>> "%0.2f %0.4f" % (prop["T"], prop["x"])
+    '111.51 0.9932'
+    >>> "%0.1f %0.1f" % (CH4(P=1e5, x=float(prop["x"])).s, st.s)
+    '-2129.4 -2129.4'
+    """
+
+    def __init__(self, fluid, eq=0, ref=None, refvalues=None, NP=100,
+                 Nh=200, error=1e-4, build=True):
+        self.fluid = fluid
+        self.kwargs = {"eq": eq, "ref": ref, "refvalues": refvalues}
+        self.error = error
+
+        st = fluid(**self.kwargs)
+        eq = st._setEquation()
+        if st._eq != st._Helmholtz or not isinstance(eq, int):
+            raise NotImplementedError("TTSE tables only available for " +
+                                      "Helmholtz equations")
+        self._st = st
+
+        name = "%s-%i-ttse-%ix%i" % (fluid.__name__, eq, NP, Nh)
+        txt = "%s %r" % (_hashConstants(st._constants),
+                         (st.Tref, st.Pref, st.ho, st.so))
+        key = hashlib.md5(txt.encode()).hexdigest()
+
+        if name in _tables and _tables[name]["hash"] == key:
+            table = _tables[name]
+        else:
+            filename = os.path.join(conf_dir, "meos", name+".npz")
+            table = None
+            try:
+                with load(filename) as archivo:
+                    if str(archivo["hash"]) == key:
+                        table = {k: archivo[k] for k in archivo.files}
+            except (OSError, ValueError, KeyError):
+                pass
+
+            if table is None:
+                if not build:
+                    raise LookupError("TTSE tables of %s not built" % name)
+                table = self._build(NP, Nh)
+                table["hash"] = key
+                try:
+                    if not os.path.isdir(os.path.dirname(filename)):
+                        os.makedirs(os.path.dirname(filename))
+                    savez(filename, **table)
+                except OSError:
+                    pass
+
+            table["hash"] = key
+            _tables[name] = table
+
+        self.table = table
+        self._setInterpolators()
+        if ref is None and refvalues is None and NP == 100 and Nh == 200:
+            _instances[(fluid.__name__, self.kwargs["eq"])] = self
+
+    def _setInterpolators(self):
+        """Define the derived data of tables used in queries"""
+        table = self.table
+        self.lP = table["lP"]
+        self.h = table["h"]
+        self.dlP = self.lP[1]-self.lP[0]
+        self.dh = self.h[1]-self.h[0]
+
+        # Monotone splines of saturation properties in log P
+        self.sat = {}
+        if table["satP"].size > 1:
+            self.Pcsat = exp(table["satP"][-1])
+            for key in _satKeys[1:]:
+                self.sat[key[3:]] = PchipInterpolator(table["satP"],
+                                                      table[key])
+        else:
+            self.Pcsat = 0
+
+        # Nearest node with a compatible phase for each node, liquid side,
+        # vapor side and any phase
+        phase = table["phase"]
+        self.near = []
+        for allowed in ((0, 2), (1, 2), (0, 1, 2)):
+            near = -ones(phase.shape, dtype=int)
+            cols = arange(phase.shape[1])
+            for i in range(phase.shape[0]):
+                idx = nonzero(isin(phase[i], allowed))[0]
+                if not idx.size:
+                    continue
+                pos = searchsorted(idx, cols)
+                left = idx[clip(pos-1, 0, idx.size-1)]
+                right = idx[clip(pos, 0, idx.size-1)]
+                near[i] = where(cols-left <= right-cols, left, right)
+            self.near.append(near)
+
+    def _build(self, NP, Nh):
+        """Calculate the tables with the full equation of state"""
+        st = self._st
+        R = float(st.R)
+        Tmin = max(float(st.Tt), st._constants["Tmin"])
+        Tmax = st._constants["Tmax"]
+        Pmax = st._constants["Pmax"]*1000
+
+        sat = st._saturationTable()
+        if not sat:
+            raise NotImplementedError("TTSE tables need the saturation table")
+        Pmin = exp(sat["Ps"](sat["T"][0]))
+        lP = linspace(log(Pmin), log(Pmax), NP)
+        P = exp(lP)
+
+        # Saturation properties from the saturation table of MEoS
+        Ts = asarray(sat["T"])
+        rl, rv, conv = st._saturationNewton(Ts, sat["rhoL"](Ts),
+                                            sat["rhoG"](Ts))
+        Ts, rl, rv = Ts[conv], rl[conv], rv[conv]
+        liq = st._HelmholtzArray(rl, Ts)
+        vap = st._HelmholtzArray(rv, Ts)
+        table = {"satP": log(vap["P"]), "satT": Ts, "satrhoL": rl,
+                 "satrhoV": rv, "sathL": liq["h"]*1000,
+                 "sathV": vap["h"]*1000, "satsL": liq["s"]*1000,
+                 "satsV": vap["s"]*1000}
+
+        # Saturation state of each row
+        sub = P < exp(table["satP"][-1])
+        hL = full(NP, nan)
+        hV = full(NP, nan)
+        TL = full(NP, nan)
+        rL = full(NP, nan)
+        rV = full(NP, nan)
+        if sub.any():
+            Tsat = sat["T_Ps"](lP[sub])
+            rho1, rho2, conv = st._saturationNewton(
+                Tsat, sat["rhoL"](Tsat), sat["rhoG"](Tsat))
+            TL[sub] = where(conv, Tsat, nan)
+            rL[sub] = where(conv, rho1, nan)
+            rV[sub] = where(conv, rho2, nan)
+            hL[sub] = st._HelmholtzArray(rho1, Tsat)["h"]*1000
+            hV[sub] = st._HelmholtzArray(rho2, Tsat)["h"]*1000
+            sub[sub] = conv
+
+        # Guide isobars to get the initial values of nodes
+        Tg = linspace(Tmin, Tmax, 2*Nh)
+        TT, PP = broadcast_arrays(Tg[None, :], P[:, None])
+        TT = TT.copy()
+        PP = PP.copy()
+        with errstate(all="ignore"):
+            rg = st._solveRhoArray(TT, PP)
+            hg = st._HelmholtzArray(rg, TT)["h"]*1000
+
+        h = linspace(nanmin(hg), nanmax(hg), Nh)
+
+        T0 = full((NP, Nh), nan)
+        r0 = full((NP, Nh), nan)
+        phase = -ones((NP, Nh), dtype=int)
+        for i in range(NP):
+            ok = isfinite(hg[i]) & isfinite(rg[i]) & (rg[i] > 0)
+            if sub[i]:
+                branch = [(ok & (hg[i] < hL[i]), h < hL[i], 0,
+                           hL[i], TL[i], rL[i]),
+                          (ok & (hg[i] > hV[i]), h > hV[i], 1,
+                           hV[i], TL[i], rV[i])]
+            else:
+                branch = [(ok, ones(Nh, dtype=bool), 2, None, None, None)]
+
+            for guide, nodes, ph, hs, Ts, rs in branch:
+                hh = list(hg[i][guide])
+                tt = list(Tg[guide])
+                rr = list(rg[i][guide])
+                if hs is not None:
+                    # Add the saturation point as limit of branch
+                    if ph == 0:
+                        hh.append(hs)
+                        tt.append(Ts)
+                        rr.append(rs)
+                    else:
+                        hh.insert(0, hs)
+                        tt.insert(0, Ts)
+                        rr.insert(0, rs)
+                hh = asarray(hh)
+                if hh.size < 2 or (hh[1:] <= hh[:-1]).any():
+                    continue
+                nodes = nodes & (h >= hh[0]) & (h <= hh[-1])
+                T0[i, nodes] = PchipInterpolator(hh, tt)(h[nodes])
+                r0[i, nodes] = exp(PchipInterpolator(hh, log(rr))(h[nodes]))
+                phase[i, nodes] = ph
+
+        # Newton polishing of nodes
+        idx = nonzero(isfinite(T0) & isfinite(r0))
+        PP, hh = broadcast_arrays(P[:, None], h[None, :])
+        T, rho, conv, prop = self._solve(PP[idx], hh[idx], T0[idx], r0[idx])
+        conv &= (T >= Tmin) & (T <= Tmax)
+
+        nodes = {}
+        for key in _nodeKeys:
+            for d in [""]+_derivativeKeys:
+                nodes[key+d] = full((NP, Nh), nan)
+        nodes["T"][idx] = T
+        nodes["rho"][idx] = rho
+        nodes["s"][idx] = prop["s"]*1000
+
+        # Analytic first derivatives
+        with errstate(all="ignore"):
+            Prho = prop["dpdrho"]
+            PT = -prop["drhodt"]*Prho
+            hT = prop["cv"]*1000+PT/rho
+            hrho = prop["dhdrho"]
+            det = PT*hrho-Prho*hT
+            sT = prop["cv"]*1000/T
+            srho = -PT/rho**2
+        P_ = PP[idx]
+        nodes["T_h"][idx] = -Prho/det
+        nodes["T_p"][idx] = hrho/det*P_
+        nodes["rho_h"][idx] = PT/det
+        nodes["rho_p"][idx] = -hT/det*P_
+        nodes["s_h"][idx] = sT*nodes["T_h"][idx]+srho*nodes["rho_h"][idx]
+        nodes["s_p"][idx] = sT*nodes["T_p"][idx]+srho*nodes["rho_p"][idx]
+
+        valid = zeros((NP, Nh), dtype=bool)
+        valid[idx] = conv
+        for key in _nodeKeys:
+            for d in ("", "_h", "_p"):
+                valid &= isfinite(nodes[key+d])
+        phase[~valid] = -1
+        for key in nodes:
+            nodes[key][~valid] = nan
+
+        # Numerical second derivatives
+        dlP = lP[1]-lP[0]
+        dh = h[1]-h[0]
+        for key in _nodeKeys:
+            nodes[key+"_hh"] = _diff(nodes[key+"_h"], phase, dh)
+            nodes[key+"_pp"] = _diff(nodes[key+"_p"].T, phase.T, dlP).T
+            nodes[key+"_hp"] = _diff(nodes[key+"_p"], phase, dh)
+
+        table.update(nodes)
+        table["lP"] = lP
+        table["h"] = h
+        table["phase"] = phase
+        table["hL"] = hL
+        table["hV"] = hV
+
+        # Check the error at the worst point of each cell
+        self.table = table
+        self._setInterpolators()
+        table["cellError"], table["cellErrorInverse"] = self._cellError()
+        return table
+
+    def _solve(self, P, h, T, rho):
+        """Newton iteration in temperature and density for arrays of pressure
+        and enthalpy with the full equation of state"""
+        st = self._st
+        T = asarray(T, dtype=float).copy()
+        rho = asarray(rho, dtype=float).copy()
+        conv = zeros(T.shape, dtype=bool)
+        todo = isfinite(T) & isfinite(rho)
+        with errstate(all="ignore"):
+            for it in range(50):
+                idx = nonzero(todo)
+                if not idx[0].size:
+                    break
+                t = T[idx]
+                r = rho[idx]
+                prop = st._HelmholtzArray(r, t)
+                fP = prop["P"]-P[idx]
+                fh = prop["h"]*1000-h[idx]
+                Prho = prop["dpdrho"]
+                PT = -prop["drhodt"]*Prho
+                hT = prop["cv"]*1000+PT/r
+                hrho = prop["dhdrho"]
+                det = PT*hrho-Prho*hT
+                dT = -(hrho*fP-Prho*fh)/det
+                drho = -(PT*fh-hT*fP)/det
+                dT = t*clip(dT/t, -0.2, 0.2)
+                drho = r*clip(drho/r, -0.5, 1)
+                T[idx] = t+dT
+                rho[idx] = r+drho
+                conv[idx] = (abs(dT) <= 1e-11*t) & (abs(drho) <= 1e-11*r)
+                todo[idx] = ~conv[idx] & isfinite(T[idx]) & isfinite(rho[idx])
+            prop = st._HelmholtzArray(rho, T)
+        conv &= isfinite(T) & isfinite(rho) & (rho > 0) & (prop["dpdrho"] > 0)
+        return T, rho, conv, prop
+
+    def _cellError(self):
+        """Calculate the maximum relative error in temperature and density of
+        each cell. The worst point of a cell with its four nodes valid is the
+        center, the cells near the saturation line or the limits of tables are
+        checked too near the corners and in the saturation line. Return two
+        arrays, the error of the direct P-h calculation and the error of the
+        inverse calculations, T-P and P-s, where the error in T and s of
+        tables propagates to the density"""
+        phase = self.table["phase"]
+        corners = [phase[:-1, :-1], phase[:-1, 1:], phase[1:, :-1],
+                   phase[1:, 1:]]
+        regular = ones(corners[0].shape, dtype=bool)
+        for c in corners:
+            regular &= (c == corners[0]) & (c >= 0)
+
+        lP0, h0 = broadcast_arrays(self.lP[:-1, None], self.h[None, :-1])
+        points = [(lP0+self.dlP/2, h0+self.dh/2)]
+        for fp in (0.02, 0.5, 0.98):
+            for fh in (0.02, 0.5, 0.98):
+                points.append((where(regular, nan, lP0+fp*self.dlP),
+                               h0+fh*self.dh))
+        if self.sat:
+            for fp in (0.02, 0.25, 0.5, 0.75, 0.98):
+                lP = lP0+fp*self.dlP
+                sub = exp(lP) < self.Pcsat
+                for key in ("hL", "hV"):
+                    hs = where(sub, self.sat[key](lP), nan)
+                    inside = (hs >= h0) & (hs <= h0+self.dh)
+                    points.append((lP, where(inside, hs, nan)))
+
+        error = zeros(lP0.shape)
+        errorInv = zeros(lP0.shape)
+        for lP, hp in points:
+            # Skip the points in two phase region
+            lP = asarray(lP, dtype=float)
+            if self.sat:
+                sub = exp(lP) < self.Pcsat
+                with errstate(invalid="ignore"):
+                    dome = sub & (hp > self.sat["hL"](lP)) & \
+                        (hp < self.sat["hV"](lP))
+                hp = where(dome, nan, hp)
+            idx = nonzero(isfinite(hp) & isfinite(lP))
+            P = exp(lP[idx])
+            prop = self._ph(P, hp[idx], check=None)
+            T, rho, conv, st = self._solve(P, hp[idx], prop["T"], prop["rho"])
+            with errstate(invalid="ignore"):
+                errT = abs(prop["T"]/T-1)
+                errRho = abs(prop["rho"]/rho-1)
+                err = where(errT > errRho, errT, errRho)
+                errS = abs(prop["s"]-st["s"]*1000)/st["cp"]/1000
+                k = abs(T/rho*st["drhodt"])
+                inv = err+(1+k)*(errT+errS)
+            err[~conv | ~isfinite(err)] = float("inf")
+            inv[~conv | ~isfinite(inv)] = float("inf")
+            error[idx] = where(err > error[idx], err, error[idx])
+            errorInv[idx] = where(inv > errorInv[idx], inv, errorInv[idx])
+        return error, errorInv
+
+    def _taylor(self, lP, h, side, derivative=None, check="cellError"):
+        """Second order Taylor series expansion from the nearest node of the
+        phase defined by side, return a dict with the T, rho and s values and
+        the derivative respect to enthalpy of the variable if it's requested.
+        The points in cells with an error greater than error bound, using the
+        cell error array defined by check, are returned as nan"""
+        table = self.table
+        NP, Nh = table["phase"].shape
+        i = clip(rint((lP-self.lP[0])/self.dlP).astype(int), 0, NP-1)
+        j0 = clip(rint((h-self.h[0])/self.dh).astype(int), 0, Nh-1)
+        j = self.near[2][i, j0]
+        for s in (0, 1):
+            j = where(side == s, self.near[s][i, j0], j)
+        ok = j >= 0
+        j = where(ok, j, 0)
+
+        Dp = lP-self.lP[i]
+        Dh = h-self.h[j]
+        prop = {}
+        for key in _nodeKeys:
+            prop[key] = table[key][i, j] + \
+                table[key+"_h"][i, j]*Dh + table[key+"_p"][i, j]*Dp + \
+                table[key+"_hh"][i, j]*Dh**2/2 + \
+                table[key+"_pp"][i, j]*Dp**2/2 + \
+                table[key+"_hp"][i, j]*Dh*Dp
+            prop[key] = where(ok, prop[key], nan)
+        if derivative:
+            prop["d"] = table[derivative+"_h"][i, j] + \
+                table[derivative+"_hh"][i, j]*Dh + \
+                table[derivative+"_hp"][i, j]*Dp
+
+        # Check the error bound of the cell
+        ic = floor((lP-self.lP[0])/self.dlP).astype(int)
+        jc = floor((h-self.h[0])/self.dh).astype(int)
+        inside = (ic >= 0) & (ic < NP-1) & (jc >= 0) & (jc < Nh-1)
+        ic = clip(ic, 0, NP-2)
+        jc = clip(jc, 0, Nh-2)
+        if check in table:
+            inside &= table[check][ic, jc] <= self.error
+        for key in _nodeKeys:
+            prop[key] = where(inside, prop[key], nan)
+        return prop
+
+    def _side(self, lP, value, key):
+        """Define the phase of points from the saturation values of variable
+        key, return the side array, with 0 liquid, 1 vapor, 2 supercritical
+        and -1 in two phase region, and the quality in that region"""
+        side = full(lP.shape, 2)
+        x = full(lP.shape, nan)
+        if self.sat:
+            sub = exp(lP) < self.Pcsat
+            lPs = lP[sub]
+            L = self.sat[key+"L"](lPs)
+            V = self.sat[key+"V"](lPs)
+            v = value[sub]
+            s = where(v <= L, 0, where(v >= V, 1, -1))
+            side[sub] = s
+            x[sub] = where(s == -1, (v-L)/(V-L), nan)
+        return side, x
+
+    def _twoPhase(self, lP, x, prop):
+        """Fill the properties of points in two phase region"""
+        idx = nonzero(isfinite(x))
+        if not idx[0].size:
+            return
+        lPs = lP[idx]
+        xi = x[idx]
+        prop["T"][idx] = self.sat["T"](lPs)
+        prop["rho"][idx] = 1/(xi/self.sat["rhoV"](lPs) +
+                              (1-xi)/self.sat["rhoL"](lPs))
+        prop["h"][idx] = self.sat["hL"](lPs)*(1-xi)+self.sat["hV"](lPs)*xi
+        prop["s"][idx] = self.sat["sL"](lPs)*(1-xi)+self.sat["sV"](lPs)*xi
+        prop["x"][idx] = xi
+
+    def _inRange(self, lP):
+        """Mask of pressure points inside the range of tables"""
+        return (lP >= self.lP[0]) & (lP <= self.lP[-1])
+
+    def _ph(self, P, h, check="cellError"):
+        """Calculate the state from pressure and enthalpy arrays"""
+        lP = log(P)
+        side, x = self._side(lP, h, "h")
+        prop = self._taylor(lP, h, side, check=check)
+        prop["h"] = h.copy()
+        prop["x"] = where(side == 0, 0., 1.)
+        self._twoPhase(lP, x, prop)
+        return prop
+
+    def _inverse(self, P, value, key):
+        """Calculate the state from pressure and other variable, T or s,
+        solving the enthalpy with a Newton iteration over the Taylor series
+        expansion"""
+        lP = log(P)
+        if key == "T":
+            side = full(lP.shape, 2)
+            x = full(lP.shape, nan)
+            if self.sat:
+                sub = P < self.Pcsat
+                Ts = self.sat["T"](lP[sub])
+                side[sub] = where(value[sub] < Ts, 0, 1)
+        else:
+            side, x = self._side(lP, value, key)
+
+        # Initial value from the nearest node in value
+        NP, Nh = self.table["phase"].shape
+        i = clip(rint((lP-self.lP[0])/self.dlP).astype(int), 0, NP-1)
+        j = zeros(lP.shape, dtype=int)
+        for start in range(0, lP.size, 1000):
+            sl = slice(start, start+1000)
+            row = self.table[key][i[sl]].copy()
+            ph = self.table["phase"][i[sl]]
+            sd = side[sl][:, None]
+            row[(ph < 0) | ((sd != 2) & (ph != 2) & (ph != sd))] = nan
+            with errstate(invalid="ignore"):
+                dif = abs(row-value[sl][:, None])
+            dif[~isfinite(dif)] = float("inf")
+            j[sl] = argmin(dif, axis=1)
+        h = self.h[j]
+
+        for it in range(30):
+            prop = self._taylor(lP, h, side, key, check=None)
+            with errstate(all="ignore"):
+                step = (prop[key]-value)/prop["d"]
+                step = where(isfinite(step), step, 0)
+                h = h-step
+            if (abs(step) <= 1e-12*abs(h)+1e-9).all():
+                break
+        prop = self._taylor(lP, h, side, check="cellErrorInverse")
+        prop["h"] = h
+        prop["x"] = where(side == 0, 0., 1.)
+        with errstate(invalid="ignore"):
+            fail = abs(prop[key]-value) > 1e-6*abs(value)+1e-6
+        for k in _nodeKeys+["h"]:
+            prop[k][fail] = nan
+        if key == "s":
+            self._twoPhase(lP, x, prop)
+        return prop
+
+    def batch(self, P, h=None, s=None, T=None):
+        """Bulk calculation of states with the tables for arrays of pressure
+        and a second variable, enthalpy, entropy or temperature
+
+        Parameters
+        ----------
+        P : array_like
+            Pressure, [Pa]
+        h : array_like, optional
+            Enthalpy, [J/kg]
+        s : array_like, optional
+            Entropy, [J/kg·K]
+        T : array_like, optional
+            Temperature, [K]
+
+        Returns
+        -------
+        prop : dict
+            Dict with the array of T, P, rho, h, s and x in SI base units,
+            the points out of tables or with an error greater than the
+            error bound are filled with nan
+        """
+        if h is not None:
+            key, value = "h", h
+        elif s is not None:
+            key, value = "s", s
+        elif T is not None:
+            key, value = "T", T
+        else:
+            raise ValueError("batch needs h, s or T as second input")
+
+        P, value = broadcast_arrays(asarray(P, dtype=float),
+                                    asarray(value, dtype=float))
+        shape = P.shape
+        P = P.ravel().copy()
+        value = value.ravel().copy()
+        with errstate(all="ignore"):
+            inside = self._inRange(log(P))
+        if key == "h":
+            prop = self._ph(P, value)
+        else:
+            prop = self._inverse(P, value, key)
+        prop["P"] = P
+        for k in prop:
+            prop[k] = where(inside, prop[k], nan).reshape(shape)
+        return {k: prop[k] for k in ("T", "P", "rho", "h", "s", "x")}
+
+    def state(self, **kwargs):
+        """Return a fluid instance defined by pressure and other variable,
+        enthalpy, entropy or temperature. Inside the tables and the error
+        bound the state is defined by the temperature and density of tables,
+        with the density corrected to keep the pressure exactly, and the
+        temperature too if it's an input, so the full equation of state is
+        only evaluated at that point. Out of tables the state is calculated
+        with the full equation of state. Other kwargs, as lazy, are passed to
+        the fluid
+
+        >>> from lib.mEoS import CH4
+        >>> st = TTSE(CH4).state(T=300, P=5e6, lazy=True)
+        >>> "%0.4f %0.4f %0.1f" % (st.rho, CH4(T=300, P=5e6).rho, st.P)
+        '34.9717 34.9717 5000000.0'
+        >>> h = CH4(T=150, P=5e6).h
+        >>> st = TTSE(CH4).state(P=5e6, h=h)
+        >>> "%0.3f %0.1f %0.1f" % (st.T, st.P, st.h-h)
+        '150.000 5000000.0 0.0'
+        """
+        kw = self.kwargs.copy()
+        inputs = {}
+        for key in ("P", "h", "s", "T"):
+            if key in kwargs:
+                inputs[key] = kwargs.pop(key)
+        kw.update(kwargs)
+
+        prop = self.batch(**inputs)
+        T = float(prop["T"])
+        rho = float(prop["rho"])
+        x = float(prop["x"])
+        if isfinite(T) and isfinite(rho):
+            if "T" in inputs:
+                T = inputs["T"]
+            if not 0 < x < 1:
+                rho = self._rhoTP(T, inputs["P"], rho)
+            if isfinite(rho):
+                return self.fluid(T=T, rho=rho, **kw)
+
+        # Out of tables or error bound
+        kw.update(inputs)
+        return self.fluid(**kw)
+
+    def _rhoTP(self, T, P, rho):
+        """Newton iteration in density with the full equation of state to
+        get the pressure P at temperature T, starting from the density rho
+        of tables, return nan if the iteration doesn't converge"""
+        for it in range(20):
+            prop = self._st._HelmholtzArray(rho, T)
+            if not prop["dpdrho"] > 0:
+                break
+            step = (prop["P"]-P)/prop["dpdrho"]
+            rho -= float(step)
+            if abs(step) <= 1e-12*rho:
+                return rho
+        return nan
+
+
+def getTTSE(fluid, eq=0):
+    """Return the TTSE instance of a MEoS fluid, None if the equation isn't a
+    Helmholtz equation. The instances are saved in memory so the tables are
+    loaded only once, the tables not saved yet are built in the first use"""
+    key = (fluid.__name__, eq)
+    if key not in _instances:
+        try:
+            _instances[key] = TTSE(fluid, eq)
+        except NotImplementedError:
+            _instances[key] = None
+    return _instances[key]
@@ -99,7 +99,35 @@ def K2Re(K):
     return (K - 273.15) / 1.25
 
 
-class unidad(float):
+class _Conversion(object):
+    """Descriptor to get the value of a unidad instance in a unit, calculated
+    on access from the base value with the conversion rate of that unit"""
+    __slots__ = ("rate", )
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance._data / self.rate
+
+
+class _UnitType(type):
+    """Metaclass for unidad classes, define the empty __slots__ in subclasses
+    and add the conversion descriptors for the units in rates, so the
+    instances don't need a __dict__ with a attribute for each unit"""
+
+    def __new__(mcs, name, bases, namespace):
+        namespace.setdefault("__slots__", ())
+        cls = type.__new__(mcs, name, bases, namespace)
+        for key, rate in cls.rates.items():
+            if key not in namespace:
+                setattr(cls, key, _Conversion(rate))
+        return cls
+
+
+class unidad(float, metaclass=_UnitType):
     """
     Generic class to model units
     Each child class must define the following parameters:
@@ -112,7 +140,17 @@ class unidad(float):
             Each magnitud is a tuple with format (Name, title)
         __units_set__: Dict with standart unit for units system,
             altsi, si, metric, cgs, english
+
+    The instance only save the value in the base unit, the value in other
+    unit is calculated when the attribute is accessed
+
+    >>> P = Pressure(1, "atm")
+    >>> "%0.3f %0.0f" % (P.bar, P.Pa)
+    '1.013 101325'
+    >>> hasattr(P, "__dict__")
+    False
     """
+    __slots__ = ("_data", "code", "magnitud")
     __title__ = ""
     rates = {}
     __text__ = []
@@ -122,29 +160,19 @@ class unidad(float):
     __units_set__ = []
 
     def __init__(self, data, unit="", magnitud=""):
-        """Non proportional magnitudes (Temperature, Pressure)
-        must rewrite this method"""
+        """The value in base unit is calculated in __new__, non proportional
+        magnitudes (Temperature, Pressure) must rewrite _getBaseValue"""
         if not magnitud:
             magnitud = self.__class__.__name__
         self.magnitud = magnitud
 
         if data is None:
-            self._data = 0
             self.code = "n/a"
         else:
-            self._data = float(data)
             self.code = ""
+        self._data = float(self)
 
-        if unit == "conf":
-            Config = getMainWindowConfig()
-            unit = self.__units__[Config.getint('Units', magnitud)]
-        elif not unit:
-            unit = self.__units__[0]
-        self._data = self._getBaseValue(data, unit, magnitud)
-        for key in self.__class__.rates:
-            self.__setattr__(key, self._data / self.__class__.rates[key])
-
-        logging.debug("%s, %f" % (self.__class__.__name__, self._data))
+        logging.debug("%s, %f", self.__class__.__name__, self._data)
 
     def __new__(cls, data, unit="", magnitud=""):
         if not magnitud:
@@ -247,6 +275,7 @@ class unidad(float):
 class Dimensionless(float):
     """Dummy class to integrate dimensionless magnitudes
 with support for class unidad operations: txt, config. func."""
+    __slots__ = ("_data", "code", "txt")
     __title__ = QApplication.translate("pychemqt", "Dimensionless")
     __text__ = []
     _magnitudes = []
@@ -261,7 +290,7 @@ with support for class unidad operations: txt, config. func."""
         else:
             self._data = data
             self.code = ""
-        logging.debug("%s, %f" % (self.__class__.__name__, self._data))
+        logging.debug("%s, %f", self.__class__.__name__, self._data)
 
     def __new__(cls, data, txt=""):
         """Discard superfluous parameters for this class"""
@@ -305,43 +334,25 @@ class Temperature(unidad):
     __test__ = [{"input": {"value": 25, "unit": "C"},
                  "prop": {"K": 298.15, "C": 25, "F": 77}}]
 
-    def __init__(self, data, unit="K", magnitud=""):
-
-        if not magnitud:
-            magnitud = self.__class__.__name__
-        self.magnitud = magnitud
+    @property
+    def K(self):
+        return self._data
 
-        if data is None:
-            data = 0
-            self.code = "n/a"
-        else:
-            data = float(data)
-            self.code = ""
+    @property
+    def C(self):
+        return K2C(self._data)
 
-        if unit == "conf":
-            Config = getMainWindowConfig()
-            unit = self.__units__[Config.getint('Units', magnitud)]
+    @property
+    def F(self):
+        return K2F(self._data)
 
-        if unit == "K":
-            self._data = data
-        elif unit == "C":
-            self._data = C2K(data)
-        elif unit == "F":
-            self._data = F2K(data)
-        elif unit == "R":
-            self._data = R2K(data)
-        elif unit == "Re":
-            self._data = Re2K(data)
-        else:
-            raise ValueError(
-                QApplication.translate("pychemqt", "Wrong input code"))
+    @property
+    def R(self):
+        return K2R(self._data)
 
-        self.K = self._data
-        self.C = K2C(self._data)
-        self.F = K2F(self._data)
-        self.R = K2R(self._data)
-        self.Re = K2Re(self._data)
-        logging.debug("%s, %f" % (self.__class__.__name__, self._data))
+    @property
+    def Re(self):
+        return K2Re(self._data)
 
     @classmethod
     def _getBaseValue(cls, data, unit, magnitud):
@@ -932,38 +943,17 @@ class Pressure(unidad):
                  "prop": {"bar": 1.01325, "atm": 1, "psi": 14.6959487755,
                           "kgcm2g": 0}}]
 
-    def __init__(self, data, unit="Pa", magnitud=""):
-
-        if data is None:
-            data = 0
-            self.code = "n/a"
-        else:
-            self.code = ""
-
-        if not magnitud:
-            magnitud = self.__class__.__name__
-        self.magnitud = magnitud
-
-        if unit == "conf":
-            Config = getMainWindowConfig()
-            unit = self.__units__[Config.getint('Units', magnitud)]
-
-        if unit == "barg":
-            self._data = data*k.bar+k.atm
-        elif unit == "psig":
-            self._data = data*k.psi+k.atm
-        elif unit == "kgcm2g":
-            self._data = data*k.g/k.centi**2+k.atm
-        else:
-            self._data = data * self.__class__.rates[unit]
+    @property
+    def barg(self):
+        return (self._data-k.atm)/k.bar
 
-        for key in self.__class__.rates:
-            self.__setattr__(key, self._data/self.__class__.rates[key])
+    @property
+    def psig(self):
+        return (self._data-k.atm)/k.psi
 
-        self.barg = (self.Pa-k.atm)/k.bar
-        self.psig = (self.Pa-k.atm)/k.psi
-        self.kgcm2g = (self.Pa-k.atm)*k.centi**2/k.g
-        logging.debug("%s, %f" % (self.__class__.__name__, self._data))
+    @property
+    def kgcm2g(self):
+        return (self._data-k.atm)*k.centi**2/k.g
 
     @classmethod
     def _getBaseValue(cls, data, unit, magnitud):
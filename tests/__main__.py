@@ -22,9 +22,11 @@ os.environ["PyQt5.Qsci"] = "False"
 
 from unittest import TextTestRunner, TestSuite
 from test_lib import TestLib
+from test_project import TestProject
 
 suite = TestSuite()
 suite.addTest(TestLib)
+suite.addTest(TestProject)
 
 runner = TextTestRunner()
 results = runner.run(suite)
@@ -0,0 +1,291 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Flowsheet calculation tests of lib.project
+
+
+from configparser import ConfigParser
+import json
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from unittest import TestCase, TestLoader, TestSuite
+
+import lib  # noqa
+from lib import config
+from lib.caseStudy import CaseStudy
+from lib.corriente import Corriente
+from lib.project import Project
+from equipment.flux import Mixer, Divider
+from equipment.heatExchanger import Heat_Exchanger
+from tools import batch
+
+
+path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def _config():
+    """Return a project config with water as component, calculated with the
+    meos equation"""
+    conf = ConfigParser()
+    conf.read_dict(config.getMainWindowConfig())
+    conf.set("Components", "Components", "[62]")
+    conf.set("Thermo", "MEoS", "True")
+    conf.set("Thermo", "iapws", "False")
+    conf.set("Thermo", "K", "4")
+    conf.set("Thermo", "H", "4")
+    return conf
+
+
+class ProjectTest(TestCase):
+    """Base class with the project config set as current config"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.oldConfig = config.getMainWindowConfig()
+        cls.config = _config()
+        config.setMainWindowConfig(cls.config)
+
+    @classmethod
+    def tearDownClass(cls):
+        config.setMainWindowConfig(cls.oldConfig)
+
+    def feed(self, **kwargs):
+        """Return the feed stream, water at 300 K and 1 atm, 1 kg/s"""
+        kw = {"T": 300, "P": 101325, "caudalMasico": 1, "ids": [62],
+              "fraccionMolar": [1]}
+        kw.update(kwargs)
+        return Corriente(**kw)
+
+    def recycle(self, workers=1):
+        """Return a flowsheet with a recycle loop, the feed is mixed with the
+        half of heated stream
+
+        i1 -s1-> e1 (Mixer) -s2-> e2 (Heat_Exchanger) -s3-> e3 (Divider)
+        e3 -s4-> o1, e3 -s5-> e1
+        """
+        project = Project(items={}, streams={}, config=self.config)
+        project.workers = workers
+        project.addItem("i1", self.feed())
+        project.addItem("e1", Mixer())
+        project.addItem("e2", Heat_Exchanger(Tout=350))
+        project.addItem("e3", Divider(salidas=2, split=[0.5, 0.5]))
+        project.addItem("o1", None)
+        project.addStream(1, "i1", "e1")
+        project.addStream(2, "e1", "e2", Corriente())
+        project.addStream(3, "e2", "e3", Corriente())
+        project.addStream(4, "e3", "o1", Corriente(), ind_up=0)
+        project.addStream(5, "e3", "e1", Corriente(), ind_up=1, ind_down=1)
+        return project
+
+    def branches(self, workers=1):
+        """Return a flowsheet with two independent branches after a divider
+
+        i1 -s1-> e1 (Divider) -s2-> e2 (Heat_Exchanger) -s4-> o1
+                              -s3-> e3 (Heat_Exchanger) -s5-> o2
+        """
+        project = Project(items={}, streams={}, config=self.config)
+        project.workers = workers
+        project.addItem("i1", self.feed())
+        project.addItem("e1", Divider(salidas=2, split=[0.3, 0.7]))
+        project.addItem("e2", Heat_Exchanger(Tout=350))
+        project.addItem("e3", Heat_Exchanger(Heat=-1e4))
+        project.addItem("o1", None)
+        project.addItem("o2", None)
+        project.addStream(1, "i1", "e1")
+        project.addStream(2, "e1", "e2", Corriente(), ind_up=0)
+        project.addStream(3, "e1", "e3", Corriente(), ind_up=1)
+        project.addStream(4, "e2", "o1", Corriente())
+        project.addStream(5, "e3", "o2", Corriente())
+        return project
+
+
+class Recycle(ProjectTest):
+    """Recycle loop solved by tearing"""
+
+    def test_order(self):
+        project = self.recycle()
+        order = project.getOrder()
+        self.assertEqual(order[0], ["i1"])
+        self.assertEqual(sorted(order[1]), ["e1", "e2", "e3"])
+        self.assertEqual(order[2], ["o1"])
+        self.assertEqual(project.getTearStreams(order[1]), [5])
+        self.assertTrue(project.hasCycle())
+
+    def test_solve(self):
+        project = self.recycle()
+        project.solve()
+
+        tears, iterations, converged = project.recycles[0]
+        self.assertEqual(tears, [5])
+        self.assertTrue(converged)
+        self.assertLess(iterations, project.maxIter)
+
+        # Mass balance, global and in the mixer
+        feed, mix, heated, out, recycle = [
+            project.getStream(i) for i in range(1, 6)]
+        self.assertAlmostEqual(out.caudalmasico, feed.caudalmasico, places=6)
+        self.assertAlmostEqual(mix.caudalmasico,
+                               feed.caudalmasico+recycle.caudalmasico,
+                               places=6)
+        self.assertAlmostEqual(recycle.caudalmasico, 1, places=6)
+
+        # Energy balance in the mixer
+        self.assertAlmostEqual(mix.h, feed.h+recycle.h, delta=1e-3)
+        self.assertAlmostEqual(heated.T, 350)
+        self.assertAlmostEqual(out.T, 350)
+
+
+class Parallel(ProjectTest):
+    """Independent equipments calculated in a process pool"""
+
+    def test_workers(self, startMethod=None):
+        serial = self.branches()
+        serial.solve()
+        parallel = self.branches(workers=2)
+        parallel.startMethod = startMethod
+        parallel.solve()
+
+        for id in range(1, 6):
+            st1 = serial.getStream(id)
+            st2 = parallel.getStream(id)
+            self.assertEqual(st2.status, 1)
+            self.assertAlmostEqual(st1.T, st2.T, places=6)
+            self.assertAlmostEqual(st1.P, st2.P, places=3)
+            self.assertAlmostEqual(st1.caudalmasico, st2.caudalmasico)
+            self.assertAlmostEqual(st1.h, st2.h, places=3)
+        self.assertEqual(sorted(serial.changelog), sorted(parallel.changelog))
+        self.assertAlmostEqual(parallel.getItem(3).HeatCalc, -1e4)
+
+    def test_spawn(self):
+        # The new worker processes don't inherit the current config, they
+        # must get the project config
+        project = self.branches(workers=2)
+        project.startMethod = "spawn"
+        with project._executor() as executor:
+            settings = executor.submit(config.getSettings).result()
+        self.assertEqual(settings, config.getSettings(self.config))
+        self.test_workers("spawn")
+
+    def test_recycle(self):
+        serial = self.recycle()
+        serial.solve()
+        parallel = self.recycle(workers=2)
+        parallel.solve()
+        self.assertEqual(serial.recycles, parallel.recycles)
+        for id in range(1, 6):
+            self.assertAlmostEqual(serial.getStream(id).T,
+                                   parallel.getStream(id).T, places=6)
+
+
+class Incremental(ProjectTest):
+    """Recalculation of only the items affected by a change"""
+
+    def test_downstream(self):
+        project = self.branches()
+        project.solve()
+        other = project.getStream(5)
+
+        project.getItem(2)(Tout=360)
+        project.run("e2")
+        self.assertEqual(project.changelog, [("e2", [4]), ("o1", [])])
+        self.assertAlmostEqual(project.getStream(4).T, 360)
+        self.assertIs(project.getStream(5), other)
+        self.assertFalse(project.dirty)
+
+    def test_unchanged(self):
+        project = self.branches()
+        project.solve()
+        streams = [project.getStream(id) for id in range(2, 6)]
+
+        # The same feed doesn't propagate the calculation
+        project.setInput(1, self.feed())
+        self.assertEqual(project.changelog, [("i1", [])])
+        for id, stream in zip(range(2, 6), streams):
+            self.assertIs(project.getStream(id), stream)
+
+    def test_recycle(self):
+        project = self.recycle()
+        project.solve()
+
+        project.getItem(2)(Tout=360)
+        project.run("e2")
+        names = [name for name, changed in project.changelog]
+        self.assertNotIn("i1", names)
+        self.assertIn("o1", names)
+        self.assertTrue(project.recycles[0][2])
+        self.assertAlmostEqual(project.getStream(4).T, 360)
+        self.assertAlmostEqual(project.getStream(4).caudalmasico, 1, places=6)
+
+
+class Study(ProjectTest):
+    """Parametric case study of a project"""
+
+    def test_run(self):
+        project = self.branches()
+        project.solve()
+        study = CaseStudy(project, [("e2.Tout", [340, 360])], ["s4.T"])
+
+        # The host config isn't changed by the calculation in process
+        current = _config()
+        config.setMainWindowConfig(current)
+        study.run()
+        self.assertIs(config.getMainWindowConfig(), current)
+        self.assertEqual(study.results["s4.T"], [340, 360])
+
+
+class Batch(TestCase):
+    """Headless batch runner of project files"""
+    sample = os.path.join(path, "Samples", "heatExchanger.pcq")
+
+    def setUp(self):
+        self.oldConfig = config.getMainWindowConfig()
+        self.dir = TemporaryDirectory()
+
+    def tearDown(self):
+        config.setMainWindowConfig(self.oldConfig)
+        self.dir.cleanup()
+
+    def test_cli(self):
+        out = os.path.join(self.dir.name, "results.json")
+        # Run out of the source folder, the imports don't depend on the
+        # working directory
+        process = subprocess.run(
+            [sys.executable, os.path.join(path, "tools", "batch.py"),
+             self.sample, "--set", "e1.Tout=340", "--set",
+             "s1.caudalMasico=2", "--out", out], cwd=self.dir.name,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.assertEqual(process.returncode, 0, process.stderr)
+
+        with open(out, "r") as file:
+            result = json.load(file)
+        self.assertEqual(result["equipment"]["e1"]["status"], 1)
+        self.assertEqual(result["streams"]["2"]["status"], 1)
+        self.assertAlmostEqual(result["streams"]["2"]["T"], 340)
+        self.assertAlmostEqual(result["streams"]["2"]["massFlow"], 2)
+
+    def test_cases(self):
+        cases = [{"e1.Tout": 320}, {"e1.Tout": 340}]
+        results = batch.runBatch([self.sample], cases, workers=2)
+        for case, result in zip(cases, results):
+            self.assertNotIn("error", result)
+            self.assertAlmostEqual(result["streams"][2]["T"],
+                                   case["e1.Tout"])
+
+    def test_error(self):
+        out = os.path.join(self.dir.name, "results.json")
+        missing = os.path.join(self.dir.name, "missing.pcq")
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(batch.main([missing, "--out", out]), 1)
+        with open(out, "r") as file:
+            self.assertIn("error", json.load(file))
+
+
+TestProject = TestSuite()
+loader = TestLoader()
+TestProject.addTest(loader.loadTestsFromTestCase(Recycle))
+TestProject.addTest(loader.loadTestsFromTestCase(Parallel))
+TestProject.addTest(loader.loadTestsFromTestCase(Incremental))
+TestProject.addTest(loader.loadTestsFromTestCase(Study))
+TestProject.addTest(loader.loadTestsFromTestCase(Batch))
@@ -78,28 +78,37 @@ class UI_confThermo_widget(QtWidgets.QWidget):
         self.MEoS = QtWidgets.QCheckBox(QtWidgets.QApplication.translate(
             "pychemqt", "Use MEoS for single compounds if it's available"))
         layout.addWidget(self.MEoS, 7, 0, 1, 3)
+        self.TTSE = QtWidgets.QCheckBox(QtWidgets.QApplication.translate(
+            "pychemqt", "Use TTSE interpolation tables (faster)"))
+        self.TTSE.setToolTip(QtWidgets.QApplication.translate(
+            "pychemqt", "The tables of each fluid are calculated in its first "
+            "use and saved for later use"))
+        self.TTSE.setEnabled(False)
+        layout.addWidget(self.TTSE, 8, 1, 1, 2)
         self.coolProp = QtWidgets.QCheckBox(QtWidgets.QApplication.translate(
             "pychemqt", "Use external library coolProp (faster)"))
         self.coolProp.setEnabled(False)
-        layout.addWidget(self.coolProp, 8, 1, 1, 2)
+        layout.addWidget(self.coolProp, 9, 1, 1, 2)
         self.refprop = QtWidgets.QCheckBox(QtWidgets.QApplication.translate(
             "pychemqt", "Use external library refprop (fastest)"))
         self.refprop.setEnabled(False)
-        layout.addWidget(self.refprop, 9, 1, 1, 2)
+        layout.addWidget(self.refprop, 10, 1, 1, 2)
 
         self.iapws = QtWidgets.QCheckBox(QtWidgets.QApplication.translate(
             "pychemqt", "Use IAPWS97 for water"))
-        layout.addWidget(self.iapws, 10, 0, 1, 3)
+        layout.addWidget(self.iapws, 11, 0, 1, 3)
         self.freesteam = QtWidgets.QCheckBox(QtWidgets.QApplication.translate(
             "pychemqt", "Use freesteam library (faster)"))
         self.freesteam.setEnabled(False)
-        layout.addWidget(self.freesteam, 11, 1, 1, 2)
+        layout.addWidget(self.freesteam, 12, 1, 1, 2)
         self.GERG = QtWidgets.QCheckBox(QtWidgets.QApplication.translate(
             "pychemqt", "Use GERG EoS for mix if it's posible"))
-        layout.addWidget(self.GERG, 12, 0, 1, 3)
+        layout.addWidget(self.GERG, 13, 0, 1, 3)
         layout.addItem(QtWidgets.QSpacerItem(
             10, 10, QtWidgets.QSizePolicy.Expanding,
-            QtWidgets.QSizePolicy.Expanding), 13, 0, 1, 4)
+            QtWidgets.QSizePolicy.Expanding), 14, 0, 1, 4)
+
+        self.MEoS.toggled.connect(self.TTSE.setEnabled)
 
         if os.environ["freesteam"] == "True":
             self.iapws.toggled.connect(self.freesteam.setEnabled)
@@ -119,6 +128,8 @@ class UI_confThermo_widget(QtWidgets.QWidget):
             self.H.setCurrentIndex(config.getint("Thermo", "H"))
             self.Cp_ideal.setCurrentIndex(config.getint("Thermo", "Cp_ideal"))
             self.MEoS.setChecked(config.getboolean("Thermo", "MEoS"))
+            if config.has_option("Thermo", "TTSE"):
+                self.TTSE.setChecked(config.getboolean("Thermo", "TTSE"))
             self.iapws.setChecked(config.getboolean("Thermo", "iapws"))
             self.GERG.setChecked(config.getboolean("Thermo", "GERG"))
             self.freesteam.setChecked(config.getboolean("Thermo", "freesteam"))
@@ -128,7 +139,7 @@ class UI_confThermo_widget(QtWidgets.QWidget):
     def setKwargs(self, kwarg):
         config = getMainWindowConfig()
         self.setConfig(config)
-        for key in ["MEoS", "iapws", "GERG", "freesteam", "coolProp",
+        for key in ["MEoS", "TTSE", "iapws", "GERG", "freesteam", "coolProp",
                     "refprop"]:
             if kwarg[key] != Corriente.kwargs[key]:
                 self.__getattribute__(key).setChecked(kwarg[key])
@@ -160,6 +171,7 @@ class UI_confThermo_widget(QtWidgets.QWidget):
         kw["H"] = self.H.currentText().split(" (")[0]
         kw["Cp_ideal"] = self.Cp_ideal.currentIndex()
         kw["MEoS"] = self.MEoS.isChecked()
+        kw["TTSE"] = self.TTSE.isChecked()
         kw["iapws"] = self.iapws.isChecked()
         kw["GERG"] = self.GERG.isChecked()
         kw["freesteam"] = self.freesteam.isChecked()
@@ -177,6 +189,7 @@ class UI_confThermo_widget(QtWidgets.QWidget):
         config.set("Thermo", "H", str(self.H.currentIndex()))
         config.set("Thermo", "Cp_ideal", str(self.Cp_ideal.currentIndex()))
         config.set("Thermo", "MEoS", str(self.MEoS.isChecked()))
+        config.set("Thermo", "TTSE", str(self.TTSE.isChecked()))
         config.set("Thermo", "iapws", str(self.iapws.isChecked()))
         config.set("Thermo", "GERG", str(self.GERG.isChecked()))
         config.set("Thermo", "freesteam", str(self.freesteam.isChecked()))
@@ -193,6 +206,7 @@ class UI_confThermo_widget(QtWidgets.QWidget):
         config.set("Thermo", "H", "0")
         config.set("Thermo", "Cp_ideal", "0")
         config.set("Thermo", "MEoS", "False")
+        config.set("Thermo", "TTSE", "False")
         config.set("Thermo", "iapws", "False")
         config.set("Thermo", "GERG", "False")
         config.set("Thermo", "freesteam", "False")
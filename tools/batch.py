@@ -0,0 +1,232 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+'''Pychemqt, Chemical Engineering Process simulator
+Copyright (C) 2009-2017, Juan José Gómez Romera <jjgomera@gmail.com>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
+
+
+###############################################################################
+# Headless batch runner for pychemqt project files
+#
+# Load a project file, optionally change streams or equipments inputs, solve
+# the flowsheet and save the streams table in json format, without graphical
+# interface, so it can be used in computers without display. Usage:
+#
+#   python3 -m tools.batch project.pcq --set s1.T=350 --out results.json
+#
+#   --set: Change a input, with format <item>.<kwarg>=<value>, the item can
+#       be a stream (s1) or an equipment (e1), can be repeated
+#   --cases: Json file with a list of cases, each a dict with the --set
+#       values, {"s1.T": 350, "e1.razon": 3}
+#   --workers: Number of process to calculate the cases in parallel
+#
+#   The values are in the base units used in project file, T in K, P in Pa,
+#   flows in kg/s...
+#
+#   - runCase: Calculate a case
+#   - runBatch: Calculate several cases
+#   - streamsTable: Return the streams table of a project
+###############################################################################
+
+
+import argparse
+from ast import literal_eval
+from concurrent.futures import ProcessPoolExecutor
+import json
+import logging
+import os
+import sys
+
+
+# Define pychemqt environment
+path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+os.environ.setdefault("pychemqt", path + os.sep)
+if path not in sys.path:
+    sys.path.append(path)
+
+from tools.dependences import optional_modules  # noqa
+for module, use in optional_modules:
+    if module in os.environ:
+        continue
+    try:
+        __import__(module)
+        os.environ[module] = "True"
+    except ImportError:
+        os.environ[module] = ""
+
+import lib  # noqa
+from lib.config import setMainWindowConfig  # noqa
+from lib.project import Project  # noqa
+
+
+def _parseSet(txt):
+    """Parse a change with format <item>.<kwarg>=<value>"""
+    key, value = txt.split("=", 1)
+    try:
+        value = literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return key.strip(), value
+
+
+def _applyChanges(project, changes):
+    """Apply the changes to project inputs, without calculation
+
+    changes: Dict with the changes, {"s1.T": 350}"""
+    streams = {}
+    equipments = {}
+    for txt, value in changes.items():
+        item, kwarg = txt.split(".", 1)
+        if item[0] == "s":
+            streams.setdefault(int(item[1:]), {})[kwarg] = value
+        elif item[0] == "e":
+            equipments.setdefault(item, {})[kwarg] = value
+        else:
+            raise ValueError("Wrong item to change: %s" % txt)
+
+    for id, kwargs in streams.items():
+        stream = project.getStream(id).clone(**kwargs)
+        project._setStreamObject(id, stream)
+    for id, kwargs in equipments.items():
+        project.items[id].cleanOldValues(**kwargs)
+
+
+def streamsTable(project):
+    """Return the streams table of project as dict, the values in SI units,
+    T in K, P in Pa, flows in kg/s and kmol/s"""
+    table = {}
+    for id, (up, down, ind_up, ind_down, stream) in project.streams.items():
+        data = {"up": up, "down": down, "status": stream.status}
+        if stream.status:
+            data["T"] = stream.T
+            data["P"] = stream.P
+            data["x"] = stream.x
+            data["massFlow"] = stream.caudalmasico
+            data["molarFlow"] = stream.caudalmolar
+            data["ids"] = stream.ids
+            data["molarFraction"] = [float(x) for x in stream.fraccion]
+        table[id] = data
+    return table
+
+
+def runCase(filename, changes=None):
+    """Load the project in filename, apply the changes and solve it
+
+    filename: Path of pychemqt project file
+    changes: Optional dict with the changes, {"s1.T": 350}
+
+    Return a dict with the streams table and the equipments status"""
+    with open(filename, "r") as file:
+        data = json.load(file)
+    project = Project()
+    project.readFromJSON(data)
+    setMainWindowConfig(project.config)
+
+    if changes:
+        _applyChanges(project, changes)
+    project.solve()
+
+    equipment = {}
+    for id, equip in project.items.items():
+        if id[0] == "e":
+            equipment[id] = {"status": equip.status, "msg": equip.msg}
+
+    result = {}
+    result["file"] = filename
+    result["changes"] = changes or {}
+    result["streams"] = streamsTable(project)
+    result["equipment"] = equipment
+    result["recycles"] = project.recycles
+    return result
+
+
+def _runCase(args):
+    """Calculate a case in worker process, the errors are returned in result
+    so the others cases can continue"""
+    filename, changes = args
+    try:
+        return runCase(filename, changes)
+    except Exception as er:
+        logging.exception("Case %s %s failed" % (filename, changes))
+        return {"file": filename, "changes": changes or {}, "error": str(er)}
+
+
+def runBatch(filenames, cases=None, workers=1):
+    """Calculate the cases for each project file
+
+    filenames: List of project files
+    cases: List of dict with the changes of each case, default a single case
+        without changes
+    workers: Number of process to use"""
+    if not cases:
+        cases = [{}]
+    args = [(filename, case) for filename in filenames for case in cases]
+
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(workers) as executor:
+            return list(executor.map(_runCase, args))
+    else:
+        return [_runCase(arg) for arg in args]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Solve pychemqt project files without graphical interface")
+    parser.add_argument("projectFile", nargs="+",
+                        help="pychemqt project files to solve")
+    parser.add_argument("--set", dest="changes", action="append", default=[],
+                        help="Change a input, <item>.<kwarg>=<value>, "
+                             "s3.T=350 or e1.razon=3")
+    parser.add_argument("--cases",
+                        help="Json file with a list of cases to calculate, "
+                             "each a dict with the changes")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of process to calculate the cases")
+    parser.add_argument("--out", help="Output json file, default stdout")
+    parser.add_argument("-l", "--log", dest="loglevel", default="WARNING",
+                        help="Set level of report in log")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper()))
+
+    changes = dict(_parseSet(txt) for txt in args.changes)
+    if args.cases:
+        with open(args.cases, "r") as file:
+            cases = json.load(file)
+        for case in cases:
+            for key, value in changes.items():
+                case.setdefault(key, value)
+    else:
+        cases = [changes]
+
+    results = runBatch(args.projectFile, cases, args.workers)
+    if len(results) == 1:
+        results = results[0]
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(results, file, indent=4)
+    else:
+        json.dump(results, sys.stdout, indent=4)
+        print()
+
+    failed = isinstance(results, dict) and "error" in results or \
+        isinstance(results, list) and any("error" in r for r in results)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())